@@ -25,18 +25,20 @@
 # *  (C) 2022 TGD-Consulting , Author: Dirk Weyand                           *
 # ****************************************************************************/
 
+import micropython
 from micropython import const
 from machine import ADC, Pin, SPI, Timer, RTC, reset
 import network as net
 import uasyncio as a
-import urequests as r
 import gc
 import gc9a01
-from os import stat, rename
+import struct
+from os import stat, rename, remove
 from ws import AsyncWebsocketClient            # https://github.com/Vovaman/micropython_async_websocket_client
 from socket import getaddrinfo
-from time import sleep, ticks_ms, ticks_diff, localtime
-from math import atan2, degrees, sqrt, cos, sin, pi
+from time import ticks_ms, ticks_diff, localtime, time
+from math import cos, sin, pi
+from array import array
 
 #/*************************
 # *** Globale Parameter ***
@@ -47,16 +49,35 @@ _SSID = const('Your_SSID_Name')         # change to your WiFi SSID
 _PASSWORD = const('Your_WiFi_Password') # change to your passphrase
 #import rp2                             # uncomment and set your WiFi-Country
 #rp2.country('DE')                      # here in case of channel problems
+_WIFI_FILE = const('wifi.json')  # gemerkter Access Point (BSSID, Kanal) und DHCP-Lease
+_WIFI_FAST = const(30)           # Versuche à 100ms für das gezielte Verbinden
+_WIFI_LEASE = const(False)       # True: gemerkte DHCP-Lease beim gezielten Verbinden als feste Adresse nutzen
+_WIFI_STATIC = None              # statt DHCP, z.B. ('192.168.178.50', '255.255.255.0', '192.168.178.1', '192.168.178.1')
 
 # PiMowBot hostname
 _HOST = const('pimowbot.local')  # the name of the PiMowBot
 _TOKEN = const('12345')          # right Token required look@nohup.out
+_PMB_FILE = const('pimowbot.json')  # gemerkte IP und Fähigkeiten des PiMowBots
+_PMB_TTL = const(20)             # so viele Starts gilt die gemerkte IP, dann neu auflösen
 
 _TZ = const(2)                   # Timezone, local difference to GMT
 _LOG = const(False)              # Set to True to enable logging to flash, Set to None to disable
+_LOG_LVL = const(1)              # Meldungen unterhalb dieser Stufe verwerfen: 0 DEBUG, 1 INFO, 2 WARN
+_MET = const(False)              # Set to True to collect metrics (metrics.py on flash), HUD: Knopf 2s halten
+if _MET:
+    import metrics as met
+_HUD_N = const(7)                # Knopf so viele Abtastungen (à 290ms) halten, dann HUD an/aus
 _TM = const('2')                 # Thumb-Mode 2
 _SOCKET_DELAY_MS = const(5)      # Socket delay ms, increase on weak wifi-signal
 _RDELAY = const(10 * _SOCKET_DELAY_MS)
+_IMG_MAX = const(20480)          # max. Größe eines Thumbs in Bytes
+_IMG_SAVE = const(False)         # Set to True to store every thumb as image.jpg on flash
+_FP_MIN = const(500)             # kürzester Abstand zwischen zwei Bildanforderungen in ms
+_FP_MAX = const(5000)            # längster Abstand
+_FP_CTL = const(3000)            # so lange nach einem Steuerbefehl wird gesteuert, Bilder seltener
+_FP_TMO = const(5000)            # Bild nach so vielen ms nicht da, gilt als verloren
+_BIN = const(True)               # binäre Steuer-Frames anbieten, Set to False for text only
+_WS_PROTO = const('pmb-bin1')    # Subprotokoll für binäre Steuer-Frames
 
 ADCX = ADC(26)   # GPIO26, Pin#31
 ADCY = ADC(27)   # GPIO27, Pin#32
@@ -90,8 +111,77 @@ display = gc9a01.GC9A01(
         backlight=Pin(_BLK, Pin.OUT),
         rotation=2) # 180Grad
 
+_OP_BYTES = const(0x2)
+
+class WSClient(AsyncWebsocketClient):
+    # Binär-Frames (Thumbs) werden direkt in einen wiederverwendeten Puffer gelesen
+    def __init__(self, ms_delay_for_read: int = 5, size: int = _IMG_MAX):
+        super().__init__(ms_delay_for_read)
+        self.buf = bytearray(size)
+        self.mv = memoryview(self.buf)
+        self.bin = False     # binäre Steuer-Frames beim Handshake ausgehandelt
+        self.hdr = None      # Header der Handshake-Antwort
+
+    async def a_readline(self):
+        line = await super().a_readline()
+        if self.hdr is not None:
+            self.hdr.append(line)
+        return line
+
+    async def handshake(self, uri, headers=[], *args, **kwargs):
+        # binäre Steuer-Frames per Subprotokoll anbieten, Text bleibt die Rückfallebene
+        self.bin = False
+        self.hdr = []
+        if _BIN:
+            headers = headers + [(b'Sec-WebSocket-Protocol', _WS_PROTO.encode())]
+        try:
+            rc = await super().handshake(uri, headers, *args, **kwargs)
+            for l in self.hdr:
+                if l.lower().startswith(b'sec-websocket-protocol:') and _WS_PROTO.encode() in l:
+                    self.bin = _BIN
+        finally:
+            self.hdr = None
+        return rc
+
+    async def send_bin(self, buf):
+        if await self.open():
+            self.write_frame(_OP_BYTES, buf)
+
+    async def a_readinto(self, mv):
+        n = 0
+        while n < len(mv):
+            k = self.sock.readinto(mv[n:])
+            await a.sleep_ms(self.delay_read)
+            if k is None:    # noch keine Daten
+                continue
+            if k == 0:       # Verbindung zu: kein halbes Bild oder Frame weitergeben
+                raise ValueError("EOF")
+            n += k
+        return n
+
+    async def read_frame(self, max_size=None):
+        byte1, byte2 = struct.unpack('!BB', await self.a_read(2))
+        fin = bool(byte1 & 0x80)
+        opcode = byte1 & 0x0f
+        mask = bool(byte2 & (1 << 7))
+        length = byte2 & 0x7f
+        if length == 126:
+            length, = struct.unpack('!H', await self.a_read(2))
+        elif length == 127:
+            length, = struct.unpack('!Q', await self.a_read(8))
+        if mask:
+            mask_bits = await self.a_read(4)
+        if opcode == _OP_BYTES and not mask and length <= len(self.buf):
+            return fin, opcode, self.mv[:await self.a_readinto(self.mv[:length])]
+        data = await self.a_read(length)
+        if len(data) < length:   # recv() schließt die Verbindung, conn_ws() verbindet neu
+            raise ValueError("EOF")
+        if mask:
+            data = bytes(b ^ mask_bits[i % 4] for i, b in enumerate(data))
+        return fin, opcode, data
+
 # create instance of websocket client
-ws = AsyncWebsocketClient(_SOCKET_DELAY_MS)
+ws = WSClient(_SOCKET_DELAY_MS)
 
 led = Pin('LED', Pin.OUT)
 timer = Timer()
@@ -104,9 +194,35 @@ al = "none"       # alert note
 lt = 0            # normal thumbs
 w = False         # WebSocket Client
 g = False         # all information gathered?
-q = []            # empty queue, contains payload send via ws, init stop
+pip = "localhost" # IP des PiMowBots
+b0 = ticks_ms()   # Einschalten, Bezug der Boot-Zeitleiste
+qm = 0            # Queue: Bitmaske der anstehenden Nachrichten je Klasse (_Q_...)
+qn = 0            # davon anstehende Mäher-Ereignisse
 na = False        # bei True ist acknowledge erforderlich
-ec = 0            # error counter
+cb = bytearray(5) # binärer Steuer-Frame: Sequenz, Typ, Kraft*100, Winkel*10 (int16)
+mb = bytearray(5) # binärer Frame für den Mäher
+seq = 0           # Sequenznummer des Steuer-Frames, 1..255
+ec = 0            # Wiederholungen ohne Quittung in Folge
+_RTO_INIT = const(250)   # ms bis zur ersten Wiederholung, solange keine RTT gemessen ist
+_RTO_MIN = const(50)
+_RTO_MAX = const(2000)
+_RTX_MAX = const(8)      # so viele Wiederholungen ohne Quittung, dann neu verbinden
+srtt = 0          # geglättete RTT in ms (0 = noch nicht gemessen)
+rttv = 0          # deren Schwankung
+rto = _RTO_INIT   # Wartezeit bis zur nächsten Wiederholung
+tx = 0            # Steuerbefehl zuerst gesendet
+ts = 0            # zuletzt gesendet
+rtx = False       # wurde wiederholt, RTT nicht messbar (Karn)
+n_ack = 0         # Quittungen
+n_rtx = 0         # Wiederholungen
+fi = False        # Bild angefordert und noch nicht empfangen, höchstens eins
+fx = False        # Bild nach _FP_TMO verloren gegeben, kann aber noch kommen
+fs = 0            # Bild angefordert
+fl = 0            # letztes Bild fertig (oder verloren)
+ft = 0            # geglättete Übertragungsdauer eines Bildes in ms
+fd = 0            # geglättete Dekodierdauer
+lc = 0            # letzter Steuerbefehl an die Queue
+n_img = 0         # angezeigte Bilder
 h = False         # Heading of PiMowBot
 
 def shour(ts=localtime()):
@@ -122,37 +238,103 @@ def exists(file="main.py"):
     except OSError:
         return False
 
-def log(msg):
-    if _LOG is not None:
-        if _LOG:
-            if exists("myLog.txt") and 43008 > stat("myLog.txt")[6]:
-                lfile=open("myLog.txt","a")
-            else:
-                lfile=open("myLog.txt","w")    # overwrite if log > 42k
-            lfile.write(sdate()+" "+shour(localtime())+' '+ str(msg) +'\n')
+#/*********************************
+# *** Logger mit RAM-Ringpuffer ***
+# *********************************/
+
+_L_DEBUG = const(0)
+_L_INFO = const(1)
+_L_WARN = const(2)
+_LOG_N = const(64)               # Einträge im Ringpuffer
+_LOG_HI = const(48)              # ab so vielen Einträgen sofort schreiben
+_LOG_MS = const(5000)            # sonst alle 5s durch log_task()
+_LOG_MAX = const(43008)          # Größe je Logdatei, danach myLog.txt -> myLog_.txt
+
+lm = [None] * _LOG_N                        # Meldungen
+lts = array('i', bytes(4 * _LOG_N))         # Zeitstempel in Sekunden
+li = 0           # Schreibposition im Ringpuffer
+ln = 0           # noch nicht geschriebene Einträge
+lsz = -1         # Größe von myLog.txt, -1 = unbekannt
+
+def log(msg, lvl=_L_INFO):
+    # Meldung im RAM ablegen, Zeit formatieren und Schreiben erst in log_flush()
+    global li, ln
+    if _LOG is None or lvl < _LOG_LVL:
+        return
+    if not _LOG:
+        print(msg)
+        return
+    lm[li] = msg
+    lts[li] = time()
+    li = (li + 1) % _LOG_N
+    if ln < _LOG_N:
+        ln += 1      # sonst wird der älteste Eintrag überschrieben
+    if ln >= _LOG_HI:
+        log_flush()
+
+def log_flush():
+    # gesammelte Einträge in einem Rutsch schreiben, bei _LOG_MAX die Datei wechseln
+    global ln, lsz
+    n = ln
+    if not n:
+        return
+    ln = 0
+    i = (li - n) % _LOG_N
+    if lsz < 0:
+        lsz = stat("myLog.txt")[6] if exists("myLog.txt") else 0
+    lfile = open("myLog.txt", "a")
+    for k in range(n):
+        ts = localtime(lts[i])
+        l = sdate(ts) + " " + shour(ts) + ' ' + str(lm[i]) + '\n'
+        lm[i] = None
+        i = (i + 1) % _LOG_N
+        if lsz + len(l) > _LOG_MAX:
             lfile.close()
-        else:
-            print(msg)
+            try:
+                remove("myLog_.txt")
+            except OSError:
+                pass
+            rename("myLog.txt", "myLog_.txt")
+            lfile = open("myLog.txt", "w")
+            lsz = 0
+        lfile.write(l)
+        lsz += len(l)
+    lfile.close()
+
+def boot(stage, t):
+    # Boot-Zeitleiste: Dauer einer Stufe und Zeitpunkt seit dem Einschalten
+    log("BOOT: " + stage + " " + str(ticks_diff(ticks_ms(), t)) + "ms, bei " + str(ticks_diff(ticks_ms(), b0)) + "ms")
+
+async def log_task():
+    # schreibt die gesammelten Einträge mit niedriger Priorität
+    while True:
+        await a.sleep_ms(_LOG_MS)
+        log_flush()
 
 def do_rmp():
     if exists():
         log("INFO: benenne main.py in main_.py um")
         rename("main.py","main_.py")
+        log_flush()
         reset()
         return True
     else:
         log("INFO: keine main.py vorhanden")
         return False
     
-def restore(abtn=_BTN):
-    a = Pin(abtn, Pin.IN, Pin.PULL_UP)
+rw = True         # Doppelklick-Fenster offen, der Knopf gehört restore()
+
+async def restore(abtn=_BTN):
+    # Doppelklick-Fenster, läuft parallel zum Verbindungsaufbau
+    global rw
+    p = Pin(abtn, Pin.IN, Pin.PULL_UP)
     b = 0
     t = 0
     start=ticks_ms()
-    while ticks_ms()-start <=5000:
-        if a.value()==0:
+    while ticks_diff(ticks_ms(), start) <= 5000:
+        if p.value()==0:
             b += 1
-        if a.value()==1 and b > 0:
+        if p.value()==1 and b > 0:
             t += 1
             b = 0
         if t > 1:
@@ -160,35 +342,131 @@ def restore(abtn=_BTN):
                 break
             else:
                 t = 0
-        sleep(0.1)
+        await a.sleep_ms(100)
+    while p.value() == 0:     # erst nach dem Loslassen steuert der Knopf wieder
+        await a.sleep_ms(100)
+    rw = False
+    boot("restore", start)
+
+#/***********************************
+# *** Sprite-Cache für das GC9A01 ***
+# ***********************************/
+
+_SC_MAX = const(16384)  # Bytes für gerenderte Texte, danach wird der Cache geleert
+sc = {}          # (Text, Vordergrund, Hintergrund) -> (RGB565-Puffer, Breite, Höhe)
+scb = 0          # belegte Bytes im Cache
+rows = {}        # (x, y) -> (Schlüssel, Breite) des dort zuletzt gezeichneten Textes
+
+def sprite(font, text, fg, bg, wmax=240):
+    # Text einmalig in einen RGB565-Puffer rendern (big endian, wie blit_buffer() ihn erwartet)
+    global scb
+    k = (text, fg, bg)
+    s = sc.get(k)
+    if s:
+        return s
+    fw = font.WIDTH
+    fh = font.HEIGHT
+    bpr = (fw + 7) // 8          # Bytes je Glyphenzeile
+    n = min(len(text), wmax // fw)
+    w = n * fw
+    buf = bytearray(w * fh * 2)
+    f0 = fg >> 8
+    f1 = fg & 255
+    b0 = bg >> 8
+    b1 = bg & 255
+    bits = font.FONT
+    for i in range(n):
+        g = (ord(text[i]) - font.FIRST) * fh * bpr
+        for y in range(fh):
+            p = (y * w + i * fw) * 2
+            for x in range(fw):
+                if bits[g + y * bpr + (x >> 3)] & (0x80 >> (x & 7)):
+                    buf[p] = f0
+                    buf[p + 1] = f1
+                else:
+                    buf[p] = b0
+                    buf[p + 1] = b1
+                p += 2
+    if scb + len(buf) > _SC_MAX:
+        sc.clear()
+        scb = 0
+    s = (buf, w, fh)
+    sc[k] = s
+    scb += len(buf)
+    return s
+
+def draw_text(font, text, x, y, w, h, fg, bg, cache=True):
+    # Textfeld w x h zeichnen, nur wenn sich der Inhalt geändert hat. Aus dem Cache nur
+    # wiederkehrende Texte, wechselnde (Uhr, Werte, Meldungen) direkt per display.text()
+    k = (text, fg, bg)
+    o = rows.get((x, y))
+    if o and o[0] == k:
+        return
+    if cache:
+        buf, sw, sh = sprite(font, text, fg, bg, w)
+    else:
+        text = text[:w // font.WIDTH]
+        sw = len(text) * font.WIDTH
+    if o is None:                # Feld unbekannt, einmal ganz löschen
+        display.fill_rect(x, y, w, h, bg)
+    elif o[1] > sw:              # nur den Rest des vorherigen, längeren Textes löschen
+        display.fill_rect(x + sw, y, o[1] - sw, h, bg)
+    if sw:
+        if cache:
+            display.blit_buffer(buf, x, y, sw, sh)
+        else:
+            display.text(font, text, x, y, fg, bg)
+    rows[(x, y)] = (k, sw)
 
 def reset_display():
     # enable display and clear screen
     display.init()
     display.fill(0) # clear 
+    rows.clear()
     
 def display_text(text):
     import vga1_8x16 as font
-    display.fill_rect(2, 155, 236, 20, gc9a01.color565(90, 220, 240))
-    display.text(font,text,2,155, gc9a01.color565(132, 132, 132), gc9a01.color565(90, 220, 240))
+    draw_text(font, text, 2, 155, 236, 20, gc9a01.color565(132, 132, 132), gc9a01.color565(90, 220, 240), False)
 
 def display_alert(toggle=True):
     import vga1_8x16 as font
-    display.fill_rect(2, 155, 236, 20, gc9a01.color565(90, 220, 240))
     if toggle:
-        display.text(font," >> " + al + " << ",2,155, gc9a01.color565(132, 132, 132), gc9a01.color565(90, 220, 240))
+        draw_text(font, " >> " + al + " << ", 2, 155, 236, 20, gc9a01.color565(132, 132, 132), gc9a01.color565(90, 220, 240))
     else:
-        display.text(font," >> " + al + " << ",2,155, gc9a01.color565(250, 132, 132), gc9a01.color565(90, 220, 240))
+        draw_text(font, " >> " + al + " << ", 2, 155, 236, 20, gc9a01.color565(250, 132, 132), gc9a01.color565(90, 220, 240))
 
 def display_image(file="image.jpg", x=0, y=0):
     log("Display image: " + file)
+    rows.clear()     # Texte sind übermalt
     #display.jpg(file, x, y, gc9a01.FAST)
     display.jpg(file, x, y, gc9a01.SLOW)
     gc.collect()     #Run a garbage collection.
 
+jb = True        # gc9a01.jpg() kann aus dem Puffer dekodieren
+
+def display_thumb(data, x=0, y=0):
+    global jb
+    # Thumb direkt aus dem Empfangspuffer darstellen, Flash nur als Rückfallebene
+    rows.clear()     # Texte sind übermalt
+    if _IMG_SAVE or not jb:
+        File = open ("image.jpg","wb")
+        File.write(data)
+        File.close()
+    if jb:
+        try:
+            display.jpg(data, x, y, gc9a01.SLOW)
+            return
+        except TypeError:    # ältere Firmware erwartet einen Dateinamen
+            jb = False
+            log("INFO: jpg() aus dem Puffer nicht möglich, nutze image.jpg")
+            File = open ("image.jpg","wb")
+            File.write(data)
+            File.close()
+    display.jpg("image.jpg", x, y, gc9a01.SLOW)
+
 def display_uhr(zeit):
     import vga2_bold_16x32 as font
-    display.text(font,zeit,55,15, gc9a01.color565(132, 132, 132), gc9a01.color565(0, 0, 0))
+    draw_text(font, zeit, 55, 15, 128, 32, gc9a01.color565(132, 132, 132), gc9a01.color565(0, 0, 0), False)
 
 def display_compass(alpha=0):
     deg = (alpha * -1) + 270 # Korrektur Kompass-Rose 0=N -> Einheitskreis 90=N
@@ -200,60 +478,50 @@ def display_compass(alpha=0):
 def display_up(set=True):
     import vga2_8x8 as font
     if set:
-        display.text(font,30,96,113, gc9a01.color565(250, 132, 132), gc9a01.color565(80, 80, 80))
+        draw_text(font, chr(30), 96, 113, 8, 8, gc9a01.color565(250, 132, 132), gc9a01.color565(80, 80, 80))
     else:
-        display.text(font,30,96,113, gc9a01.color565(80, 80, 80), gc9a01.color565(80, 80, 80))
+        draw_text(font, chr(30), 96, 113, 8, 8, gc9a01.color565(80, 80, 80), gc9a01.color565(80, 80, 80))
         
 def display_down(set=True):
     import vga2_8x8 as font
     if set:
-        display.text(font,31,96,142, gc9a01.color565(250, 132, 132), gc9a01.color565(80, 80, 80))
+        draw_text(font, chr(31), 96, 142, 8, 8, gc9a01.color565(250, 132, 132), gc9a01.color565(80, 80, 80))
     else:
-        display.text(font,31,96,142, gc9a01.color565(80, 80, 80), gc9a01.color565(80, 80, 80))
+        draw_text(font, chr(31), 96, 142, 8, 8, gc9a01.color565(80, 80, 80), gc9a01.color565(80, 80, 80))
 
 def display_left(set=True):
     import vga2_8x8 as font
     if set:
-        display.text(font,17,82,127, gc9a01.color565(250, 132, 132), gc9a01.color565(80, 80, 80))
+        draw_text(font, chr(17), 82, 127, 8, 8, gc9a01.color565(250, 132, 132), gc9a01.color565(80, 80, 80))
     else:
-        display.text(font,17,82,127, gc9a01.color565(80, 80, 80), gc9a01.color565(80, 80, 80))
+        draw_text(font, chr(17), 82, 127, 8, 8, gc9a01.color565(80, 80, 80), gc9a01.color565(80, 80, 80))
 
 def display_right(set=True):
     import vga2_8x8 as font
     if set:
-        display.text(font,16,111,127, gc9a01.color565(250, 132, 132), gc9a01.color565(80, 80, 80))
+        draw_text(font, chr(16), 111, 127, 8, 8, gc9a01.color565(250, 132, 132), gc9a01.color565(80, 80, 80))
     else:
-        display.text(font,16,111,127, gc9a01.color565(80, 80, 80), gc9a01.color565(80, 80, 80))
+        draw_text(font, chr(16), 111, 127, 8, 8, gc9a01.color565(80, 80, 80), gc9a01.color565(80, 80, 80))
 
 def display_center(set=True):
     import vga2_8x8 as font
     if set:
-        display.text(font,219,96,127, gc9a01.color565(250, 132, 132), gc9a01.color565(132, 132, 132))
+        draw_text(font, chr(219), 96, 127, 8, 8, gc9a01.color565(250, 132, 132), gc9a01.color565(132, 132, 132))
     else:
-        display.text(font,219,96,127, gc9a01.color565(132, 132, 132), gc9a01.color565(132, 132, 132))
-
-def display_dir(odir="Init"):
-    if (odir == "Init"):
-        display_up()
-        sleep(0.3)
-        display_right()
-        sleep(0.3)
-        display_down()
-        sleep(0.3)
-        display_left()
-        sleep(0.3)
-        display_center()
-        sleep(0.3)
-        display_up(0)
-        sleep(0.3)
-        display_right(0)
-        sleep(0.3)
-        display_down(0)
-        sleep(0.3)
-        display_left(0)
-        sleep(0.3)
-        display_center(0)
-        sleep(0.3)
+        draw_text(font, chr(219), 96, 127, 8, 8, gc9a01.color565(132, 132, 132), gc9a01.color565(132, 132, 132))
+
+async def display_intro():
+    # kurze Vorstellung der Steuerung, läuft parallel zum Verbindungsaufbau
+    t = ticks_ms()
+    for set in (1, 0):
+        for f in (display_up, display_right, display_down, display_left, display_center):
+            f(set)
+            await a.sleep_ms(300)
+    boot("intro", t)
+
+async def display_later(text, ms):
+    await a.sleep_ms(ms)
+    display_text(text)
 
 def set_rtc(timestamp):
     import ujson
@@ -274,30 +542,39 @@ def set_rtc(timestamp):
     log("INFO: Zeit erfolgreich gesetzt ("+timestamp+')')
     return True
 
-def get_request(URL, type="HEAD", format="BIN"):
+async def get_request(pip, path, type="HEAD"):
+    # einfache Abfrage am Webserver des PiMowBots auf Basis der uasyncio Streams,
+    # HEAD liefert True bei Status 200, TIME stellt zusätzlich die Uhr, GET liefert den Text
     rc = False
     try:
         jetzt = ticks_ms()
-        if (type == "HEAD"):
-            response = r.head(URL)
-            if (200 == response.status_code):
-                rc = True
-        else:
-            if (type == "TIME"):
-                response = r.head(URL)
-                if 200 == response.status_code and set_rtc(response.headers['Date']):
-                    rc = True
-            else:
-                gc.collect()     #Run a garbage collection.
-                response = r.get(URL)
-                if (format == "BIN"):
-                    rc = response.content
+        rd, wr = await a.wait_for(a.open_connection(pip, 8080), 5)
+        try:
+            wr.write(("GET" if type == "GET" else "HEAD").encode() + b" " + path.encode() + b" HTTP/1.0\r\nHost: " + pip.encode() + b"\r\n\r\n")
+            await wr.drain()
+            S = int((await a.wait_for(rd.readline(), 5)).split(None, 2)[1])
+            date = None
+            while True:
+                l = await a.wait_for(rd.readline(), 5)
+                if not l or l == b"\r\n":
+                    break
+                if l.lower().startswith(b"date:"):
+                    date = l[5:].strip().decode()
+            if 200 == S:
+                if type == "GET":
+                    rc = (await a.wait_for(rd.read(64), 5)).decode()
+                elif type == "TIME":
+                    rc = date is not None and set_rtc(date)
                 else:
-                    rc = response.text
-        S = response.status_code
-        response.close()
-        log("Delay-" + type + ": " + str(ticks_diff(ticks_ms(), jetzt)) + "ms, Status: " + str(S))
-    except:
+                    rc = True
+        finally:
+            wr.close()
+            await wr.wait_closed()
+        d = ticks_diff(ticks_ms(), jetzt)
+        if _MET:
+            met.hist("http", d)
+        log("Delay-" + type + ": " + str(d) + "ms, Status: " + str(S))
+    except Exception:
         rc = False
     return rc
 
@@ -305,46 +582,165 @@ def get_ip(host, port=8080):
     addr_info = getaddrinfo (host, port)
     return addr_info[0][-1][0]
 
+def pmb_load():
+    # gemerkte IP und Abfrageergebnisse vom letzten Start, None wenn keine oder abgelaufen
+    import ujson
+    try:
+        f = open(_PMB_FILE)
+        c = ujson.load(f)
+        f.close()
+    except (OSError, ValueError):
+        return None
+    if c.get("h") != _HOST or c.get("n", _PMB_TTL) >= _PMB_TTL:
+        return None
+    return c
+
+def pmb_save(c):
+    # c: {"h": Hostname, "ip": IP, "lt": Large thumb mode, "pc": PiCAM, "n": Starts}
+    import ujson
+    try:
+        if c is None:
+            remove(_PMB_FILE)
+        else:
+            f = open(_PMB_FILE, "w")
+            ujson.dump(c, f)
+            f.close()
+    except OSError:
+        pass
+
+async def probe(c=None):
+    # Abfragen beim PiMowBot gleichzeitig und parallel zum WebSocket-Handshake,
+    # c: gemerkte Werte vom letzten Start, die Abfrage bestätigt oder korrigiert sie
+    global al, pip
+    t = ticks_ms()
+    while True:
+        rc, pc, lt = await a.gather(
+            get_request(pip, "/favicon.ico", "TIME"),
+            get_request(pip, "/image.jpg"),
+            get_request(pip, "/cgi-bin/xcom.html?Token=" + _TOKEN + "&Thumb=mode", "GET"))
+        if rc or not c:
+            break
+        # gemerkte IP antwortet nicht mehr, Namen doch auflösen
+        log(f'PiMowBot not found on {pip}, resolving {_HOST}')
+        c = None
+        try:
+            ip = get_ip(_HOST)
+        except OSError:
+            break
+        if ip == pip:
+            break
+        pip = ip          # der nächste WebSocket-Handshake nutzt die neue IP
+        log(f'PiMowBot IP is {pip}')
+    if (True == rc):
+        log('PiMowBot is ready 4 RC.')
+        log(f'PiMowBot-PiCAM is ready {pc}')
+        if lt:
+            if (0 <= lt.find('1')):
+                lt = 1     # Convert is installed @ PiMowBot
+            else:
+                lt = 0
+            log(f'Large thumb mode "{lt}"')
+        pmb_save({"h": _HOST, "ip": pip, "lt": lt, "pc": pc, "n": c["n"] + 1 if c else 0})
+    else:
+        log('PiMowBot is not ready !!!')
+        al = "PiMowBot not found"
+        display_alert()
+        pmb_save(None)    # beim nächsten Start wieder auflösen
+    boot("probe", t)
+
 def gathered(IP):
-    global g, al
+    global g, pip
     if not g:
         display_text("    my IP: " + IP)
         timer.deinit() #blinken beenden
         led.off()      #LED ausschalten
-        pip = get_ip(_HOST)
-        log(f'PiMowBot IP is {pip}')
-        sleep(3)  # zum Lesen der IP-Addr der RC auf dem Display
-        rc = get_request("http://" + pip + ":8080/favicon.ico", "TIME")
-        if (True == rc):
-            log('PiMowBot is ready 4 RC.')
-            # now check PiCAM
-            pc = get_request("http://" + pip + ":8080/image.jpg")
-            log('PiMowBot-PiCAM is ready.')
-            # now check large thumb support
-            lt = get_request("http://" + pip + ":8080/cgi-bin/xcom.html?Token=" + _TOKEN + "&Thumb=mode", "Get", "TXT")
-            if lt:
-                if (0 <= lt.find('1')):
-                    lt = 1     # Convert is installed @ PiMowBot
-                else:
-                    lt = 0
-                log(f'Large thumb mode "{lt}"')
+        t = ticks_ms()
+        c = pmb_load()
+        if c:              # Warmstart mit der gemerkten IP, Abfrage prüft sie im Hintergrund
+            pip = c["ip"]
+            log(f'PiMowBot IP is {pip} (gemerkt, Start {c["n"] + 1})')
         else:
-            log('PiMowBot is not ready !!!')
-            al = "PiMowBot not found"
-            display_alert()
+            pip = get_ip(_HOST)
+            log(f'PiMowBot IP is {pip}')
+        boot("dns", t)
+        a.create_task(probe(c))
         g = True
-        # kurze Vorstellung der Steuerung
-        display_dir()       
-        display_text(" ||||||||||||||||||||||||||||||||||||||||||||||||||||||| ")
-        sleep(1)
-        return pip
+        # IP-Addr der RC noch 3s lesbar lassen
+        a.create_task(display_later(" ||||||||||||||||||||||||||||||||||||||||||||||||||||||| ", 3000))
     
+def wifi_load():
+    # gemerkter Access Point und Lease vom letzten Verbinden, None wenn keiner
+    import ujson
+    try:
+        f = open(_WIFI_FILE)
+        c = ujson.load(f)
+        f.close()
+    except (OSError, ValueError):
+        return None
+    return c if c.get("s") == _SSID else None
+
+def wifi_scan(wlan):
+    # vor einem vollständigen Verbinden (noch ohne Verbindung) den stärksten Access Point
+    # suchen, scan() blockiert etwa 1-2s
+    ap = None
+    for n in wlan.scan():    # (ssid, bssid, channel, RSSI, security, hidden)
+        if n[0].decode() == _SSID and (ap is None or n[3] > ap[3]):
+            ap = n
+    return ap
+
+def wifi_learn(wlan, ap):
+    # nach dem vollständigen Verbinden Access Point und Lease merken
+    import ujson
+    from ubinascii import hexlify
+    if ap is None:
+        return
+    try:
+        f = open(_WIFI_FILE, "w")
+        ujson.dump({"s": _SSID, "b": hexlify(ap[1]).decode(), "c": ap[2], "i": wlan.ifconfig()}, f)
+        f.close()
+        log("WiFi: BSSID " + hexlify(ap[1], ":").decode() + ", Kanal " + str(ap[2]) + " gemerkt")
+    except OSError:
+        pass
+
+async def wifi_fast(wlan, c):
+    # gezielt mit dem gemerkten Access Point (und der Lease) verbinden, ohne Scan und DHCP
+    from ubinascii import unhexlify
+    lease = _WIFI_LEASE and not _WIFI_STATIC
+    if lease:
+        wlan.ifconfig(tuple(c["i"]))
+    wlan.connect(_SSID, _PASSWORD, bssid=unhexlify(c["b"]))
+    n = _WIFI_FAST
+    while n > 0 and not wlan.isconnected() and wlan.status() >= 0:
+        n -= 1
+        await a.sleep_ms(100)
+    if wlan.isconnected():
+        return True
+    log("WiFi: gezieltes Verbinden (Kanal " + str(c["c"]) + ") fehlgeschlagen")
+    wlan.disconnect()
+    if lease:
+        try:
+            wlan.ifconfig("dhcp")
+        except Exception:
+            pass
+    return False
+
+wap = None        # beim vollständigen Verbinden gefundener Access Point, bis er gemerkt ist
+
 async def wlan_connect(SSID: str, pwd: str, attempts: int = 5, delay_in_msec: int = 200) -> net.WLAN:
-    global al
+    global al, wap
+    t = ticks_ms()
     #Connect to WLAN
     wlan = net.WLAN(net.STA_IF)
     wlan.active(1)
     wlan.config(pm = 0xa11140)    # disable Power-saving mode
+    if _WIFI_STATIC:
+        wlan.ifconfig(_WIFI_STATIC)
+    # läuft noch ein vollständiges Verbinden vom letzten Aufruf, nicht unterbrechen
+    c = None if wlan.isconnected() or wlan.status() == net.STAT_CONNECTING else wifi_load()
+    fast = c is not None and await wifi_fast(wlan, c)
+    # noch nicht verbunden, es kann also nichts liegen bleiben: Access Point suchen
+    if not (fast or wlan.isconnected() or wlan.status() == net.STAT_CONNECTING):
+        wap = wifi_scan(wlan)
     count = 1
     # Wait for connect or fail
     while not wlan.isconnected() and count <= attempts:
@@ -356,6 +752,10 @@ async def wlan_connect(SSID: str, pwd: str, attempts: int = 5, delay_in_msec: in
         
     if wlan.isconnected():
         log("Connected on {}".format(wlan.ifconfig()[0]))
+        log("WiFi: " + ("gezielt" if fast else "vollständig") + " verbunden in " + str(ticks_diff(ticks_ms(), t)) + "ms")
+        if not fast:
+            wifi_learn(wlan, wap)
+            wap = None
     else:
         al = "WiFi connect failed!!"
         display_alert()
@@ -365,108 +765,406 @@ async def wlan_connect(SSID: str, pwd: str, attempts: int = 5, delay_in_msec: in
 force = 0
 angel = 0
 
-def read_analog(ADC):
-    val = ADC.read_u16()  # 0 - 65535
-    return val
-      
-def joy(channel): # left right
-    val = read_analog(channel)
-    val -= 32768
-    val /= 28456
-    return val
+#/*******************************
+# *** Joystick Abtastung/Kalib ***
+# *******************************/
+
+_JOY_HZ = const(200)             # Abtastrate der ADCs durch den Timer
+_JOY_N = const(8)                # Werte je Kanal im Ringpuffer (Mittelwert)
+_JOY_CAL = const('joycal.json')  # Kalibrierung auf dem Flash
+ADCS = (ADCX, ADCY)              # Kanäle: 0 left right, 1 up down
+
+jt = Timer()                                 # Timer für die Abtastung
+joy_buf = array('H', bytes(2 * _JOY_N * len(ADCS)))  # Ringpuffer je Kanal
+js = array('i', bytes(4 * len(ADCS)))       # laufende Summe je Kanal
+ji = 0                                       # Schreibposition im Ringpuffer
+jc = [32768] * len(ADCS)                     # Mitte je Kanal
+jl = [28456] * len(ADCS)                     # Ausschlag Mitte bis Minimum
+jh = [28456] * len(ADCS)                     # Ausschlag Mitte bis Maximum
+joy_dz = 0                                   # Totzone um die Mitte
+
+def joy_sample(t):
+    # Timer-Callback: je Kanal ein Wert in den Ringpuffer, Summe nachführen
+    global ji
+    i = ji
+    for c in range(len(ADCS)):
+        k = c * _JOY_N + i
+        v = ADCS[c].read_u16()  # 0 - 65535
+        js[c] += v - joy_buf[k]
+        joy_buf[k] = v
+    ji = (i + 1) % _JOY_N
+
+def joy_start():
+    global joy_dz
+    # Kalibrierung laden, Ringpuffer vorbelegen und Abtastung starten
+    try:
+        import ujson
+        f = open(_JOY_CAL)
+        cal = ujson.load(f)
+        f.close()
+        jc[:] = cal["c"]
+        jl[:] = cal["l"]
+        jh[:] = cal["h"]
+        joy_dz = cal["d"]
+        log("INFO: Joystick-Kalibrierung geladen " + str(cal))
+    except (OSError, ValueError, KeyError):
+        log("INFO: keine Joystick-Kalibrierung, nutze Standardwerte")
+    for c in range(len(ADCS)):
+        v = ADCS[c].read_u16()
+        for i in range(_JOY_N):
+            joy_buf[c * _JOY_N + i] = v
+        js[c] = v * _JOY_N
+    jt.init(freq=_JOY_HZ, mode=Timer.PERIODIC, callback=joy_sample)
+
+def joy_raw(c):
+    return js[c] // _JOY_N      # gefilterter Wert des Kanals
+
+async def calibrate():
+    global joy_dz
+    # Einmalige Kalibrierung: erst Mitte und Rauschen, dann den Ausschlag erfassen
+    n = len(ADCS)
+    display_text("  Joystick loslassen  ")
+    await a.sleep_ms(1000)
+    lo = [65535] * n
+    hi = [0] * n
+    for i in range(100):        # 2s Mitte
+        for c in range(n):
+            v = joy_raw(c)
+            lo[c] = min(lo[c], v)
+            hi[c] = max(hi[c], v)
+        await a.sleep_ms(20)
+    mid = [(lo[c] + hi[c]) // 2 for c in range(n)]
+    dz = max(hi[c] - lo[c] for c in range(n)) + 128
+    display_text(" Joystick kreisen lassen ")
+    for i in range(300):        # 6s Ausschlag
+        for c in range(n):
+            v = joy_raw(c)
+            lo[c] = min(lo[c], v)
+            hi[c] = max(hi[c], v)
+        await a.sleep_ms(20)
+    l = [mid[c] - lo[c] for c in range(n)]
+    h = [hi[c] - mid[c] for c in range(n)]
+    if min(l + h) < 8 * dz:     # Joystick nicht bewegt, Kalibrierung verwerfen
+        log("INFO: Joystick-Kalibrierung verworfen")
+        display_text(" Kalibrierung verworfen ")
+        return False
+    jc[:] = mid
+    jl[:] = l
+    jh[:] = h
+    joy_dz = dz
+    import ujson
+    f = open(_JOY_CAL, "w")
+    ujson.dump({"c": jc, "l": jl, "h": jh, "d": joy_dz}, f)
+    f.close()
+    log("INFO: Joystick kalibriert " + str(mid) + " " + str(l) + " " + str(h) + " " + str(dz))
+    display_text(" Kalibrierung gespeichert ")
+    return True
+
+_ATAN = array('H', (0, 90, 179, 268, 358, 447, 536, 624, 713, 800, 888, 975, 1062, 1148,
+    1234, 1319, 1404, 1488, 1571, 1653, 1735, 1817, 1897, 1977, 2056, 2134, 2211, 2287,
+    2363, 2438, 2511, 2584, 2657, 2728, 2798, 2867, 2936, 3003, 3070, 3136, 3201, 3264,
+    3327, 3390, 3451, 3511, 3571, 3629, 3687, 3744, 3800, 3855, 3909, 3963, 4016, 4067,
+    4119, 4169, 4218, 4267, 4315, 4363, 4409, 4455, 4500, 4500))  # atan(i/64) in 1/100 Grad
+
+@micropython.viper
+def isqrt(n: int) -> int:
+    # ganzzahlige Wurzel, bitweise (n < 2^30)
+    r = 0
+    b = 1 << 28
+    while b > n:
+        b >>= 2
+    while b:
+        if n >= r + b:
+            n -= r + b
+            r = (r >> 1) + b
+        else:
+            r >>= 1
+        b >>= 2
+    return r
+
+@micropython.native
+def compass(x, y):
+    # Winkel von (x, y) in 1/10 Grad: up 0 right 900 left -900 down 1800
+    if x == 0 and y == 0:
+        return 900
+    ax = x if x > 0 else -x
+    ay = y if y > 0 else -y
+    if ax >= ay:     # atan über die Tabelle im ersten Oktanten, linear interpoliert
+        r = (ay << 14) // ax
+        i = r >> 8
+        a = _ATAN[i] + (((_ATAN[i + 1] - _ATAN[i]) * (r & 255)) >> 8)
+    else:
+        r = (ax << 14) // ay
+        i = r >> 8
+        a = 9000 - _ATAN[i] - (((_ATAN[i + 1] - _ATAN[i]) * (r & 255)) >> 8)
+    a = (a + 5) // 10
+    if x < 0:
+        a = 1800 - a
+    if y < 0:
+        a = -a       # wie atan2: oben 0 (E) bis 1800 (W)/ unten -0 (E) bis -1800 (W)
+    a = 900 - a      # Korrektur, 90 Grad nach rechts drehen und negieren
+    if a > 1800:
+        a -= 3600
+    return a
+
+@micropython.native
+def joy(c):
+    # aktueller gefilterter Wert von Kanal c, kalibriert auf -1000 .. 1000
+    val = joy_raw(c) - jc[c]
+    if -joy_dz < val < joy_dz:
+        return 0
+    # auf +-1000 begrenzen, auch wenn die Kalibrierung den Ausschlag zu klein gemessen hat
+    # (isqrt() in get_joy() ist für diesen Bereich ausgelegt)
+    if val > 0:
+        return min(1000, (val * 1000) // jh[c])
+    return -min(1000, (-val * 1000) // jl[c])
     
 def get_joy():
     global angel, force
-    x = joy(ADCX)    # left right
+    x = joy(0)       # left right
     if _NX:          # Werte x negieren
-        x = x * -1
+        x = -x
     #print("Joy-X: ",x)
-    y = joy(ADCY)    # up down
+    y = joy(1)       # up down
     if _NY:          # Werte y negieren
-        y = y * -1
+        y = -y
     #print("Joy-Y: ",y)
-    angel = degrees(atan2(y,x)) # Ist-Werte oben 0 (E) bis 180 (W)/ unten -0 (E) bis -180 (W)
-    # Soll-Werte up: 0 right 90 left -90 down 180
-    # daher Korrektur:
-    if angel < 0: # untere Hälfte Winkel von 90 (E) bis 180 (S) und -90 (W) bis -180 (S)
-        if angel >= -90:
-            angel = 90 + (angel * -1)
-        else:
-            angel = (angel * -1) - 270            
-    else: # obere Hälfte -90 (E) bis 90 (W)
-        angel -= 90      # Korrektur, 90 Grad nach rechts drehen
-        angel *= -1      # und negieren
-    angel = round(angel, 1)    
+    angel = compass(x, y)   # in 1/10 Grad
     #print("Winkel: ",angel)
-    force = round(sqrt((x*x)+(y*y)),2)
+    force = (isqrt((x*x + y*y) * 100) + 50) // 100   # in 1/100
     #print("Force: ",force)
     #z = joy(ADCZ)    # rotate cw - ccw
     #    if _NZ:      # Werte z negieren
-    #    z = z * -1
+    #    z = -z
     #print("Joy-Z: ",z)
 
+_T_STOP = const(0)
+_T_DRIVE = const(1)
+_T_MOWER = const(2)
+
+# Queue: ein Platz je Nachrichtenklasse, das niedrigste Bit hat Vorrang
+_Q_CTL = const(1)     # Steuerbefehl in cb, es gilt der letzte, wird quittiert
+_Q_MOW = const(2)     # Mäher, jedes Ereignis wird gesendet
+_Q_TELE = const(4)    # Telemetrie anfordern ("1"), mehrfach = einmal
+_Q_IMG = const(8)     # Bild anfordern ("0"), mehrfach = einmal
+
+def q_put(c):
+    global qm, qn, na, lc
+    if c == _Q_CTL:
+        na = False    # Quittung für einen älteren Steuerbefehl zählt nicht mehr
+        lc = ticks_ms()
+    elif c == _Q_MOW:
+        qn += 1
+    qm |= c
+
+def q_done(c):
+    global qm, qn
+    if c == _Q_MOW:
+        qn -= 1
+        if qn > 0:
+            return
+    qm &= ~c
+
+def acked():
+    # Steuerbefehl quittiert: aus der Queue nehmen, RTT messen und RTO neu berechnen (RFC 6298)
+    global na, ec, srtt, rttv, rto, n_ack
+    q_done(_Q_CTL)
+    na = False
+    ec = 0
+    n_ack += 1
+    if not rtx:
+        r = ticks_diff(ticks_ms(), tx)
+        if _MET:
+            met.hist("ws_ack", r)
+        if srtt:
+            rttv = (3 * rttv + abs(srtt - r)) // 4
+            srtt = (7 * srtt + r) // 8
+        else:
+            srtt = r
+            rttv = r // 2
+    rto = max(_RTO_MIN, min(_RTO_MAX, srtt + 4 * rttv)) if srtt else _RTO_INIT
+
+def pack_ctl(t, f, w, b=cb):
+    # Steuerbefehl in b ablegen (Kraft f in 1/100, Winkel w in 1/10 Grad),
+    # jede Änderung bekommt eine neue Sequenznummer
+    global seq
+    seq = seq % 255 + 1
+    struct.pack_into('<BBBh', b, 0, seq, t, min(255, f), w)
+
+def ctl_text():
+    # Textformat des Steuerbefehls in cb für PiMowBots ohne binäre Steuer-Frames
+    if cb[1] == _T_STOP:
+        return "[0 0]"
+    return "[" + str(cb[2] / 100) + " " + str(struct.unpack_from('<h', cb, 3)[0] / 10) + "]"
+
 async def do_joy():
-    global angel, force, ws, q, ec, na
+    global angel, force, ws, ec, na, rto, tx, ts, rtx, n_rtx, fi, fs
     oforce = 0
     oangel = 0
-    omsg = ""
-    lmsg = "[0 0]"
+    ct = _T_STOP      # aktueller Steuerbefehl: Typ, Kraft, Winkel
+    cf = 0
+    ca = 0
+    ot = -1           # zuletzt an die queue übergeben
+    of = 0
+    oa = 0
     btn_state = False
+    bt = 0            # Knopf gedrückt seit so vielen Abtastungen
     btn = Pin(_BTN, Pin.IN, Pin.PULL_UP)
     t = ticks_ms()
     while True:
         if ticks_diff(ticks_ms(), t) > 290:
             t = ticks_ms()
-            # Button auswerten
-            if (btn.value() == 0):
-                btn_state = True
+            # Button auswerten, im Doppelklick-Fenster gehört er restore()
+            if (btn.value() == 0) and not rw:
+                if _MET:      # erst beim Loslassen: kurz Mäher, lang HUD
+                    bt += 1
+                    if bt == _HUD_N:
+                        toggle_hud()
+                else:
+                    btn_state = True
+            elif _MET and bt:
+                if bt < _HUD_N:
+                    btn_state = True
+                bt = 0
             # Joystick auswerten
             get_joy()
-            if force > 0.3:
-                if ((oforce != min (1, force)) or (abs(oangel - angel) >= 5 )):
-                    lmsg = "["+str(force)+" "+str(angel)+ "]"
-                    oforce = min (1, force)
+            if force > 30:
+                if ((oforce != min (100, force)) or (abs(oangel - angel) >= 50 )):
+                    ct = _T_DRIVE
+                    cf = force
+                    ca = angel
+                    oforce = min (100, force)
                     oangel = angel
             else:
-                lmsg = "[0 0]"
+                ct = _T_STOP
+                cf = 0
+                ca = 0
                 oforce = 0
                 oangel = angel
             # neue Steuerungsinformatiomen an queue senden
             if btn_state:
-                lmsg="mower"
+                q_put(_Q_MOW)
                 btn_state=False
-            if omsg != lmsg:
-                #print ("Sende Daten an WS-queue: " + lmsg + " (" +str(ticks_ms())+ ")")
-                if q:
-                    q[0] = lmsg
-                    #if '0' == q[0]:
-                    #    q[0] = lmsg
-                    #    q.append('0')
-                    #else:
-                    #    q[0] = lmsg
-                else:
-                    q.append(lmsg)
-                omsg = lmsg
-        if q and await ws.open(): # send first WS message
-            if len(q) > 5 or ec > 5:
-                await ws.open(False)
-                ec = 0
-            else:
-                cmd = q[0]
-                print ("Sende Daten an WS: " + cmd + " (" +str(ticks_ms())+ ")")
-                await ws.send(cmd)
-                if cmd.find("[") == 0:
-                    na = cmd
+            if ct != ot or cf != of or ca != oa:
+                pack_ctl(ct, cf, ca)
+                #print ("Sende Daten an WS-queue: " + str(seq) + " (" +str(ticks_ms())+ ")")
+                q_put(_Q_CTL)
+                ot = ct
+                of = cf
+                oa = ca
+        if qm and await ws.open(): # send WS message with highest priority
+            c = qm & -qm
+            if c == _Q_CTL and na:               # Steuerbefehl wartet auf Quittung
+                if ticks_diff(ticks_ms(), ts) < rto:
+                    c = qm & ~_Q_CTL             # bis dahin die anderen Klassen
+                    c &= -c
+                elif ec >= _RTX_MAX:             # Verbindung tot, nicht nur eine Quittung verloren
+                    await ws.open(False)
+                    ec = 0
+                    c = 0
+                else:                            # Wiederholung, Wartezeit verdoppeln
                     ec += 1
+                    n_rtx += 1
+                    if _MET:
+                        met.count("rtx")
+                    rtx = True
+                    rto = min(_RTO_MAX, rto * 2)
+            if c:
+                if c == _Q_CTL:                  # Steuerbefehl, bis zur Quittung wiederholen
+                    if not na:                   # neuer Steuerbefehl
+                        tx = ticks_ms()
+                        rtx = False
+                    ts = ticks_ms()
+                    if ws.bin:
+                        if _LOG_LVL <= _L_DEBUG:
+                            log("Sende Daten an WS: #" + str(cb[0]) + " (" +str(ticks_ms())+ ")", _L_DEBUG)
+                        await ws.send_bin(cb)
+                        na = cb[0]
+                    else:
+                        cmd = ctl_text()
+                        if _LOG_LVL <= _L_DEBUG:
+                            log("Sende Daten an WS: " + cmd + " (" +str(ticks_ms())+ ")", _L_DEBUG)
+                        await ws.send(cmd)
+                        na = cmd
                 else:
-                    ec = 0
-                    q.pop(0)
+                    if c == _Q_MOW and ws.bin:
+                        pack_ctl(_T_MOWER, 0, 0, mb)
+                        await ws.send_bin(mb)
+                    else:
+                        cmd = "mower" if c == _Q_MOW else ("1" if c == _Q_TELE else "0")
+                        if _LOG_LVL <= _L_DEBUG:
+                            log("Sende Daten an WS: " + cmd + " (" +str(ticks_ms())+ ")", _L_DEBUG)
+                        if c == _Q_IMG:
+                            fi = True
+                            fs = ticks_ms()
+                        await ws.send(cmd)
+                    q_done(c)
                 gc.collect()
-        await a.sleep_ms(150)
+        await a.sleep_ms(_RDELAY)
+
+hud = False      # Messwerte (HUD) statt Bild anzeigen
+
+def display_hud():
+    # Messwerte aus metrics.py im Quadrat 160 x 160 in der Mitte des runden Displays
+    import vga1_8x16 as font
+    l = met.lines()
+    for i in range(10):
+        display.text(font, '{:<20}'.format(l[i] if i < len(l) else "")[:20], 40, 40 + 16 * i, gc9a01.color565(132, 132, 132), 0)
+
+def toggle_hud():
+    global hud
+    hud = not hud
+    if hud:
+        display.fill(0)
+        rows.clear()
+        display_hud()
+    else:
+        display_image("Logo240.jpg")
+
+async def met_task():
+    # HUD jede Sekunde auffrischen, jede Minute eine Zusammenfassung ins Log
+    n = 0
+    while True:
+        await a.sleep(1)
+        met.mem()
+        if hud:
+            display_hud()
+        n += 1
+        if n >= 60:
+            n = 0
+            log("MET: " + met.summary())
+
+def frame_gap():
+    # Abstand ab dem letzten Bild bis zur nächsten Anforderung: Übertragen und Dekodieren
+    # belegen höchstens die Hälfte der Zeit, beim Steuern höchstens ein Viertel
+    g = ft + fd
+    if ticks_diff(ticks_ms(), lc) < _FP_CTL:
+        g = max(3 * g, _FP_CTL)
+    return max(_FP_MIN, min(_FP_MAX, g))
+
+def frame_done(data):
+    # empfangenes Bild darstellen, Übertragungs- und Dekodierdauer für frame_gap() messen
+    global fi, fx, fl, ft, fd, n_img
+    jetzt = ticks_ms()
+    if fi or fx:                     # Antwort auf die einzige Anforderung, auch verspätet
+        fi = fx = False
+        t = ticks_diff(jetzt, fs)
+        ft = (3 * ft + t) // 4 if ft else t
+        if _MET:
+            met.hist("img", t)
+    if not (_MET and hud):
+        display_thumb(data)   # Empfanges Thumb-Bild auf dem Display darstellen
+        d = ticks_diff(ticks_ms(), jetzt)
+        fd = (3 * fd + d) // 4 if fd else d
+        n_img += 1
+        if _MET:
+            met.hist("dec", d)
+            met.tick("fps")
+    fl = ticks_ms()
 
 async def do_img():
-    global q, w, h
-    last = ticks_ms()
+    global w, h, fi, fx, fl
+    lr = ticks_ms()   # RTT und Wiederholungen zuletzt geloggt
     ts = 0
     while True:
         ts += 1
@@ -478,29 +1176,39 @@ async def do_img():
                 display_uhr(shour(localtime()))
                 if h:
                     display_compass(h)
-                if not '1' in q: # get Telemetrie
-                    q.append("1")
+                q_put(_Q_TELE)   # get Telemetrie
         if ts >= 4:
             ts = 0
             if w:
                 display_uhr(shour(localtime()))
             if (al != "none"):
                    display_alert(False)
-        # get Image           
-        if w and ticks_diff(ticks_ms(), last) > 1900:
-            if not '0' in q:
-                last = ticks_ms()
-                #print ("Fordere neues Bild per Queue an ("+str(last)+")")
-                q.append("0")
+        if w and ticks_diff(ticks_ms(), lr) > 60000:
+            lr = ticks_ms()
+            log("WS: RTT " + str(srtt) + "ms (+-" + str(rttv) + "), RTO " + str(rto) + "ms, Quittungen " + str(n_ack) + ", Wiederholungen " + str(n_rtx))
+            log("WS: Bilder " + str(n_img) + ", Übertragung " + str(ft) + "ms, Dekodierung " + str(fd) + "ms, Abstand " + str(frame_gap()) + "ms")
+        # get Image, höchstens eins unterwegs
+        # verloren gilt ein Bild nach _FP_TMO, das nächste wird aber erst nach weiteren
+        # _FP_TMO angefordert, falls es doch noch kommt (sonst zwei unterwegs, ft falsch)
+        if fi and ticks_diff(ticks_ms(), fs) > _FP_TMO:
+            fi = False
+            fx = True
+        if fx and ticks_diff(ticks_ms(), fs) > 2 * _FP_TMO:
+            fx = False
+            fl = ticks_ms()
+        if w and not fi and not fx and not qm & _Q_IMG and ticks_diff(ticks_ms(), fl) >= frame_gap():
+            #print ("Fordere neues Bild per Queue an ("+str(ticks_ms())+")")
+            q_put(_Q_IMG)
         await a.sleep(0.5)   
             
 async def conn_ws():
-    global ws, w, al, q, na, ec, h
+    global ws, w, al, h, fi, fx
     if hasattr(net, "WLAN"):
-        pip = "localhost"
         # Blink onboard LED during connect
         timer.init(freq=4, mode=Timer.PERIODIC, callback=blink)
         # the board has WLAN capabilities
+        t = ticks_ms()
+        up = False        # Steuerung zum ersten Mal bereit?
         wifi = await wlan_connect(_SSID, _PASSWORD)
         e =  0
         while e < 50:
@@ -509,10 +1217,9 @@ async def conn_ws():
                 wifi = await wlan_connect(_SSID, _PASSWORD)
                 if not wifi.isconnected():
                     continue
-            rc = gathered(wifi.ifconfig()[0])
-            if wifi.isconnected() and rc:
-                pip = rc
-                #print(f'PIP {pip}')
+            if not g:
+                boot("wifi", t)
+            gathered(wifi.ifconfig()[0])
             try:
                 # connect to PiMowBot socket server with Token
                 if not await ws.handshake("ws://" + pip + ":8008/cgi-bin/control.html?token=" + _TOKEN + "&thumb=mode" + _TM):
@@ -523,37 +1230,41 @@ async def conn_ws():
                     print ("WS-Handshake erfolgreich")
                     w = ws._open
                     print(f'Websocket available {w}')
+                    if not up:    # ab jetzt gehen Steuerbefehle raus
+                        up = True
+                        boot("ready", b0)
                 while await ws.open():
                     e = 0
                     gc.collect()
                     data = await ws.recv()
                     if data is not None:
                         if isinstance(data, str):
-                            log ('String mit '+str(len(data))+' Zeichen empfangen ('+str(ticks_ms())+')')
+                            if _LOG_LVL <= _L_DEBUG:
+                                log ('String mit '+str(len(data))+' Zeichen empfangen ('+str(ticks_ms())+')', _L_DEBUG)
                             if len(data) <= 13: # Steuerungsbefehl
-                                if q and na == data: # Steuerungsbefehl wird so lange gesendet bis Quittung empfangen
-                                    #q.pop(0)
-                                    print ('Quittiert', q.pop(0))
-                                    na = False
-                                    ec = 0
-                                else:
-                                    if data == '' and q and na:
-                                        print ('Quittiert', q.pop(0))
-                                        na = False
-                                        ec = 0
+                                if na and (na == data or data == ''): # Steuerungsbefehl wird so lange gesendet bis Quittung empfangen
+                                    if _LOG_LVL <= _L_DEBUG:
+                                        log('Quittiert ' + str(na), _L_DEBUG)
+                                    acked()
                             else: # Telemetrie empfangen
                                 h = float(data.split(";")[1][:-1])
+                        elif len(data) == len(cb): # binäre Quittung mit Sequenznummer
+                            if na and data[0] == na:
+                                if _LOG_LVL <= _L_DEBUG:
+                                    log('Quittiert #' + str(data[0]), _L_DEBUG)
+                                acked()
                         else:
-                            log (str(len(data)) + ' Bytes empfangen (' +str(ticks_ms()) +')')
-                            File = open ("image.jpg","wb")
-                            File.write(data)
-                            File.close()
-                            display_image()   # Empfanges Thumb-Bild auf dem Display darstellen
+                            if _LOG_LVL <= _L_DEBUG:
+                                log (str(len(data)) + ' Bytes empfangen (' +str(ticks_ms()) +')', _L_DEBUG)
+                            frame_done(data)
                     await a.sleep_ms(_RDELAY)
             except Exception as ex:
                 gc.collect()
                 w = False
+                fi = fx = False
                 e += 1
+                if _MET:
+                    met.count("reconnect")
                 print("Exception: {}".format(ex))
                 al = " {} ".format(ex)
                 display_alert()
@@ -569,13 +1280,24 @@ async def main():
     # Blink onboard LED slowly during restore-phase
     timer.init(freq=2, mode=Timer.PERIODIC, callback=blink)
     # Init Display
+    t = ticks_ms()
     reset_display()
-    # Check 4 Restore
-    log("Waiting 5s 4 doubleclick 2 restore")
-    restore()
+    # Joystick abtasten, wird der Knopf gehalten, neu kalibrieren
+    joy_start()
+    if Pin(_BTN, Pin.IN, Pin.PULL_UP).value() == 0:
+        await calibrate()
     # Show Logo
     display_image("Logo240.jpg")
+    boot("display", t)
+    # Doppelklick-Fenster und Vorstellung der Steuerung laufen parallel zum Verbindungsaufbau
+    log("Waiting 5s 4 doubleclick 2 restore")
+    a.create_task(restore())
+    a.create_task(display_intro())
     tasks = [conn_ws(), do_joy(), do_img()]
+    if _MET:
+        tasks.append(met_task())
+    if _LOG:
+        tasks.append(log_task())
     await a.gather(*tasks)
 
 a.run(main())
@@ -23,11 +23,10 @@ from picographics import PicoGraphics, DISPLAY_PICO_DISPLAY, PEN_RGB565
 import jpegdec
 import network as net
 import uasyncio as a
-import urequests as r
 import gc
-from os import stat, rename
+from os import stat, rename, remove
 from socket import getaddrinfo
-from time import sleep, ticks_ms, ticks_diff
+from time import ticks_ms, ticks_diff
 from machine import Pin, Timer, RTC, reset
 #import lowpower   # https://github.com/tomjorquera/pico-micropython-lowpower-workaround
 
@@ -40,10 +39,28 @@ _SSID = const('Your_SSID_Name')         # change to your WiFi SSID
 _PASSWORD = const('Your_WiFi_Password') # change to your passphrase
 #import rp2                             # uncomment and set your WiFi-Country
 #rp2.country('DE')                      # here in case of channel problems
+_WIFI_FILE = const('wifi.json')  # gemerkter Access Point (BSSID, Kanal) und DHCP-Lease
+_WIFI_FAST = const(30)           # Versuche à 100ms für das gezielte Verbinden
+_WIFI_LEASE = const(False)       # True: gemerkte DHCP-Lease beim gezielten Verbinden als feste Adresse nutzen
+_WIFI_STATIC = None              # statt DHCP, z.B. ('192.168.178.50', '255.255.255.0', '192.168.178.1', '192.168.178.1')
 
 # PiMowBot hostname
 _HOST = const('pimowbot.local')  # the name of the PiMowBot 
 _TOKEN = const('12345')          # right Token required look@nohup.out
+_PORT = const(8080)              # Port des Webservers vom PiMowBot
+_KA_TIMEOUT = const(2)           # Timeout (s) der persistenten HTTP-Verbindung
+_IMG_TIMEOUT = const(5)          # Timeout (s) für die Übertragung eines Thumbs
+_IMG_MAX = const(20480)          # max. Größe eines Thumbs in Bytes
+_IMG_SAVE = const(False)         # Set to True to store every thumb as image.jpg on flash
+_FP_MIN = const(500)             # kürzester Abstand zwischen zwei Bildanforderungen in ms
+_FP_MAX = const(5000)            # längster Abstand
+_FP_CTL = const(3000)            # so lange nach einem Steuerbefehl wird gesteuert, Bilder seltener
+_PMB_FILE = const('pimowbot.json')  # gemerkte IP und Fähigkeiten des PiMowBots
+_PMB_TTL = const(20)             # so viele Starts gilt die gemerkte IP, dann neu auflösen
+_MET = const(False)              # Set to True to collect metrics (metrics.py on flash), HUD: A 2s halten
+if _MET:
+    import metrics as met
+_HUD_N = const(8)                # A so viele Abtastungen (à 250ms) halten, dann HUD an/aus
 
 # dormant mode 
 _DP1 = const(15)    # btna
@@ -52,6 +69,20 @@ _DP2 = const(17)    # btnb
 _OX = const(99)     # Offset X Steuerknüppel
 _OY = const(80)     # Offset Y Steuerknüppel
 
+# Steuerbefehle, Index in _CMDS
+_C_FORWARD = const(0)
+_C_BACK = const(1)
+_C_LEFT = const(2)
+_C_RIGHT = const(3)
+_C_TURN_L = const(4)
+_C_TURN_R = const(5)
+_C_STOP = const(6)
+_C_MOWER = const(7)
+_C_NOTAUS = const(8)
+_CMDS = ("name=forward&state=ON", "name=back&state=ON", "name=left&state=ON",
+         "name=right&state=ON", "name=turn_left&state=ON", "name=turn_right&state=ON",
+         "name=motor&state=OFF", "mower=%E2%9C%87", "motor=%E2%8A%97")
+
 # Joystick and buttons
 joy_l = Pin(16, Pin.IN, Pin.PULL_UP)
 joy_r = Pin(20, Pin.IN, Pin.PULL_UP)
@@ -72,6 +103,13 @@ S = 200          # Status Code
 al = "none"       # alert note
 lt = 0           # normal thumbs
 bta = 1          # Darstellung der Steuerbutton
+img = bytearray(_IMG_MAX)  # Puffer für Thumbs, früh anlegen solange der Heap frei ist
+jd = None        # JPEG-Decoder, wird einmalig angelegt
+b0 = ticks_ms()  # Einschalten, Bezug der Boot-Zeitleiste
+
+def boot(stage, t):
+    # Boot-Zeitleiste: Dauer einer Stufe und Zeitpunkt seit dem Einschalten
+    print("BOOT: " + stage + " " + str(ticks_diff(ticks_ms(), t)) + "ms, bei " + str(ticks_diff(ticks_ms(), b0)) + "ms")
 
 def exists(file="main.py"):
     try:
@@ -90,15 +128,19 @@ def do_rmp():
         print("INFO: keine main.py vorhanden")
         return False
 
-def restore(abtn=3):
-    a = Pin(abtn, Pin.IN, Pin.PULL_UP)
+rw = True         # Doppelklick-Fenster offen, der Knopf gehört restore()
+
+async def restore(abtn=3):
+    # Doppelklick-Fenster, läuft parallel zum Verbindungsaufbau
+    global rw
+    p = Pin(abtn, Pin.IN, Pin.PULL_UP)
     b = 0
     t = 0
     start=ticks_ms()
-    while ticks_ms()-start <=5000:
-        if a.value()==0:
+    while ticks_diff(ticks_ms(), start) <= 5000:
+        if p.value()==0:
             b += 1
-        if a.value()==1 and b > 0:
+        if p.value()==1 and b > 0:
             t += 1
             b = 0
         if t > 1:
@@ -106,53 +148,57 @@ def restore(abtn=3):
                 break
             else:
                 t = 0
-        sleep(0.1)
+        await a.sleep_ms(100)
+    while p.value() == 0:     # erst nach dem Loslassen steuert der Knopf wieder
+        await a.sleep_ms(100)
+    rw = False
+    boot("restore", start)
 
-def motor_stop():
+async def motor_stop():
     global D
     if (D != "Stop"):
         display_dir(D)
         D = "Stop"
         print (D)
-        get_request("http://" + pip + ":8080/cgi-bin/control.html?Token=" + _TOKEN + "&name=motor&state=OFF")
+        await send_cmd(_C_STOP)
 
-def move_forward():
+async def move_forward():
     global D
     if (D != "Forward"):
         display_dir(D)
         D = "Forward"
         print (D)
         display_up()
-        get_request("http://" + pip + ":8080/cgi-bin/control.html?Token=" + _TOKEN + "&name=forward&state=ON")
+        await send_cmd(_C_FORWARD)
  
-def move_backward():
+async def move_backward():
     global D
     if (D != "Backward"):
         display_dir(D)
         D = "Backward"
         print (D)
         display_down()
-        get_request("http://" + pip + ":8080/cgi-bin/control.html?Token=" + _TOKEN + "&name=back&state=ON")
+        await send_cmd(_C_BACK)
     
-def move_left():
+async def move_left():
     global D
     if (D != "Left"):
         display_dir(D)
         D = "Left"
         print (D)
         display_left()
-        get_request("http://" + pip + ":8080/cgi-bin/control.html?Token=" + _TOKEN + "&name=left&state=ON")
+        await send_cmd(_C_LEFT)
     
-def move_right():
+async def move_right():
     global D
     if (D != "Right"):
         display_dir(D)
         D = "Right"
         print (D)
         display_right()
-        get_request("http://" + pip + ":8080/cgi-bin/control.html?Token=" + _TOKEN + "&name=right&state=ON")
+        await send_cmd(_C_RIGHT)
 
-def turn(n):
+async def turn(n):
     global D
     print (f'Turn {n}')
     if (D != "Turn"):
@@ -161,10 +207,10 @@ def turn(n):
         display_center()
         if (n <= 1) or (n == 4) or (n == 5) or (n == 10):
             print ("Turn CW")
-            get_request("http://" + pip + ":8080/cgi-bin/control.html?Token=" + _TOKEN + "&name=turn_right&state=ON")
+            await send_cmd(_C_TURN_R)
         else:
             print ("Turn CCW")
-            get_request("http://" + pip + ":8080/cgi-bin/control.html?Token=" + _TOKEN + "&name=turn_left&state=ON")
+            await send_cmd(_C_TURN_L)
 
 def drift_left (dir):
     global D
@@ -190,64 +236,250 @@ def drift_right (dir):
             display_drightb()
             print ("Drift Right Backwards")
 
-def do_shutdown():
+async def do_shutdown():
     print ("Shutdown in Progress")   #PiMowBot herunterfahren
-    motor_stop()
+    await motor_stop()
     display.set_backlight(0)
     #lowpower.dormant_until_pins([_DP1, _DP2])
     print ("RC WakeUp in Progress")  #PiMowBot RC wiederbeleben
     display.set_backlight(0.7)
     #reset()
 
-def toggle_mower():                  #Mähmotor an/aus
+async def toggle_mower():            #Mähmotor an/aus
     print ("Mowing On/Off") 
-    get_request("http://" + pip + ":8080/cgi-bin/control.html?Token=" + _TOKEN + "&mower=%E2%9C%87")
+    await send_cmd(_C_MOWER)
 
 def do_special():                    #Fahrtenschreiber an/aus geht nur per Websocket
     print ("Blackbox On/Off") 
 
-def do_notaus():                     #NotAus Wird bei btn und Steuerkreuz aktiviert 
+async def do_notaus():               #NotAus Wird bei btn und Steuerkreuz aktiviert 
     print ("NotAus")
-    get_request("http://" + pip + ":8080/cgi-bin/control.html?Token=" + _TOKEN + "&motor=%E2%8A%97")
+    await send_cmd(_C_NOTAUS)
 
-def get_request(URL, type="HEAD", format="BIN"):
-    rc = False
-    try:
-        jetzt = ticks_ms()
-        if (type == "HEAD"):
-            response = r.head(URL)
-            if (200 == response.status_code):
-                rc = True
-        else:
-            gc.collect()     #Run a garbage collection.
-            response = r.get(URL)
-            if (format == "BIN"):
-                rc = response.content
-            else:
-                rc = response.text
-        S = response.status_code
-        response.close()
-        print("Delay-" + type + ": " + str(ticks_diff(ticks_ms(), jetzt)) + "ms, Status: " + str(S))
-    except:
-        rc = False
-    return rc
+#/*************************
+# *** HTTP Client async ***
+# *************************/
+
+class HTTPConn:
+    # persistente HTTP/1.1 Verbindung zum Webserver des PiMowBots auf Basis der
+    # uasyncio Streams, je Verbindung ist immer nur ein Request unterwegs
+    def __init__(self, port=_PORT, timeout=_KA_TIMEOUT):
+        self.port = port
+        self.timeout = timeout
+        self.r = None
+        self.w = None
+        self.bn = 0          # Länge des zuletzt empfangenen Body
+        self.sent = False    # Request ist beim Server, darf nicht wiederholt werden
+        self.lock = a.Lock()
+
+    def close(self):
+        if self.w:
+            try:
+                self.w.close()
+            except:
+                pass
+        self.r = None
+        self.w = None
+
+    async def request(self, req, head=True, buf=None):
+        # fertigen Request (siehe mkreq) senden, ist die Verbindung veraltet wird einmal neu verbunden
+        # Wiederholt wird nur, wenn das Senden scheiterte oder der Server vor der Statuszeile schloss,
+        # nie nach einem Timeout auf einen gesendeten Request (Mäher an/aus sonst doppelt)
+        # Ein Body wird direkt in buf gelesen (Länge in bn), ohne buf wird er verworfen
+        async with self.lock:
+            self.bn = 0
+            for retry in (0, 1):
+                fresh = not self.w
+                self.sent = False
+                try:
+                    if fresh:
+                        if _MET:
+                            met.count("conn")
+                        self.r, self.w = await a.wait_for(a.open_connection(pip, self.port), self.timeout)
+                    return await a.wait_for(self._request(req, head, buf), self.timeout)
+                except Exception as ex:
+                    print("HTTP-Fehler: {}".format(ex))
+                    self.close()
+                    if fresh or self.sent:    # neue Verbindung klappt nicht bzw. Request ist raus
+                        break
+            return False
+
+    async def _request(self, req, head, buf):
+        r = self.r
+        self.w.write(req)
+        await self.w.drain()
+        self.sent = True
+        l = await r.readline()
+        if not l:
+            self.sent = False         # veraltete Verbindung, Server hat den Request nicht beantwortet
+            raise OSError("closed")   # Server hat die Verbindung beendet
+        status = int(l.split(None, 2)[1])
+        cl = -1
+        close = l.startswith(b"HTTP/1.0")
+        while True:
+            l = await r.readline()
+            if not l or l == b"\r\n":
+                break
+            h = l.lower()
+            if h.startswith(b"content-length:"):
+                cl = int(h[15:])
+            elif h.startswith(b"connection:") and b"close" in h:
+                close = True
+        if not head:
+            if cl < 0:               # ohne Längenangabe endet der Body mit der Verbindung
+                close = True
+            mv = memoryview(buf) if buf else None
+            n = 0
+            while cl < 0 or n < cl:
+                if mv and n < len(mv):
+                    k = await r.readinto(mv[n:len(mv) if cl < 0 else min(cl, len(mv))])
+                else:                # kein Platz (mehr) im Puffer, Rest verwerfen
+                    k = len(await r.read(256 if cl < 0 else min(cl - n, 256)))
+                if not k:
+                    if cl < 0:
+                        break
+                    raise OSError("closed")
+                n += k
+            if mv and n <= len(mv):
+                self.bn = n
+            elif mv:
+                print("HTTP-Body zu groß: " + str(n) + " Bytes")
+        if close:
+            self.close()
+        return status
+
+kc = HTTPConn()                         # Verbindung für Steuerbefehle und Abfragen
+ki = HTTPConn(timeout=_IMG_TIMEOUT)     # eigene Verbindung für Thumbs
+tb = bytearray(64)                      # Puffer für kurze Text-Antworten
+cmds = None                             # fertige Requests der Steuerbefehle, Index _C_*
+
+def mkreq(path, type="HEAD"):
+    return type.encode() + b" " + path.encode() + b" HTTP/1.1\r\nHost: " + pip.encode() + b"\r\n\r\n"
+
+def build_cmds():
+    # einmalig, sobald IP und Token des PiMowBots feststehen
+    global cmds
+    cmds = tuple(mkreq("/cgi-bin/control.html?Token=" + _TOKEN + "&" + c) for c in _CMDS)
+
+async def send_cmd(cid):
+    # Steuerbefehl über die eigene Verbindung senden, läuft auch während ein Thumb lädt
+    global lc
+    jetzt = ticks_ms()
+    lc = jetzt
+    if cmds is None:
+        build_cmds()
+    rc = await kc.request(cmds[cid])
+    t = ticks_diff(ticks_ms(), jetzt)
+    if _MET:
+        met.hist("cmd", t)
+    print("Delay-CMD: " + str(t) + "ms, Status: " + str(rc))
+    return 200 == rc
+
+async def get_request(path, type="HEAD", port=_PORT, c=None):
+    # HEAD liefert True bei Status 200, GET den Text der Antwort
+    own = c is None and port != _PORT     # eigene Verbindung nur für diese Abfrage
+    if c is None:
+        c = HTTPConn(port) if own else kc
+    jetzt = ticks_ms()
+    rc = await c.request(mkreq(path, type), type == "HEAD", None if type == "HEAD" else tb)
+    if own:
+        c.close()
+    t = ticks_diff(ticks_ms(), jetzt)
+    if _MET:
+        met.hist("http", t)
+    print("Delay-" + type + ": " + str(t) + "ms, Status: " + str(rc))
+    if type == "HEAD":
+        return 200 == rc
+    if 200 == rc:
+        return bytes(tb[:c.bn]).decode()
+    return False
 
 def get_ip(host, port=8080):
     addr_info = getaddrinfo (host, port)
     return addr_info[0][-1][0]
 
+def pmb_load():
+    # gemerkte IP und Abfrageergebnisse vom letzten Start, None wenn keine oder abgelaufen
+    import ujson
+    try:
+        f = open(_PMB_FILE)
+        c = ujson.load(f)
+        f.close()
+    except (OSError, ValueError):
+        return None
+    if c.get("h") != _HOST or c.get("n", _PMB_TTL) >= _PMB_TTL:
+        return None
+    return c
+
+def pmb_save(c):
+    # c: {"h": Hostname, "ip": IP, "lt": Large thumb mode, "pc": PiCAM, "ws": Websocket, "n": Starts}
+    import ujson
+    try:
+        if c is None:
+            remove(_PMB_FILE)
+        else:
+            f = open(_PMB_FILE, "w")
+            ujson.dump(c, f)
+            f.close()
+    except OSError:
+        pass
+
 def reset_display():
     rst = Pin(12,Pin.OUT)
     rst.on()
     rst.off()
     rst.on()
 
+#/**************************
+# *** Display Compositor ***
+# **************************/
+
+# Gezeichnet wird nur in den Framebuffer, geänderte Bereiche werden mit mark()
+# vorgemerkt und je Durchlauf der Tasks einmal per flush() übertragen.
+_FB_W = const(240)
+_FB_H = const(135)
+_PARTIAL = const(False)  # True, wenn partial_update() des Display-Treibers nur den Bereich überträgt
+dirty = [_FB_W, _FB_H, 0, 0]   # geänderter Bereich x0, y0, x1, y1 (leer wenn x0 >= x1)
+fb_n = 0         # Übertragungen zum Display
+fb_b = 0         # übertragene Bytes (SPI)
+
+def mark(x, y, w, h):
+    if x < dirty[0]:
+        dirty[0] = max(0, x)
+    if y < dirty[1]:
+        dirty[1] = max(0, y)
+    if x + w > dirty[2]:
+        dirty[2] = min(_FB_W, x + w)
+    if y + h > dirty[3]:
+        dirty[3] = min(_FB_H, y + h)
+
+def flush():
+    # liefert die übertragenen Bytes, 0 wenn nichts geändert wurde
+    global fb_n, fb_b
+    x, y, x1, y1 = dirty
+    if x >= x1 or y >= y1:
+        return 0
+    dirty[0] = _FB_W
+    dirty[1] = _FB_H
+    dirty[2] = 0
+    dirty[3] = 0
+    if _PARTIAL:
+        display.partial_update(x, y, x1 - x, y1 - y)
+        n = (x1 - x) * (y1 - y) * 2
+    else:
+        display.update()
+        n = _FB_W * _FB_H * 2
+    fb_n += 1
+    fb_b += n
+    return n
+
 def display_blank():
     BLACK = display.create_pen(0, 0, 0)
     display.set_pen(BLACK)
     display.clear()
     display.set_backlight(0.0)
-    display.update()
+    mark(0, 0, _FB_W, _FB_H)
+    flush()
 
 def display_cinema():
     #remove RC from Background
@@ -255,15 +487,13 @@ def display_cinema():
     display.set_clip(140,20,90,80)
     display.set_pen(BACK)
     display.clear()
-    display.update()
-    display.remove_clip()
     #add cinema frame
     GREY = display.create_pen(132, 132, 132)
     display.set_clip(143,33,80,45)
     display.set_pen(GREY)
     display.clear()
-    display.update()
     display.remove_clip()
+    mark(140, 20, 90, 80)
 
 def display_up(set=True):
     if (bta == 1):
@@ -274,7 +504,7 @@ def display_up(set=True):
             DGREY = display.create_pen(80, 80, 80)
             display.set_pen(DGREY)
         display.triangle(_OX, _OY - 18, _OX - 10, _OY - 10, _OX + 10, _OY - 10) #up
-        display.update()
+        mark(_OX - 10, _OY - 18, 21, 9)
     
 def display_down(set=True):
     if (bta == 1):
@@ -285,7 +515,7 @@ def display_down(set=True):
             DGREY = display.create_pen(80, 80, 80)
             display.set_pen(DGREY)
         display.triangle(_OX, _OY + 18, _OX + 10, _OY + 10, _OX - 10, _OY + 10) #down
-        display.update()
+        mark(_OX - 10, _OY + 10, 21, 9)
  
 def display_left(set=True):
     if (bta == 1):
@@ -296,7 +526,7 @@ def display_left(set=True):
             DGREY = display.create_pen(80, 80, 80)
             display.set_pen(DGREY)
         display.triangle(_OX - 18, _OY, _OX - 10, _OY - 10, _OX - 10, _OY + 10) #left
-        display.update()        
+        mark(_OX - 18, _OY - 10, 9, 21)
 
 def display_right(set=True):
     if (bta == 1):
@@ -307,7 +537,7 @@ def display_right(set=True):
             DGREY = display.create_pen(80, 80, 80)
             display.set_pen(DGREY)
         display.triangle(_OX + 18, _OY, _OX + 10, _OY - 10, _OX + 10, _OY + 10) #right
-        display.update()
+        mark(_OX + 10, _OY - 10, 9, 21)
 
 def display_center(set=True):
     if (bta == 1):
@@ -318,7 +548,7 @@ def display_center(set=True):
             GREY = display.create_pen(132, 132, 132)
             display.set_pen(GREY)
         display.circle(_OX, _OY, 5)      # Center btn
-        display.update()
+        mark(_OX - 5, _OY - 5, 11, 11)
 
 def display_dleft(set=True):
      if set:
@@ -352,7 +582,7 @@ def display_drightb(set=True):
         display_down(0)
         display_right(0)
         
-def display_dir(odir="Init"):
+def display_dir(odir):
     if (odir == "Forward"):
         display_up(0)
     if (odir == "Backward"):
@@ -371,27 +601,26 @@ def display_dir(odir="Init"):
         display_down(0)
         display_right(0)
         display_up(0)  
-    if (odir == "Init"):
-        display_up()
-        sleep(0.3)
-        display_right()
-        sleep(0.3)
-        display_down()
-        sleep(0.3)
-        display_left()
-        sleep(0.3)
-        display_center()
-        sleep(0.3)
-        display_up(0)
-        sleep(0.3)
-        display_right(0)
-        sleep(0.3)
-        display_down(0)
-        sleep(0.3)
-        display_left(0)
-        sleep(0.3)
-        display_center(0)
-        sleep(0.3)
+
+ik = False        # Vorstellung durch einen Tastendruck beendet
+
+async def display_intro():
+    # kurze Vorstellung der Steuerung, läuft parallel zum Verbindungsaufbau
+    # und endet beim ersten Tastendruck
+    t = ticks_ms()
+    for set in (1, 0):
+        for f in (display_up, display_right, display_down, display_left, display_center):
+            if ik:
+                break
+            f(set)
+            flush()
+            await a.sleep_ms(300)
+    boot("intro", t)
+
+async def display_later(text, ms):
+    await a.sleep_ms(ms)
+    display_text(text)
+    flush()
 
 def display_text(text):
     GREY = display.create_pen(132, 132, 132)
@@ -402,7 +631,7 @@ def display_text(text):
     display.set_pen(GREY)
     display.set_font('bitmap8')
     display.text(text, 2, 105, 236, 2) # show text
-    display.update()
+    mark(2, 105, 236, 20)
 
 def display_alert(toggle=True):
     GREY = display.create_pen(132, 132, 132)
@@ -416,38 +645,69 @@ def display_alert(toggle=True):
         display.set_pen(RED)
     display.set_font('bitmap8')
     display.text(" >> " + al + " << ", 2, 105, 236, 2)
-    display.update()
+    mark(2, 105, 236, 20)
     
 def display_image(file='image.jpg', x=0, y=0):
+    global jd
     gc.collect()
-    # Create a new JPEG decoder for our PicoGraphics
-    j = jpegdec.JPEG(display)
+    # Create the JPEG decoder for our PicoGraphics once
+    if jd is None:
+        jd = jpegdec.JPEG(display)
      
     # Open the JPEG file
-    j.open_file(file)
+    jd.open_file(file)
     # Decode the JPEG
-    j.decode(x, y, jpegdec.JPEG_SCALE_FULL)
-     
-    # Display the result
-    display.update()
+    jd.decode(x, y, jpegdec.JPEG_SCALE_FULL)
+    mark(x, y, jd.get_width(), jd.get_height())
+
+def display_thumb(n, x=0, y=0):
+    global jd
+    # Thumb aus dem RAM-Puffer dekodieren, ohne Umweg über den Flash
+    if jd is None:
+        jd = jpegdec.JPEG(display)
+    jd.open_RAM(memoryview(img)[:n])
+    jd.decode(x, y, jpegdec.JPEG_SCALE_FULL)
+    mark(x, y, jd.get_width(), jd.get_height())
+
+def save_image(n, file="image.jpg"):
+    File = open (file,"wb")
+    File.write(memoryview(img)[:n])
+    File.close()
+
+lc = 0            # letzter Steuerbefehl
+ft = 0            # geglättete Übertragungsdauer eines Thumbs in ms
+fd = 0            # geglättete Dekodierdauer
+
+def frame_gap():
+    # Abstand ab dem letzten Bild bis zur nächsten Anforderung: Übertragen und Dekodieren
+    # belegen höchstens die Hälfte der Zeit, beim Steuern höchstens ein Viertel
+    g = ft + fd
+    if ticks_diff(ticks_ms(), lc) < _FP_CTL:
+        g = max(3 * g, _FP_CTL)
+    return max(_FP_MIN, min(_FP_MAX, g))
 
 async def refresh_display():
-    global al
+    global al, S, ft, fd
+    thumb = mkreq("/cgi-bin/xcom.html?Token=" + _TOKEN + "&Thumb=image.jpg", "GET")
     ts = 0
     n = 0
     i = 0
+    fl = ticks_ms()   # letztes Thumb geladen
     while True:
        ts += 1
        # Load current PiCAM image and display
        if (n == 1) and (ts == 2):
            if (al != "none"):
                display_alert()
-       if ts >= 4:
+       if (ts >= 4) if n else (ticks_diff(ticks_ms(), fl) >= frame_gap()):
            ts = 0
-           image = get_request("http://" + pip + ":8080/cgi-bin/xcom.html?Token=" + _TOKEN + "&Thumb=image.jpg", "Get")
+           jetzt = ticks_ms()
+           rc = await ki.request(thumb, False, img)
+           if rc:
+               S = rc
            if S != 200:
                al = "PiMowBot returned " + str(S) + "!"
-           if (image == False) or (S != 200):
+           if (rc == False) or (S != 200) or (ki.bn == 0):
                if (al != "none"):
                    display_alert(False)
                n = 1
@@ -456,27 +716,83 @@ async def refresh_display():
                    display_blank()
                    reset() # Pico neu starten
            else:
-               File = open ("image.jpg","wb")
-               File.write(image)
-               File.close()
-               if (lt == 1):
-                   display_image("image.jpg",0,0)
+               t = ticks_diff(ticks_ms(), jetzt)
+               ft = (3 * ft + t) // 4 if ft else t
+               if _IMG_SAVE:
+                   save_image(ki.bn)
+               if _MET and hud:
+                   d = 0            # Messwerte statt Bild
                else:
-                   display_image("image.jpg",143,33)
+                   if (lt == 1):
+                       display_thumb(ki.bn,0,0)
+                   else:
+                       display_thumb(ki.bn,143,33)
+                   d = ticks_diff(ticks_ms(), jetzt) - t
+                   fd = (3 * fd + d) // 4 if fd else d
+                   if _MET:
+                       met.hist("dec", d)
+                       met.tick("fps")
+               if _MET:
+                   met.hist("img", t)
+               print("Delay-IMG: " + str(t) + "ms, Decode: " + str(d) + "ms, " + str(ki.bn) + " Bytes, next " + str(frame_gap()) + "ms")
+               fl = ticks_ms()
                n = 0
                i = 0
-
+       flush()
        await a.sleep(0.5)
 
+hud = False      # Messwerte (HUD) statt Bild anzeigen
+
+def display_hud():
+    # Messwerte aus metrics.py, eine Zeile je Wert
+    GREY = display.create_pen(132, 132, 132)
+    BACK = display.create_pen(0, 0, 0)
+    display.set_pen(BACK)
+    display.rectangle(0, 0, _FB_W, _FB_H)
+    display.set_pen(GREY)
+    display.set_font('bitmap8')
+    y = 2
+    for l in met.lines()[:13]:
+        display.text(l, 4, y, _FB_W, 1)
+        y += 10
+    mark(0, 0, _FB_W, _FB_H)
+
+def toggle_hud():
+    global hud
+    hud = not hud
+    if hud:
+        display_hud()
+    else:
+        display_image("Logo.jpg")
+
+async def met_task():
+    # HUD jede Sekunde auffrischen, jede Minute eine Zusammenfassung
+    n = 0
+    while True:
+        await a.sleep(1)
+        met.mem()
+        if hud:
+            display_hud()
+        n += 1
+        if n >= 60:
+            n = 0
+            print("MET: " + met.summary())
+
 async def do_buttons():
+    global ik
     btnA_rel = True
     bntB_rel = True
+    ha = 0            # A ohne Steuerkreuz gedrückt seit so vielen Abtastungen
     state = 0
     ostate = state
     while True:
+        if not ik and 0 in (joy_u.value(), joy_l.value(), joy_r.value(), joy_d.value(), btnA.value(), btnB.value(), rw or joy_c.value()):
+            ik = True     # Vorstellung abbrechen, ihre Pfeile löschen, bevor die Steuerung zeichnet
+            for f in (display_up, display_right, display_down, display_left, display_center):
+                f(0)
         nojoy = 1
-        if (joy_c.value() == 0):   # Center gedrückt -> auf der Stelle drehen
-             turn(ostate)
+        if (joy_c.value() == 0) and not rw:   # Center gedrückt -> auf der Stelle drehen
+             await turn(ostate)
              nojoy = 0
         else:
             state = -1
@@ -501,13 +817,13 @@ async def do_buttons():
                      state = 0
                  state = state + 6
             if (state == 1):
-                move_forward()
+                await move_forward()
             if (state == 2):
-                move_left()
+                await move_left()
             if (state == 4):
-                move_right()
+                await move_right()
             if (state == 6):
-                move_backward()
+                await move_backward()
             if (state == 3):
                 drift_left(1)
             if (state == 5):
@@ -523,55 +839,185 @@ async def do_buttons():
 
         if (nojoy == 1):    # keine Joystick-Steuerung
             if (state >= 0):
-                motor_stop()
+                await motor_stop()
             state = -1
         
         if (btnA.value() == 0) and (btnB.value() == 0):
-            do_shutdown()
+            await do_shutdown()
         if (btnA.value() == 0):
             if (nojoy == 0):
-                do_notaus()
+                await do_notaus()
+                ha = _HUD_N + 1           # beim Loslassen weder Mäher noch HUD
+            elif _MET:                    # erst beim Loslassen: kurz Mäher, lang HUD
+                ha += 1
+                if ha == _HUD_N:
+                    toggle_hud()
             else:
                 if (btnA_rel == True):
                     btnA_rel = False
-                    toggle_mower()                
+                    await toggle_mower()                
         else:
+            if _MET and 0 < ha < _HUD_N:
+                await toggle_mower()
+            ha = 0
             btnA_rel = True
             
         if (btnB.value() == 0):
             if (nojoy == 0):
-                do_notaus()
+                await do_notaus()
             else:
                 if (btnB_rel == True):
                     btnB_rel = False
                     do_special()
         else:
             btnB_rel = True
-        
+
+        n = flush()      # Richtungsänderung in einem Rutsch übertragen
+        if n:
+            print("Display-Update: " + str(n) + " Bytes, gesamt " + str(fb_b) + " Bytes in " + str(fb_n))
         await a.sleep(0.25)
 
-async def coop_tasks():
-    a.create_task(do_buttons())
-    a.create_task(refresh_display())
+async def check_pimowbot(c=None):
+    # c: gemerkte Werte vom letzten Start, die Abfrage bestätigt oder korrigiert sie
+    global al, lt, pip
+    t = ticks_ms()
     while True:
-          await a.sleep(10)
+        # alle Abfragen gleichzeitig, Steuer- und Thumb-Verbindung werden dabei gleich aufgebaut
+        rc, pc, m, ws_avail = await a.gather(
+            get_request("/favicon.ico"),
+            get_request("/image.jpg", c=ki),
+            get_request("/cgi-bin/xcom.html?Token=" + _TOKEN + "&Thumb=mode", "GET", c=ki),
+            get_request("/echo", "HEAD", 8008))
+        if rc or not c:
+            break
+        # gemerkte IP antwortet nicht mehr, Namen doch auflösen
+        print(f'PiMowBot not found on {pip}, resolving {_HOST}')
+        c = None
+        kc.close()
+        ki.close()
+        try:
+            ip = get_ip(_HOST)
+        except OSError:
+            break
+        if ip == pip:
+            break
+        pip = ip
+        print(f'PiMowBot IP is {pip}')
+        build_cmds()
+    if (True == rc):
+        print('PiMowBot is ready 4 RC.')
+        print(f'PiMowBot-PiCAM is ready {pc}')
+        if m and (0 <= m.find('1')):
+           lt = 1
+        else:
+           lt = 0
+        print(f'Large thumb mode "{lt}"')
+        pmb_save({"h": _HOST, "ip": pip, "lt": lt, "pc": pc, "ws": ws_avail, "n": c["n"] + 1 if c else 0})
+    else:
+        print('PiMowBot is not ready !!!')
+        al = "PiMowBot not found"
+        display_alert()
+        pc = False
+        lt = 0
+        pmb_save(None)    # beim nächsten Start wieder auflösen
+    print(f'Websocket available {ws_avail}')
+    boot("probe", t)
+    return pc
+
+async def recheck_pimowbot(c):
+    # Warmstart: gemerkte Werte sind schon in Gebrauch, bei Abweichung neu darstellen
+    pc = await check_pimowbot(c)
+    if pc != c["pc"] or lt != c["lt"]:
+        show_caps(pc)
+
+def show_caps(pc):
+    global bta
+    if (pc == True) and (lt == 0) and (al == "none"):
+        display_cinema()     # PiCAM Kinovorstellung ist eröffnet
+    bta = 0 if lt == 1 else 1    # bei großen Thumbs Steuerbutton nicht darstellen
+    flush()
+
+def wifi_load():
+    # gemerkter Access Point und Lease vom letzten Start, None wenn keiner
+    import ujson
+    try:
+        f = open(_WIFI_FILE)
+        c = ujson.load(f)
+        f.close()
+    except (OSError, ValueError):
+        return None
+    return c if c.get("s") == _SSID else None
+
+def wifi_scan(wlan):
+    # vor einem vollständigen Verbinden (noch ohne Verbindung) den stärksten Access Point
+    # suchen, scan() blockiert etwa 1-2s
+    ap = None
+    for n in wlan.scan():    # (ssid, bssid, channel, RSSI, security, hidden)
+        if n[0].decode() == _SSID and (ap is None or n[3] > ap[3]):
+            ap = n
+    return ap
+
+def wifi_learn(wlan, ap):
+    # nach dem vollständigen Verbinden Access Point und Lease merken
+    import ujson
+    from ubinascii import hexlify
+    if ap is None:
+        return
+    try:
+        f = open(_WIFI_FILE, "w")
+        ujson.dump({"s": _SSID, "b": hexlify(ap[1]).decode(), "c": ap[2], "i": wlan.ifconfig()}, f)
+        f.close()
+        print("WiFi: BSSID " + hexlify(ap[1], ":").decode() + ", Kanal " + str(ap[2]) + " gemerkt")
+    except OSError:
+        pass
 
-def connect():
+async def wlan_wait(wlan, n):
+    # alle 100ms nachsehen, bis verbunden oder Fehler
+    while n > 0:
+        if wlan.status() < 0 or wlan.status() >= 3:
+            break
+        n -= 1
+        if n % 10 == 0:
+            print('Waiting for connection...')
+        await a.sleep_ms(100)
+    return wlan.status() == 3
+
+async def wifi_fast(wlan, c):
+    # gezielt mit dem gemerkten Access Point (und der Lease) verbinden, ohne Scan und DHCP
+    from ubinascii import unhexlify
+    lease = _WIFI_LEASE and not _WIFI_STATIC
+    if lease:
+        wlan.ifconfig(tuple(c["i"]))
+    wlan.connect(_SSID, _PASSWORD, bssid=unhexlify(c["b"]))
+    if await wlan_wait(wlan, _WIFI_FAST):
+        return True
+    print("WiFi: gezieltes Verbinden (Kanal " + str(c["c"]) + ") fehlgeschlagen")
+    wlan.disconnect()
+    if lease:
+        try:
+            wlan.ifconfig("dhcp")
+        except Exception:
+            pass
+    return False
+
+async def connect():
     global al
+    t = ticks_ms()
     ip = False
     #Connect to WLAN
     wlan = net.WLAN(net.STA_IF)
     wlan.active(True)
     wlan.config(pm = 0xa11140)    # disable Power-saving mode
-    wlan.connect(_SSID, _PASSWORD)
-    # Wait for connect or fail
-    max_wait = 12
-    while max_wait > 0:
-        if wlan.status() < 0 or wlan.status() >= 3:
-            break
-        max_wait -= 1
-        print('Waiting for connection...')
-        sleep(1)
+    if _WIFI_STATIC:
+        wlan.ifconfig(_WIFI_STATIC)
+    c = wifi_load()
+    fast = c is not None and await wifi_fast(wlan, c)
+    ap = None
+    if not fast:
+        ap = wifi_scan(wlan)
+        wlan.connect(_SSID, _PASSWORD)
+        # Wait for connect or fail
+        await wlan_wait(wlan, 120)
     # Handle connection error
     if wlan.status() != 3:
         al = "WiFi connect failed!!"
@@ -579,56 +1025,41 @@ def connect():
     else:  # wlan.isconnected() == True
         ip = wlan.ifconfig()[0]
         print(f'Connected on {ip}')
+        print("WiFi: " + ("gezielt" if fast else "vollständig") + " verbunden in " + str(ticks_diff(ticks_ms(), t)) + "ms")
+        if not fast:
+            wifi_learn(wlan, ap)
+    boot("wifi", t)
     return ip
-       
-try:
-    gc.enable()
-    gc.collect()
-    # Blink onboard LED slowly during restore 
-    timer.init(freq=2, mode=Timer.PERIODIC, callback=blink)
-    # Check 4 Restore
+
+async def main():
+    global pip, lt, al
+    # Doppelklick-Fenster und Vorstellung der Steuerung laufen parallel zum Verbindungsaufbau
     print("Waiting 5s 4 doubleclick 2 restore")
-    restore()
-    # Init Display
-    reset_display()
-    spibus = SPIBus(cs=9, dc=8, sck=10, mosi=11, bl=13)
-    display = PicoGraphics(display=DISPLAY_PICO_DISPLAY, bus=spibus, pen_type= PEN_RGB565, rotate=0)
-    display.set_backlight(0.7)
-    # Show Logo
-    display_image("Logo.jpg")
+    a.create_task(restore())
+    a.create_task(display_intro())
     pc = False
+    ip = False
+    c = None
     if hasattr(net, "WLAN"):
         # Blink onboard LED during connect
         timer.init(freq=4, mode=Timer.PERIODIC, callback=blink)
         # the board has WLAN capabilities
-        ip = connect()
+        ip = await connect()
+        timer.deinit() #blinken beenden
+        led.off()      #LED ausschalten
         if ip:             # WiFi ist da
             display_text("    my IP: " + ip)
-            timer.deinit() #blinken beenden
-            led.off()      #LED ausschalten
-            pip = get_ip(_HOST)
-            print(f'PiMowBot IP is {pip}')
-            sleep(3)  # zum Lesen der IP-Addr der RC auf dem Display
-            rc = get_request("http://" + pip + ":8080/favicon.ico")
-            if (True == rc):
-                print('PiMowBot is ready 4 RC.')
-                # now check PiCAM
-                pc = get_request("http://" + pip + ":8080/image.jpg")
-                print('PiMowBot-PiCAM is ready.')
-                # now check large thumb support
-                lt = get_request("http://" + pip + ":8080/cgi-bin/xcom.html?Token=" + _TOKEN + "&Thumb=mode", "Get", "TXT")
-                if (0 <= lt.find('1')):
-                   lt = 1
-                else:
-                   lt = 0
-                print(f'Large thumb mode "{lt}"')
+            flush()
+            t = ticks_ms()
+            c = pmb_load()
+            if c:              # Warmstart mit der gemerkten IP
+                pip = c["ip"]
+                print(f'PiMowBot IP is {pip} (gemerkt, Start {c["n"] + 1})')
             else:
-                print('PiMowBot is not ready !!!')
-                if ip:
-                     al = "PiMowBot not found"
-                     display_alert()
-            ws_avail = get_request("http://" + pip + ":8008/echo")
-            print(f'Websocket available {ws_avail}')
+                pip = get_ip(_HOST)
+                print(f'PiMowBot IP is {pip}')
+            build_cmds()
+            boot("dns", t)
         else:
             pip = "localhost"
     else:
@@ -636,13 +1067,41 @@ try:
         print('Raspberry Pi Pico W required')
         al = "  Pico W required  "
         display_alert()
-    if (pc == True) and (lt == 0) and (al == "none"):
-        display_cinema()     # PiCAM Kinovorstellung ist eröffnet
-    display_dir()            # kurze Vorstellung der Steuerung
-    if (lt == 1):
-        bta = 0              # Steuerbutton nicht darstellen
-    display_text(" ||||||||||||||||||||||||||||||||||||||||||||||||||||||| ")
-    a.run(coop_tasks())
+    a.create_task(do_buttons())   # Steuerung ist ab jetzt bedienbar, auch während der Vorstellung
+    boot("ready", b0)
+    if c:
+        # gemerkte Fähigkeiten sofort nutzen, Abfrage läuft im Hintergrund
+        pc = c["pc"]
+        lt = c["lt"]
+        a.create_task(recheck_pimowbot(c))
+    elif ip:
+        pc = await check_pimowbot()
+    show_caps(pc)
+    # IP-Addr der RC noch 3s lesbar lassen
+    a.create_task(display_later(" ||||||||||||||||||||||||||||||||||||||||||||||||||||||| ", 3000 if ip else 0))
+    a.create_task(refresh_display())
+    if _MET:
+        a.create_task(met_task())
+    boot("boot", b0)
+    while True:
+          await a.sleep(10)
+
+try:
+    gc.enable()
+    gc.collect()
+    # Blink onboard LED slowly during restore 
+    timer.init(freq=2, mode=Timer.PERIODIC, callback=blink)
+    # Init Display
+    t = ticks_ms()
+    reset_display()
+    spibus = SPIBus(cs=9, dc=8, sck=10, mosi=11, bl=13)
+    display = PicoGraphics(display=DISPLAY_PICO_DISPLAY, bus=spibus, pen_type= PEN_RGB565, rotate=0)
+    display.set_backlight(0.7)
+    # Show Logo
+    display_image("Logo.jpg")
+    flush()
+    boot("display", t)
+    a.run(main())
 except KeyboardInterrupt:
     print('Finished!!!')
 #EOF
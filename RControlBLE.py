@@ -29,19 +29,28 @@ import bluetooth
 import struct
 import gc
 import uasyncio as asyncio
+import micropython
 from micropython import const
-from machine import Pin, Timer, ADC
-from os import stat, rename
-from time import sleep, ticks_ms, ticks_diff, localtime
-from math import atan2, degrees, sqrt, cos, sin, pi
+from machine import Pin, Timer, ADC, unique_id
+from os import stat, rename, remove
+from time import ticks_ms, ticks_diff, localtime, time
+from math import cos, sin, pi
+from array import array
 
 _M = const(1)       # Mode, change to 0 if analogue joystick is not used
 _D = const(True)    # Change to False if display isn't connected to the PicoW
 _WD = const(0)      # set to 1, if Waveshare-Display Pico-LCD_1.14 is used instead of GC9A01
 _BTA = const(1)     # Darstellung der Steuerbutton, set to 0 to disable
+_THUMB = const(True) # Kamerabilder (Thumbs) vom PiMowBot per Bluetooth anzeigen, set to False to disable
+_IMG_MAX = const(20480)          # max. Größe eines Thumbs in Bytes
 _FB = const (0)     # Set to 1 to enable FastBoot
 _DB = const(False)  # Change to True to enable debug info
 _LOG = const(False) # Set to True to enable logging to flash, Set to None to disable
+_LOG_LVL = const(1) # Meldungen unterhalb dieser Stufe verwerfen: 0 DEBUG, 1 INFO, 2 WARN
+_MET = const(False) # Set to True to collect metrics (metrics.py on flash), HUD: Knopf bzw. A 2s halten
+if _MET:
+    import metrics as met
+_HUD_N = const(20)  # Knopf bzw. A so viele Abtastungen (à 100ms) halten, dann HUD an/aus
 
 # dormant mode 
 _DP1 = const(15)    # btn_a
@@ -82,6 +91,8 @@ if _D:
 D = "unknown"    # current direction
 last_btn = 0     # last button value
 btn_val = 0      # current button
+nav = array('h', bytes(8))  # btn_val als Fahr- oder Drehbefehl binär: Befehl, Kraft, Winkel, Z
+b0 = ticks_ms()  # Einschalten, Bezug der Boot-Zeitleiste
 
 if _M:
     _BTN = 22 # GPIO22, Pin#29
@@ -107,37 +118,103 @@ def exists(file="main.py"):
     except OSError:
         return False
     
-def log(msg):
-    if _LOG is not None:
-        if _LOG:
-            if exists("myLog.txt") and 43008 > stat("myLog.txt")[6]:
-                lfile=open("myLog.txt","a")
-            else:
-                lfile=open("myLog.txt","w")    # overwrite if log > 42k
-            lfile.write(sdate()+" "+shour(localtime())+' '+ str(msg) +'\n')
+#/*********************************
+# *** Logger mit RAM-Ringpuffer ***
+# *********************************/
+
+_L_DEBUG = const(0)
+_L_INFO = const(1)
+_L_WARN = const(2)
+_LOG_N = const(64)               # Einträge im Ringpuffer
+_LOG_HI = const(48)              # ab so vielen Einträgen sofort schreiben
+_LOG_MS = const(5000)            # sonst alle 5s durch log_task()
+_LOG_MAX = const(43008)          # Größe je Logdatei, danach myLog.txt -> myLog_.txt
+
+lm = [None] * _LOG_N                        # Meldungen
+lts = array('i', bytes(4 * _LOG_N))         # Zeitstempel in Sekunden
+li = 0           # Schreibposition im Ringpuffer
+ln = 0           # noch nicht geschriebene Einträge
+lsz = -1         # Größe von myLog.txt, -1 = unbekannt
+
+def log(msg, lvl=_L_INFO):
+    # Meldung im RAM ablegen, Zeit formatieren und Schreiben erst in log_flush()
+    global li, ln
+    if _LOG is None or lvl < _LOG_LVL:
+        return
+    if not _LOG:
+        print(msg)
+        return
+    lm[li] = msg
+    lts[li] = time()
+    li = (li + 1) % _LOG_N
+    if ln < _LOG_N:
+        ln += 1      # sonst wird der älteste Eintrag überschrieben
+    if ln >= _LOG_HI:
+        log_flush()
+
+def log_flush():
+    # gesammelte Einträge in einem Rutsch schreiben, bei _LOG_MAX die Datei wechseln
+    global ln, lsz
+    n = ln
+    if not n:
+        return
+    ln = 0
+    i = (li - n) % _LOG_N
+    if lsz < 0:
+        lsz = stat("myLog.txt")[6] if exists("myLog.txt") else 0
+    lfile = open("myLog.txt", "a")
+    for k in range(n):
+        ts = localtime(lts[i])
+        l = sdate(ts) + " " + shour(ts) + ' ' + str(lm[i]) + '\n'
+        lm[i] = None
+        i = (i + 1) % _LOG_N
+        if lsz + len(l) > _LOG_MAX:
             lfile.close()
-        else:
-            print(msg)
+            try:
+                remove("myLog_.txt")
+            except OSError:
+                pass
+            rename("myLog.txt", "myLog_.txt")
+            lfile = open("myLog.txt", "w")
+            lsz = 0
+        lfile.write(l)
+        lsz += len(l)
+    lfile.close()
+
+def boot(stage, t):
+    # Boot-Zeitleiste: Dauer einer Stufe und Zeitpunkt seit dem Einschalten
+    log("BOOT: " + stage + " " + str(ticks_diff(ticks_ms(), t)) + "ms, bei " + str(ticks_diff(ticks_ms(), b0)) + "ms")
+
+async def log_task():
+    # schreibt die gesammelten Einträge mit niedriger Priorität
+    while True:
+        await asyncio.sleep_ms(_LOG_MS)
+        log_flush()
 
 def do_rmp():
     if exists():
         log("INFO: benenne main.py in main_.py um")
         rename("main.py","main_.py")
+        log_flush()
         reset()
         return True
     else:
         log("INFO: keine main.py vorhanden")
         return False
     
-def restore(abtn=_BTN):
-    a = Pin(abtn, Pin.IN, Pin.PULL_UP)
+rw = True         # Doppelklick-Fenster offen, der Knopf gehört restore()
+
+async def restore(abtn=_BTN):
+    # Doppelklick-Fenster, läuft parallel zum Start von Bluetooth
+    global rw
+    p = Pin(abtn, Pin.IN, Pin.PULL_UP)
     b = 0
     t = 0
     start=ticks_ms()
-    while ticks_ms()-start <=5000:
-        if a.value()==0:
+    while ticks_diff(ticks_ms(), start) <= 5000:
+        if p.value()==0:
             b += 1
-        if a.value()==1 and b > 0:
+        if p.value()==1 and b > 0:
             t += 1
             b = 0
         if t > 1:
@@ -145,12 +222,19 @@ def restore(abtn=_BTN):
                 break
             else:
                 t = 0
-        sleep(0.1)
+        await asyncio.sleep_ms(100)
+    while p.value() == 0:     # erst nach dem Loslassen steuert der Knopf wieder
+        await asyncio.sleep_ms(100)
+    rw = False
+    if not connected:
+        # Blink onboard LED during connect
+        timer.init(freq=4, mode=Timer.PERIODIC, callback=blink)
+    boot("restore", start)
 
 def uid():
     """ Return the unique id of the device as a string """
     return "{:02x}{:02x}{:02x}{:02x}{:02x}{:02x}{:02x}{:02x}".format(
-        *machine.unique_id())
+        *unique_id())
 
 # Advertising payloads are repeated packets of the following form:
 #   1 byte data length (N + 1)
@@ -166,6 +250,7 @@ _ADV_TYPE_UUID16_MORE = const(0x2)
 _ADV_TYPE_UUID32_MORE = const(0x4)
 _ADV_TYPE_UUID128_MORE = const(0x6)
 _ADV_TYPE_APPEARANCE = const(0x19)
+_ADV_TYPE_CONN_INTERVAL = const(0x12)   # Slave Connection Interval Range
 
 # Generate a payload to be passed to gap_advertise(adv_data=...).
 def advertising_payload(limited_disc=False, br_edr=False, name=None, services=None, appearance=0):
@@ -181,7 +266,7 @@ def advertising_payload(limited_disc=False, br_edr=False, name=None, services=No
     )
 
     if name:
-        _append(_ADV_TYPE_NAME, name)
+        _append(_ADV_TYPE_NAME, name.encode())
 
     if services:
         for uuid in services:
@@ -203,6 +288,8 @@ _IRQ_CENTRAL_CONNECT = const(1)
 _IRQ_CENTRAL_DISCONNECT = const(2)
 _IRQ_GATTS_WRITE = const(3)
 _IRQ_GATTS_INDICATE_DONE = const(20)
+_IRQ_MTU_EXCHANGED = const(21)
+_IRQ_CONNECTION_UPDATE = const(27)
 
 _FLAG_READ = const(0x0002)
 _FLAG_WRITE_NO_RESPONSE = const(0x0004)
@@ -215,13 +302,39 @@ _RC_TELE_UUID = bluetooth.UUID(0x1801) # Generic Attribute
 
 _TELE_CHAR = (bluetooth.UUID(0x2700), _FLAG_WRITE | _FLAG_WRITE_NO_RESPONSE, )   # unitless
 
-_RC_TELE_SERVICE = (_RC_TELE_UUID, (_TELE_CHAR,),)
+# Thumbs in Stücken (Write without Response): Bild-Nr. (uint8), Offset (uint16), Gesamtlänge (uint16),
+# danach bis zu MTU - 8 Bytes JPEG. Ein Bild ist fertig, wenn alle Bytes angekommen sind.
+_IMG_CHAR = (bluetooth.UUID("50a30002-4d42-4f54-8e43-52432d424c45"), _FLAG_WRITE | _FLAG_WRITE_NO_RESPONSE, )
+_IMG_HDR = "<BHH"
+_IMG_LOG = const(20)             # alle 20 Thumbs Bildrate und Durchsatz loggen
+
+_RC_TELE_SERVICE = (_RC_TELE_UUID, (_TELE_CHAR, _IMG_CHAR,),)
 
 _RC_GENERIC_UUID = bluetooth.UUID(0x1849)  # Generic Media Control
 
 _NAV_CHAR = (bluetooth.UUID(0x2A68), _FLAG_READ | _FLAG_NOTIFY | _FLAG_INDICATE, )      # Navigation Characteristics
 
-_RC_NAV_SERVICE = (_RC_GENERIC_UUID, (_NAV_CHAR,),)
+# Navigation binär (8 Bytes, little endian): Sequenz (uint16, fortlaufend), Befehl (uint8, _NC),
+# Kraft in 1/10 (uint8), Winkel in Grad (int16), Z in 1/1000 (int16). Ältere Meldungen erkennt die
+# Gegenstelle an der Sequenz: ((seq - letzte) & 0xFFFF) >= 0x8000 -> verwerfen
+_NAV_BIN_CHAR = (bluetooth.UUID("50a30001-4d42-4f54-8e43-52432d424c45"), _FLAG_READ | _FLAG_NOTIFY, )
+_NAV_FMT = "<HBBhh"
+_NAV_TXT = const(True)   # Navigation zusätzlich als Text melden (für ältere PiMowBot-Versionen)
+
+# gewünschte Verbindungsparameter (Peripheral Preferred Connection Parameters): min./max. Intervall
+# in 1,25ms, Slave Latency, Supervision Timeout in 10ms. Der PiMowBot liest sie bzw. wird benachrichtigt
+# und passt die Verbindung an, MicroPython kann das Update nicht selbst anstoßen.
+_CONN_PAR_CHAR = (bluetooth.UUID(0x2A04), _FLAG_READ | _FLAG_NOTIFY, )
+_CP_ACTIVE = (6, 12, 0, 200)     # beim Steuern: 7,5..15ms, jedes Intervall, 2s
+_CP_IDLE = (24, 36, 6, 400)      # in Ruhe: 30..45ms, bis zu 6 Intervalle auslassen, 4s
+_CP_IDLE_MS = const(3000)        # so lange ohne Steuerbefehl bis zum Wechsel auf _CP_IDLE
+_BLE_MTU = const(185)            # MTU für Telemetrie, wird nach dem Verbinden ausgehandelt
+
+_RC_NAV_SERVICE = (_RC_GENERIC_UUID, (_NAV_CHAR, _NAV_BIN_CHAR, _CONN_PAR_CHAR,),)
+
+# Befehlscodes der binären Navigation: 0 Stop, 1 Fahren (Kraft, Winkel), 2/3 Drehen links/rechts (Z),
+# ab 4 die Tasten bzw. Aktionen
+_NC = {0: 0, "0": 0, "u": 4, "d": 5, "l": 6, "r": 7, "cc": 8, "cw": 9, "tl": 10, "m": 11, "tr": 12, "sd": 13}
 
 _BLE_APPEARANCE_HID_GAMEPAD = const(964)
 
@@ -242,53 +355,205 @@ _DEV_INFO_SERVICE = (_DEV_INFO_UUID, (_DEV_MAN_CHAR, _DEV_MOD_CHAR, _DEV_SER_CHA
 _ADV_INTERVAL_MS = const(250000)
 
 connected = False
+ble_ci = 0       # aktuelles Verbindungsintervall in 1,25ms
+ble_lat = 0      # Slave Latency
+ble_sto = 0      # Supervision Timeout in 10ms
+ble_mtu = 23     # ausgehandelte MTU
+
+_EV_N = const(8)                  # Ereignisse im Ringpuffer zwischen IRQ und events()
+_EV_LEN = const(_BLE_MTU + 2)     # je Ereignis: Typ, Länge, Daten (Adresse bzw. Telemetrie)
+_EV_IMG = const(100)              # Ereignis: Thumb vollständig
 
 class BLERemoteControl:
     def __init__(self, ble, name="PiMowBotRC"):
         self._ble = ble
         self._ble.active(True)
+        self._ble.config(mtu=_BLE_MTU)
         self._ble.irq(self._irq)
-        ((self._handle,), (self._handle_tele,), (i1, i2, i3, i4, i5,),) = self._ble.gatts_register_services((_RC_NAV_SERVICE, _RC_TELE_SERVICE, _DEV_INFO_SERVICE,))
+        ((self._handle, self._handle_bin, self._handle_cp,), (self._handle_tele, self._handle_img,), (i1, i2, i3, i4, i5,),) = self._ble.gatts_register_services((_RC_NAV_SERVICE, _RC_TELE_SERVICE, _DEV_INFO_SERVICE,))
+        self._nav = bytearray(struct.calcsize(_NAV_FMT))   # Puffer für die binäre Navigation
+        self._seq = 0
+        self._cp = None                                    # zuletzt gewünschte Verbindungsparameter
+        self._ble.gatts_set_buffer(self._handle_tele, _BLE_MTU)
+        self._ble.gatts_set_buffer(self._handle_img, _BLE_MTU)
+        if _D and _THUMB:
+            # zwei Puffer: in einen setzt _irq() das nächste Bild zusammen, aus dem anderen wird dekodiert
+            self._img = (memoryview(bytearray(_IMG_MAX)), memoryview(bytearray(_IMG_MAX)))
+        self._img_w = 0          # Puffer im Empfang
+        self._img_f = -1         # Bild-Nr. im Empfang
+        self._img_got = 0        # davon empfangene Bytes
+        self._img_t = 0          # erstes Stück empfangen
+        self._img_busy = False   # Puffer _img_w ^ 1 wird noch dekodiert
+        self._img_n = 0          # Länge des fertigen Bildes
+        self._img_ms = 0         # dessen Übertragungsdauer
+        self.img_drop = 0        # verworfen, weil das vorige Bild noch dekodiert wurde
         self._connections = set()
         self._write_callback = None
+        self._ev = bytearray(_EV_N * _EV_LEN)      # Ringpuffer, schreibt nur _irq()
+        self._evm = memoryview(self._ev)
+        self._ev_w = 0                             # Schreib- und Leseposition
+        self._ev_r = 0
+        self.ev_lost = 0                           # verworfen, weil der Ringpuffer voll war
+        self._flag = asyncio.ThreadSafeFlag()
         self._ble.gatts_write(i1, "PiMowBot.tgd-consulting.DE")
         self._ble.gatts_write(i2, "1.0")
         self._ble.gatts_write(i3, uid())
         self._ble.gatts_write(i4, sys.version)
         self._ble.gatts_write(i5, "1.0")
         self._payload = advertising_payload(name=name, services=[_RC_GENERIC_UUID], appearance=_BLE_APPEARANCE_HID_GAMEPAD)
+        self._payload += struct.pack("<BBHH", 5, _ADV_TYPE_CONN_INTERVAL, _CP_ACTIVE[0], _CP_ACTIVE[1])
+        self.set_conn_params(True)
         self._advertise()
 
+    def _defer(self, event, data=b""):
+        # Ereignis für events() in den Ringpuffer kopieren, im IRQ ohne Display und Log
+        w = self._ev_w
+        if (w + 1) % _EV_N == self._ev_r:
+            self.ev_lost += 1
+            return False
+        o = w * _EV_LEN
+        n = min(len(data), _EV_LEN - 2)
+        self._ev[o] = event
+        self._ev[o + 1] = n
+        self._evm[o + 2:o + 2 + n] = data[:n]
+        self._ev_w = (w + 1) % _EV_N
+        self._flag.set()
+        return True
+
+    async def events(self):
+        """ Task: Ereignisse aus dem IRQ auswerten, loggen und anzeigen """
+        nf = 0           # Thumbs seit der letzten Meldung
+        nb = 0           # deren Bytes
+        tx = 0           # deren Übertragungs- und Dekodierdauer
+        td = 0
+        t0 = ticks_ms()
+        while True:
+            await self._flag.wait()
+            while self._ev_r != self._ev_w:
+                o = self._ev_r * _EV_LEN
+                event = self._ev[o]
+                v = bytes(self._evm[o + 2:o + 2 + self._ev[o + 1]])
+                self._ev_r = (self._ev_r + 1) % _EV_N
+                try:
+                    if event == _EV_IMG:
+                        t = ticks_ms()
+                        if not (_MET and hud):
+                            display_thumb(self._img[self._img_w ^ 1][:self._img_n])
+                        self._img_busy = False
+                        t = ticks_diff(ticks_ms(), t)
+                        if _MET:
+                            met.hist("img", self._img_ms)
+                            met.hist("dec", t)
+                            met.tick("fps")
+                        td += t
+                        tx += self._img_ms
+                        nb += self._img_n
+                        nf += 1
+                        if nf >= _IMG_LOG:
+                            t = ticks_diff(ticks_ms(), t0)
+                            log("BLE-Thumbs: " + str(nf * 10000 // t / 10) + " fps, " + str(nb // max(1, tx)) + " kB/s, Übertragung " + str(tx // nf) + "ms, Dekodieren " + str(td // nf) + "ms, verworfen " + str(self.img_drop))
+                            nf = nb = tx = td = self.img_drop = 0
+                            t0 = ticks_ms()
+                    elif event == _IRQ_GATTS_WRITE:
+                        if self._write_callback:
+                            self._write_callback(v)
+                    elif event == _IRQ_CENTRAL_CONNECT:
+                        log("New connection from " + str(v))
+                        if _D:
+                            display_BTlogo()
+                    elif event == _IRQ_CENTRAL_DISCONNECT:
+                        if _MET:
+                            met.count("reconnect")
+                        log("Disconnected " + str(v))
+                        log("Starting advertising")
+                        if _D and not connected:
+                            display_image(_LOGO)
+                    elif event == _IRQ_MTU_EXCHANGED:
+                        if _MET:
+                            met.put("mtu", ble_mtu)
+                        log("BLE: MTU " + str(ble_mtu))
+                    elif event == _IRQ_CONNECTION_UPDATE:
+                        if _MET:
+                            met.put("ci", ble_ci * 5 // 4)
+                        log("BLE: Intervall " + str(ble_ci * 5 // 4) + "ms, Latency " + str(ble_lat) + ", Timeout " + str(ble_sto * 10) + "ms")
+                except Exception as ex:      # ein kaputtes Ereignis darf die Task nicht beenden
+                    if event == _EV_IMG:
+                        self._img_busy = False
+                    log("BLE: Ereignis " + str(event) + ": " + str(ex), _L_WARN)
+            if self.ev_lost:
+                log("BLE: " + str(self.ev_lost) + " Ereignisse verworfen", _L_WARN)
+                self.ev_lost = 0
+
     def _irq(self, event, data):
-        global connected
+        global connected, ble_ci, ble_lat, ble_sto, ble_mtu
         # Track connections so we can send notifications.
+        # Nur Zustand und Radio, Log, Display und Telemetrie übernimmt events()
         if event == _IRQ_CENTRAL_CONNECT:
             conn_handle, _, addr = data
-            log("New connection from " + str(addr))
             connected = True
             timer.deinit() #blinken beenden
             led.off()      #LED ausschalten
-            if _D:
-                display_BTlogo()
             self._connections.add(conn_handle)
+            self._img_f = -1
+            self._img_busy = False
+            self._defer(event, addr)
+            ble_mtu = 23
+            try:
+                self._ble.gattc_exchange_mtu(conn_handle)   # größere MTU für Telemetrie
+            except Exception:
+                pass
         elif event == _IRQ_CENTRAL_DISCONNECT:
             conn_handle, _, addr = data
-            log("Disconnected " + str(addr))
             self._connections.remove(conn_handle)
             connected = False
             # Blink onboard LED during connect
             timer.init(freq=4, mode=Timer.PERIODIC, callback=blink)
-            if _D:
-                display_image(_LOGO)
             # Start advertising again to allow a new connection.
-            self._advertise()
+            self._ble.gap_advertise(_ADV_INTERVAL_MS, adv_data=self._payload)
+            self._defer(event, addr)
         elif event == _IRQ_GATTS_INDICATE_DONE:
             conn_handle, value_handle, status = data
+        elif event == _IRQ_MTU_EXCHANGED:
+            conn_handle, ble_mtu = data
+            self._defer(event)
+        elif event == _IRQ_CONNECTION_UPDATE:
+            conn_handle, ble_ci, ble_lat, ble_sto, status = data
+            self._defer(event)
         elif event == _IRQ_GATTS_WRITE:
             conn_handle, value_handle = data
-            value = self._ble.gatts_read(value_handle)
-            if value_handle == self._handle_tele and self._write_callback:
-                self._write_callback(value)
+            if value_handle == self._handle_tele:
+                self._defer(event, self._ble.gatts_read(value_handle))
+            elif value_handle == self._handle_img and _D and _THUMB:
+                self._chunk(self._ble.gatts_read(value_handle))
+
+    def _chunk(self, v):
+        # Stück eines Thumbs in den Empfangspuffer kopieren, fertiges Bild an events() übergeben
+        if len(v) <= 5:
+            return
+        f, o, n = struct.unpack_from(_IMG_HDR, v)
+        k = len(v) - 5
+        if n > _IMG_MAX or o + k > n:
+            return
+        if f != self._img_f:                 # neues Bild, ein unvollständiges verfällt
+            self._img_f = f
+            self._img_got = 0
+            self._img_t = ticks_ms()
+        self._img[self._img_w][o:o + k] = memoryview(v)[5:]
+        self._img_got += k
+        if self._img_got < n:
+            return
+        self._img_f = -1
+        if self._img_busy:                   # lieber das nächste Bild als eine Warteschlange
+            self.img_drop += 1
+            return
+        self._img_busy = True
+        self._img_n = n
+        self._img_ms = ticks_diff(ticks_ms(), self._img_t)
+        if not self._defer(_EV_IMG):         # Ringpuffer voll: Bild verwerfen, Puffer bleibt frei
+            self._img_busy = False
+            self.img_drop += 1
+            return
+        self._img_w ^= 1
 
     def is_connected(self):
         return len(self._connections) > 0
@@ -299,16 +564,39 @@ class BLERemoteControl:
     def set_navigation(self, data, notify=False, indicate=False):
         # Data is string with navigation info.
         # Write the local value, ready for a central to read.
-        self._ble.gatts_write(self._handle, bytes(str(data), 'utf-8'))
+        if _NAV_TXT:
+            self._ble.gatts_write(self._handle, bytes(str(data), 'utf-8'))
+        # binär mit Sequenz; Fahr- und Drehbefehle aus nav, das control_task() zusammen
+        # mit btn_val setzt (nicht aus force/angel/Z, die sich bis zur Wiederholung ändern)
+        self._seq = (self._seq + 1) & 0xFFFF
+        c = _NC.get(data)
+        if c is None:
+            struct.pack_into(_NAV_FMT, self._nav, 0, self._seq, nav[0], nav[1], nav[2], nav[3])
+        else:
+            struct.pack_into(_NAV_FMT, self._nav, 0, self._seq, c, 0, 0, 0)
+        self._ble.gatts_write(self._handle_bin, self._nav)
+        if _MET:
+            met.count("nav")
         if notify or indicate:
             for conn_handle in self._connections:
                 if notify:
                     # Notify connected centrals.
-                    self._ble.gatts_notify(conn_handle, self._handle)
+                    self._ble.gatts_notify(conn_handle, self._handle_bin)
+                    if _NAV_TXT:
+                        self._ble.gatts_notify(conn_handle, self._handle)
                 if indicate:
                     # Indicate connected centrals.
                     self._ble.gatts_indicate(conn_handle, self._handle)
         
+    def set_conn_params(self, active):
+        # gewünschte Verbindungsparameter ändern und dem PiMowBot melden
+        if self._cp == active:
+            return
+        self._cp = active
+        self._ble.gatts_write(self._handle_cp, struct.pack("<HHHH", *(_CP_ACTIVE if active else _CP_IDLE)))
+        for conn_handle in self._connections:
+            self._ble.gatts_notify(conn_handle, self._handle_cp)
+
     def _advertise(self, interval_us=_ADV_INTERVAL_MS):
         log("Starting advertising")
         self._ble.gap_advertise(interval_us, adv_data=self._payload)
@@ -317,6 +605,115 @@ class BLERemoteControl:
 # *** Display Helpers ***
 # ***********************/
 
+# Waveshare-Display: gezeichnet wird nur in den Framebuffer, geänderte Bereiche
+# werden mit mark() vorgemerkt und je Durchlauf von display_task() einmal per
+# flush() übertragen. Das GC9A01 zeichnet direkt, dort bleibt dirty leer.
+_FB_W = const(240)
+_FB_H = const(135)
+_PARTIAL = const(False)  # True, wenn partial_update() des Display-Treibers nur den Bereich überträgt
+dirty = [_FB_W, _FB_H, 0, 0]   # geänderter Bereich x0, y0, x1, y1 (leer wenn x0 >= x1)
+fb_n = 0         # Übertragungen zum Display
+fb_b = 0         # übertragene Bytes (SPI)
+
+def mark(x, y, w, h):
+    if x < dirty[0]:
+        dirty[0] = max(0, x)
+    if y < dirty[1]:
+        dirty[1] = max(0, y)
+    if x + w > dirty[2]:
+        dirty[2] = min(_FB_W, x + w)
+    if y + h > dirty[3]:
+        dirty[3] = min(_FB_H, y + h)
+
+def flush():
+    # liefert die übertragenen Bytes, 0 wenn nichts geändert wurde
+    global fb_n, fb_b
+    x, y, x1, y1 = dirty
+    if x >= x1 or y >= y1:
+        return 0
+    dirty[0] = _FB_W
+    dirty[1] = _FB_H
+    dirty[2] = 0
+    dirty[3] = 0
+    if _PARTIAL:
+        display.partial_update(x, y, x1 - x, y1 - y)
+        n = (x1 - x) * (y1 - y) * 2
+    else:
+        display.update()
+        n = _FB_W * _FB_H * 2
+    fb_n += 1
+    fb_b += n
+    return n
+
+# GC9A01: Texte, Pfeile und Logo werden einmal in RGB565-Puffer gerendert und
+# per blit_buffer() gezeichnet, ein Textfeld nur, wenn sich der Inhalt ändert.
+_SC_MAX = const(16384)  # Bytes für gerenderte Texte, danach wird der Cache geleert
+sc = {}          # (Text, Vordergrund, Hintergrund) -> (RGB565-Puffer, Breite, Höhe)
+scb = 0          # belegte Bytes im Cache
+rows = {}        # (x, y) -> (Schlüssel, Breite) des dort zuletzt gezeichneten Textes
+bt = None        # gerendertes Bluetooth-Logo
+
+def sprite(font, text, fg, bg, wmax=240):
+    # Text einmalig in einen RGB565-Puffer rendern (big endian, wie blit_buffer() ihn erwartet)
+    global scb
+    k = (text, fg, bg)
+    s = sc.get(k)
+    if s:
+        return s
+    fw = font.WIDTH
+    fh = font.HEIGHT
+    bpr = (fw + 7) // 8          # Bytes je Glyphenzeile
+    n = min(len(text), wmax // fw)
+    w = n * fw
+    buf = bytearray(w * fh * 2)
+    f0 = fg >> 8
+    f1 = fg & 255
+    b0 = bg >> 8
+    b1 = bg & 255
+    bits = font.FONT
+    for i in range(n):
+        g = (ord(text[i]) - font.FIRST) * fh * bpr
+        for y in range(fh):
+            p = (y * w + i * fw) * 2
+            for x in range(fw):
+                if bits[g + y * bpr + (x >> 3)] & (0x80 >> (x & 7)):
+                    buf[p] = f0
+                    buf[p + 1] = f1
+                else:
+                    buf[p] = b0
+                    buf[p + 1] = b1
+                p += 2
+    if scb + len(buf) > _SC_MAX:
+        sc.clear()
+        scb = 0
+    s = (buf, w, fh)
+    sc[k] = s
+    scb += len(buf)
+    return s
+
+def draw_text(font, text, x, y, w, h, fg, bg, cache=True):
+    # Textfeld w x h zeichnen, nur wenn sich der Inhalt geändert hat. Aus dem Cache nur
+    # wiederkehrende Texte, wechselnde (Uhr, Werte, Meldungen) direkt per display.text()
+    k = (text, fg, bg)
+    o = rows.get((x, y))
+    if o and o[0] == k:
+        return
+    if cache:
+        buf, sw, sh = sprite(font, text, fg, bg, w)
+    else:
+        text = text[:w // font.WIDTH]
+        sw = len(text) * font.WIDTH
+    if o is None:                # Feld unbekannt, einmal ganz löschen
+        display.fill_rect(x, y, w, h, bg)
+    elif o[1] > sw:              # nur den Rest des vorherigen, längeren Textes löschen
+        display.fill_rect(x + sw, y, o[1] - sw, h, bg)
+    if sw:
+        if cache:
+            display.blit_buffer(buf, x, y, sw, sh)
+        else:
+            display.text(font, text, x, y, fg, bg)
+    rows[(x, y)] = (k, sw)
+
 def reset_display():
     if _WD:
         rst = Pin(12,Pin.OUT)
@@ -326,6 +723,7 @@ def reset_display():
     else:   # enable display and clear screen
         display.init()
         display.fill(0) # clear (fill with black) 
+        rows.clear()
 
 def display_blank():
     if _WD:
@@ -333,19 +731,22 @@ def display_blank():
         display.set_pen(BLACK)
         display.clear()
         display.set_backlight(0.0)
-        display.update()
+        mark(0, 0, _FB_W, _FB_H)
+        flush()
     else:
         display.fill(0)
         display.off()
+        rows.clear()
 
 def display_col(R=90, G=220, B=240):
     if _WD:
         COL = display.create_pen(R, G, B)
         display.set_pen(COL)
         display.clear()
-        display.update()
+        mark(0, 0, _FB_W, _FB_H)
     else:
         display.fill(gc9a01.color565(R, G, B))
+        rows.clear()
     
 def display_image(file='image.jpg', x=0, y=0):
     if _WD:
@@ -356,11 +757,10 @@ def display_image(file='image.jpg', x=0, y=0):
         j.open_file(file)
         # Decode the JPEG
         j.decode(x, y, jpegdec.JPEG_SCALE_FULL)
-     
-        # Display the result
-        display.update()
+        mark(x, y, j.get_width(), j.get_height())
     else:
         display.jpg(file, x, y, gc9a01.SLOW)
+        rows.clear()     # Texte sind übermalt
     gc.collect()
     
 
@@ -375,6 +775,32 @@ def display_compass(alpha=0, set=True):
         display.fill_rect(117 + int(115 * x), 117 + int(115 * y), 7, 7, BACK)
 
 oa = 0
+jb = True        # gc9a01.jpg() kann aus dem Puffer dekodieren
+jd = None        # JPEG-Decoder für PicoGraphics
+
+def display_thumb(data, x=0, y=0):
+    global jb, jd
+    # Thumb direkt aus dem Empfangspuffer darstellen, Flash nur als Rückfallebene
+    if _WD:
+        if jd is None:
+            jd = jpegdec.JPEG(display)
+        jd.open_RAM(data)
+        jd.decode(x, y, jpegdec.JPEG_SCALE_FULL)
+        mark(x, y, jd.get_width(), jd.get_height())
+        return
+    rows.clear()     # Texte sind übermalt
+    if jb:
+        try:
+            display.jpg(data, x, y, gc9a01.SLOW)
+            return
+        except TypeError:    # ältere Firmware erwartet einen Dateinamen
+            jb = False
+            log("INFO: jpg() aus dem Puffer nicht möglich, nutze image.jpg")
+    File = open ("image.jpg","wb")
+    File.write(data)
+    File.close()
+    display.jpg("image.jpg", x, y, gc9a01.SLOW)
+
 def display_Heading(val="10.8"):
     global oa
     if _WD:
@@ -399,19 +825,23 @@ def display_Battery(val="10.8"):
         display.set_pen(GREY)
         display.set_font('bitmap8')
         display.text(val, 36, 68, scale=2) # show text
-        display.update()
+        mark(28, 67, 44, 16)
     else:
-        display.fill_rect(33, 116, 39, 16, BACK) # Battery
-        display.fill_rect(28, 120, 3, 8, BACK) # +Knob
-        display.pixel(28, 120, DGREY)  # round corners knob
-        display.pixel(28, 127, DGREY)
-        display.pixel(33, 116, DGREY)  # round corners battery
-        display.pixel(33, 131, DGREY)
-        display.pixel(71, 116, DGREY)
-        display.pixel(71, 131, DGREY)
-        display.text(font,val,36,117, GREY, BACK)
+        first = (36, 117) not in rows   # Rahmen nur beim ersten Mal zeichnen
+        if first:
+            display.fill_rect(33, 116, 39, 16, BACK) # Battery
+            display.fill_rect(28, 120, 3, 8, BACK) # +Knob
+        draw_text(font, val, 36, 117, 35, 15, GREY, BACK, False)
+        if first:
+            display.pixel(28, 120, DGREY)  # round corners knob
+            display.pixel(28, 127, DGREY)
+            display.pixel(33, 116, DGREY)  # round corners battery
+            display.pixel(33, 131, DGREY)
+            display.pixel(71, 116, DGREY)
+            display.pixel(71, 131, DGREY)
     
 def display_BTlogo():
+    global bt
     if _WD:
         display.set_pen(DGREY)
         x = 124
@@ -439,28 +869,30 @@ def display_BTlogo():
         x = 124
         y = 30
         display.triangle(x - 8, y, x, y - 2, x, y + 5) #left blank
-        display.update()
+        mark(116, 17, 18, 19)
     else:
-        x = 116
-        y = 76
-        display.line(x + 8, y, x, y - 5, DGREY) #left
-        display.line(x + 8, y, x, y + 5, DGREY)
-        display.line(x + 7, y, x, y - 4, DGREY)
-        display.line(x + 7, y, x, y + 4, DGREY)
-        display.vline(x, y - 5, 11, BACK)       #left blank
-        display.vline(x + 1, y - 5, 11, BACK)
-        x = 125
-        y = 72
-        display.line(x + 8, y, x, y - 5, DGREY) #right
-        display.line(x + 8, y, x, y + 5, DGREY)
-        display.line(x + 7, y, x, y - 4, DGREY)
-        display.line(x + 7, y, x, y + 4, DGREY)
-        x = 125
-        y = 80
-        display.line(x + 8, y, x, y - 5, DGREY) #right
-        display.line(x + 8, y, x, y + 5, DGREY)
-        display.line(x + 7, y, x, y - 4, DGREY)
-        display.line(x + 7, y, x, y + 4, DGREY)
+        if bt is None:   # Logo einmalig in einen Puffer zeichnen (18x19 ab 116, 67)
+            import framebuf
+            fg = ((DGREY & 255) << 8) | (DGREY >> 8)  # framebuf speichert little endian
+            bg = ((BACK & 255) << 8) | (BACK >> 8)
+            bt = bytearray(18 * 19 * 2)
+            fb = framebuf.FrameBuffer(bt, 18, 19, framebuf.RGB565)
+            fb.fill(bg)
+            x = 0
+            y = 9
+            fb.line(x + 8, y, x, y - 5, fg) #left
+            fb.line(x + 8, y, x, y + 5, fg)
+            fb.line(x + 7, y, x, y - 4, fg)
+            fb.line(x + 7, y, x, y + 4, fg)
+            fb.vline(x, y - 5, 11, bg)       #left blank
+            fb.vline(x + 1, y - 5, 11, bg)
+            for y in (5, 13):
+                x = 9
+                fb.line(x + 8, y, x, y - 5, fg) #right
+                fb.line(x + 8, y, x, y + 5, fg)
+                fb.line(x + 7, y, x, y - 4, fg)
+                fb.line(x + 7, y, x, y + 4, fg)
+        display.blit_buffer(bt, 116, 67, 18, 19)
 
 def display_text(text, dir = 0):
     if _WD:
@@ -470,19 +902,18 @@ def display_text(text, dir = 0):
             display.set_pen(GREY)
             display.set_font('bitmap8')
             display.text(text, 133, 5, 102, 2) # show text
+            mark(133, 5, 102, 17)
         else:
             display.rectangle(2, 105, 236, 20) # remove lawn on display
             display.set_pen(GREY)
             display.set_font('bitmap8')
             display.text(text, 2, 105, 236, 2) # show text
-        display.update()
+            mark(2, 105, 236, 20)
     else:
         if dir:
-            display.fill_rect(133, 55, 102, 17, BACK)
-            display.text(font,text,133,55, GREY, BACK)
+            draw_text(font, text, 133, 55, 102, 17, GREY, BACK)
         else:
-            display.fill_rect(2, 155, 236, 20, BACK)
-            display.text(font,text,2,155, GREY, BACK)
+            draw_text(font, text, 2, 155, 236, 20, GREY, BACK, False)
 
 def display_alert(toggle=True):
     if _WD:
@@ -494,13 +925,12 @@ def display_alert(toggle=True):
             display.set_pen(RED)
         display.set_font('bitmap8')
         display.text(" >> " + al + " << ", 2, 105, 236, 2)
-        display.update()
+        mark(2, 105, 236, 20)
     else:
-        display.fill_rect(2, 155, 236, 20, BACK)
         if toggle:
-            display.text(font," >> " + al + " << ",2,155, GREY, BACK)
+            draw_text(font, " >> " + al + " << ", 2, 155, 236, 20, GREY, BACK)
         else:
-            display.text(font," >> " + al + " << ",2,155, RED, BACK)
+            draw_text(font, " >> " + al + " << ", 2, 155, 236, 20, RED, BACK)
 
 def display_up(set=True):
     if _BTA:
@@ -510,12 +940,12 @@ def display_up(set=True):
             else:
                 display.set_pen(DGREY)
             display.triangle(_OX, _OY - 18, _OX - 10, _OY - 10, _OX + 10, _OY - 10) #up
-            display.update()
+            mark(_OX - 10, _OY - 18, 21, 9)
         else:
             if set:
-                display.text(font2,30,96,113, RED, DGREY)
+                draw_text(font2, chr(30), 96, 113, 8, 8, RED, DGREY)
             else:
-                display.text(font2,30,96,113, DGREY, DGREY)
+                draw_text(font2, chr(30), 96, 113, 8, 8, DGREY, DGREY)
 
     
 def display_down(set=True):
@@ -526,12 +956,12 @@ def display_down(set=True):
             else:
                 display.set_pen(DGREY)
             display.triangle(_OX, _OY + 18, _OX + 10, _OY + 10, _OX - 10, _OY + 10) #down
-            display.update()
+            mark(_OX - 10, _OY + 10, 21, 9)
         else:
             if set:
-                display.text(font2,31,96,142, RED, DGREY)
+                draw_text(font2, chr(31), 96, 142, 8, 8, RED, DGREY)
             else:
-                display.text(font2,31,96,142, DGREY, DGREY)
+                draw_text(font2, chr(31), 96, 142, 8, 8, DGREY, DGREY)
 
  
 def display_left(set=True):
@@ -542,12 +972,12 @@ def display_left(set=True):
             else:
                 display.set_pen(DGREY)
             display.triangle(_OX - 18, _OY, _OX - 10, _OY - 10, _OX - 10, _OY + 10) #left
-            display.update()
+            mark(_OX - 18, _OY - 10, 9, 21)
         else:
             if set:
-                display.text(font2,17,82,127, RED, DGREY)
+                draw_text(font2, chr(17), 82, 127, 8, 8, RED, DGREY)
             else:
-                display.text(font2,17,82,127, DGREY, DGREY)
+                draw_text(font2, chr(17), 82, 127, 8, 8, DGREY, DGREY)
 
 def display_right(set=True):
     if _BTA:
@@ -557,12 +987,12 @@ def display_right(set=True):
             else:
                 display.set_pen(DGREY)
             display.triangle(_OX + 18, _OY, _OX + 10, _OY - 10, _OX + 10, _OY + 10) #right
-            display.update()
+            mark(_OX + 10, _OY - 10, 9, 21)
         else:
             if set:
-                display.text(font2,16,111,127, RED, DGREY)
+                draw_text(font2, chr(16), 111, 127, 8, 8, RED, DGREY)
             else:
-                display.text(font2,16,111,127, DGREY, DGREY)
+                draw_text(font2, chr(16), 111, 127, 8, 8, DGREY, DGREY)
 
 def display_center(set=True):
     if _BTA:
@@ -572,14 +1002,14 @@ def display_center(set=True):
             else:
                 display.set_pen(GREY)
             display.circle(_OX, _OY, 5)      # Center btn
-            display.update()
+            mark(_OX - 5, _OY - 5, 11, 11)
         else:
             if set:
-                display.text(font2,219,96,127, RED, GREY)
+                draw_text(font2, chr(219), 96, 127, 8, 8, RED, GREY)
             else:
-                display.text(font2,219,96,127, GREY, GREY)
+                draw_text(font2, chr(219), 96, 127, 8, 8, GREY, GREY)
 
-def display_dir(odir="Init"):
+def display_dir(odir):
     if (odir == "u"):
         display_up(0)
     if (odir == "d"):
@@ -598,27 +1028,17 @@ def display_dir(odir="Init"):
         display_down(0)
         display_right(0)
         display_up(0)  
-    if (odir == "Init"):
-        display_up()
-        sleep(0.3)
-        display_right()
-        sleep(0.3)
-        display_down()
-        sleep(0.3)
-        display_left()
-        sleep(0.3)
-        display_center()
-        sleep(0.3)
-        display_up(0)
-        sleep(0.3)
-        display_right(0)
-        sleep(0.3)
-        display_down(0)
-        sleep(0.3)
-        display_left(0)
-        sleep(0.3)
-        display_center(0)
-        sleep(0.3)
+
+async def display_intro():
+    # kurze Vorstellung der Steuerung, läuft parallel zum Start von Bluetooth
+    t = ticks_ms()
+    for set in (1, 0):
+        for f in (display_up, display_right, display_down, display_left, display_center):
+            f(set)
+            flush()
+            await asyncio.sleep_ms(300)
+    boot("intro", t)
+
 if _D:        
     # Init Display
     if _WD:
@@ -689,48 +1109,192 @@ if _M:
     angel = 0
     Z = 0
     
-    def read_analog(ADC):
-        val = ADC.read_u16()  # 0 - 65535
-        return val
-      
-    def joy(channel): # left right
-        val = read_analog(channel)
-        val -= 32768
-        val /= 28456
-        return val
+    #/*******************************
+    # *** Joystick Abtastung/Kalib ***
+    # *******************************/
+
+    _JOY_HZ = const(200)             # Abtastrate der ADCs durch den Timer
+    _JOY_N = const(8)                # Werte je Kanal im Ringpuffer (Mittelwert)
+    _JOY_CAL = const('joycal.json')  # Kalibrierung auf dem Flash
+    ADCS = (ADCX, ADCY, ADCZ)        # Kanäle: 0 left right, 1 up down, 2 rotate
+
+    jt = Timer()                                 # Timer für die Abtastung
+    joy_buf = array('H', bytes(2 * _JOY_N * len(ADCS)))  # Ringpuffer je Kanal
+    js = array('i', bytes(4 * len(ADCS)))       # laufende Summe je Kanal
+    ji = 0                                       # Schreibposition im Ringpuffer
+    jc = [32768] * len(ADCS)                     # Mitte je Kanal
+    jl = [28456] * len(ADCS)                     # Ausschlag Mitte bis Minimum
+    jh = [28456] * len(ADCS)                     # Ausschlag Mitte bis Maximum
+    joy_dz = 0                                   # Totzone um die Mitte
+
+    def joy_sample(t):
+        # Timer-Callback: je Kanal ein Wert in den Ringpuffer, Summe nachführen
+        global ji
+        i = ji
+        for c in range(len(ADCS)):
+            k = c * _JOY_N + i
+            v = ADCS[c].read_u16()  # 0 - 65535
+            js[c] += v - joy_buf[k]
+            joy_buf[k] = v
+        ji = (i + 1) % _JOY_N
+
+    def joy_start():
+        global joy_dz
+        # Kalibrierung laden, Ringpuffer vorbelegen und Abtastung starten
+        try:
+            import ujson
+            f = open(_JOY_CAL)
+            cal = ujson.load(f)
+            f.close()
+            jc[:] = cal["c"]
+            jl[:] = cal["l"]
+            jh[:] = cal["h"]
+            joy_dz = cal["d"]
+            log("INFO: Joystick-Kalibrierung geladen " + str(cal))
+        except (OSError, ValueError, KeyError):
+            log("INFO: keine Joystick-Kalibrierung, nutze Standardwerte")
+        for c in range(len(ADCS)):
+            v = ADCS[c].read_u16()
+            for i in range(_JOY_N):
+                joy_buf[c * _JOY_N + i] = v
+            js[c] = v * _JOY_N
+        jt.init(freq=_JOY_HZ, mode=Timer.PERIODIC, callback=joy_sample)
+
+    def joy_raw(c):
+        return js[c] // _JOY_N      # gefilterter Wert des Kanals
+
+    def cal_text(text):
+        if _D:
+            display_text(text)
+            flush()
+        else:
+            log(text)
+
+    async def calibrate():
+        global joy_dz
+        # Einmalige Kalibrierung: erst Mitte und Rauschen, dann den Ausschlag erfassen
+        n = len(ADCS)
+        cal_text("  Joystick loslassen  ")
+        await asyncio.sleep_ms(1000)
+        lo = [65535] * n
+        hi = [0] * n
+        for i in range(100):        # 2s Mitte
+            for c in range(n):
+                v = joy_raw(c)
+                lo[c] = min(lo[c], v)
+                hi[c] = max(hi[c], v)
+            await asyncio.sleep_ms(20)
+        mid = [(lo[c] + hi[c]) // 2 for c in range(n)]
+        dz = max(hi[c] - lo[c] for c in range(n)) + 128
+        cal_text(" Joystick kreisen/drehen ")
+        for i in range(300):        # 6s Ausschlag
+            for c in range(n):
+                v = joy_raw(c)
+                lo[c] = min(lo[c], v)
+                hi[c] = max(hi[c], v)
+            await asyncio.sleep_ms(20)
+        l = [mid[c] - lo[c] for c in range(n)]
+        h = [hi[c] - mid[c] for c in range(n)]
+        if min(l + h) < 8 * dz:     # Joystick nicht bewegt, Kalibrierung verwerfen
+            log("INFO: Joystick-Kalibrierung verworfen")
+            cal_text(" Kalibrierung verworfen ")
+            return False
+        jc[:] = mid
+        jl[:] = l
+        jh[:] = h
+        joy_dz = dz
+        import ujson
+        f = open(_JOY_CAL, "w")
+        ujson.dump({"c": jc, "l": jl, "h": jh, "d": joy_dz}, f)
+        f.close()
+        log("INFO: Joystick kalibriert " + str(mid) + " " + str(l) + " " + str(h) + " " + str(dz))
+        cal_text(" Kalibrierung gespeichert ")
+        return True
+
+    _ATAN = array('H', (0, 90, 179, 268, 358, 447, 536, 624, 713, 800, 888, 975, 1062, 1148,
+        1234, 1319, 1404, 1488, 1571, 1653, 1735, 1817, 1897, 1977, 2056, 2134, 2211, 2287,
+        2363, 2438, 2511, 2584, 2657, 2728, 2798, 2867, 2936, 3003, 3070, 3136, 3201, 3264,
+        3327, 3390, 3451, 3511, 3571, 3629, 3687, 3744, 3800, 3855, 3909, 3963, 4016, 4067,
+        4119, 4169, 4218, 4267, 4315, 4363, 4409, 4455, 4500, 4500))  # atan(i/64) in 1/100 Grad
+
+    @micropython.viper
+    def isqrt(n: int) -> int:
+        # ganzzahlige Wurzel, bitweise (n < 2^30)
+        r = 0
+        b = 1 << 28
+        while b > n:
+            b >>= 2
+        while b:
+            if n >= r + b:
+                n -= r + b
+                r = (r >> 1) + b
+            else:
+                r >>= 1
+            b >>= 2
+        return r
+
+    @micropython.native
+    def compass(x, y):
+        # Winkel von (x, y) in 1/10 Grad: up 0 right 900 left -900 down 1800
+        if x == 0 and y == 0:
+            return 900
+        ax = x if x > 0 else -x
+        ay = y if y > 0 else -y
+        if ax >= ay:     # atan über die Tabelle im ersten Oktanten, linear interpoliert
+            r = (ay << 14) // ax
+            i = r >> 8
+            a = _ATAN[i] + (((_ATAN[i + 1] - _ATAN[i]) * (r & 255)) >> 8)
+        else:
+            r = (ax << 14) // ay
+            i = r >> 8
+            a = 9000 - _ATAN[i] - (((_ATAN[i + 1] - _ATAN[i]) * (r & 255)) >> 8)
+        a = (a + 5) // 10
+        if x < 0:
+            a = 1800 - a
+        if y < 0:
+            a = -a       # wie atan2: oben 0 (E) bis 1800 (W)/ unten -0 (E) bis -1800 (W)
+        a = 900 - a      # Korrektur, 90 Grad nach rechts drehen und negieren
+        if a > 1800:
+            a -= 3600
+        return a
+
+    @micropython.native
+    def joy(c):
+        # aktueller gefilterter Wert von Kanal c, kalibriert auf -1000 .. 1000
+        val = joy_raw(c) - jc[c]
+        if -joy_dz < val < joy_dz:
+            return 0
+        # auf +-1000 begrenzen, auch wenn die Kalibrierung den Ausschlag zu klein gemessen hat
+        # (isqrt() in get_joy() ist für diesen Bereich ausgelegt)
+        if val > 0:
+            return min(1000, (val * 1000) // jh[c])
+        return -min(1000, (-val * 1000) // jl[c])
+
+    def tenths(v):
+        # positiven Wert in 1/10 als Text, z.B. 7 -> "0.7"
+        return str(v // 10) + "." + str(v % 10)
     
     def get_joy():
         global angel, force, Z, al
-        x = joy(ADCX)    # left right
+        x = joy(0)       # left right
         if _NX:          # Werte x negieren
-            x = x * -1
+            x = -x
         #print("Joy-X: ",x)
-        y = joy(ADCY)    # up down
+        y = joy(1)       # up down
         if _NY:          # Werte y negieren
-            y = y * -1
+            y = -y
         #print("Joy-Y: ",y)
-        angel = degrees(atan2(y,x)) # Ist-Werte oben 0 (E) bis 180 (W)/ unten -0 (E) bis -180 (W)
-        # Soll-Werte up: 0 right 90 left -90 down 180
-        # daher Korrektur:
-        if angel < 0: # untere Hälfte Winkel von 90 (E) bis 180 (S) und -90 (W) bis -180 (S)
-            if angel >= -90:
-                angel = 90 + (angel * -1)
-            else:
-                angel = (angel * -1) - 270            
-        else: # obere Hälfte -90 (E) bis 90 (W)
-            angel -= 90      # Korrektur, 90 Grad nach rechts drehen
-            angel *= -1      # und negieren
-        angel = int(round(angel, 0))    
+        angel = (compass(x, y) + 5) // 10   # in Grad
         #print("Winkel: ",angel)
-        force = round(sqrt((x*x)+(y*y)),1)
+        force = (isqrt(x*x + y*y) + 50) // 100   # in 1/10
         #print("Force: ",force)
-        z = joy(ADCZ)    # rotate cw - ccw
+        z = joy(2)       # rotate cw - ccw
         if _NZ:          # Werte z negieren
-            z = z * -1
+            z = -z
         #print("Joy-Z: ",z)
-        Z = z
+        Z = z            # in 1/1000
         if _DB:
-            al = "X: " + "{:.2f}".format(x) + ", Y: " + "{:.2f}".format(y) + ", Z: " + "{:.2f}".format(z)
+            al = "X: " + "{:.2f}".format(x / 1000) + ", Y: " + "{:.2f}".format(y / 1000) + ", Z: " + "{:.2f}".format(z / 1000)
             display_alert()
         
 #/*************
@@ -744,19 +1308,34 @@ async def control_task(mode = 0):
     oforce = 0
     oangel = 0
     n = 0
+    hb = 0            # Knopf gedrückt seit so vielen Abtastungen
     while True:
         if mode:       # Joystick
             get_joy()  # abfragen
-            if force > 0.3:
-                if ((oforce != min (1, force)) or (abs(oangel - angel) >= 5 )):
-                    btn_val = str(force)+" "+str(angel)
-                    oforce = min (1, force)
+            if force > 3:
+                if ((oforce != min (10, force)) or (abs(oangel - angel) >= 5 )):
+                    btn_val = tenths(force)+" "+str(angel)
+                    nav[0] = 1
+                    nav[1] = force
+                    nav[2] = angel
+                    nav[3] = 0
+                    oforce = min (10, force)
                     oangel = angel
             else:
                 btn_val = "0"
-            if 0 == btn.value():                       # do aktion
+            kb = rw or btn.value()          # im Doppelklick-Fenster gehört der Knopf restore()
+            if _MET and (hb or 0 == kb):     # erst beim Loslassen: kurz Aktion, lang HUD
+                if 0 == kb:
+                    hb += 1
+                    if hb == _HUD_N:
+                        toggle_hud()
+                else:
+                    if hb < _HUD_N:
+                        btn_val = _AKTION[ai]
+                    hb = 0
+            elif 0 == kb:                              # do aktion
                 btn_val = _AKTION[ai]
-            elif (abs (Z) >= 0.1) and (abs (Z) < 0.6): # toggle aktion
+            elif (abs (Z) >= 100) and (abs (Z) < 600): # toggle aktion
                 n += 1
                 if n > 2:
                     n = 0
@@ -764,11 +1343,18 @@ async def control_task(mode = 0):
                         change_aktion(-1)
                     else:
                         change_aktion()
-            elif abs (Z) >= 0.6:
+            elif abs (Z) >= 600:
                 if Z < 0:
-                    btn_val = "cc "+str(round(Z, 1))
+                    k = (50 - Z) // 100
+                    btn_val = "cc -"+tenths(k)
+                    nav[0] = 2
+                    nav[3] = -100 * k
                 else:
-                    btn_val = "cw "+str(round(Z, 1))
+                    k = (Z + 50) // 100
+                    btn_val = "cw "+tenths(k)
+                    nav[0] = 3
+                    nav[3] = 100 * k
+                nav[1] = nav[2] = 0
             if btn_val == "0" and _WD:       # Button a or b bei Waveshare-Display
                 if 0 == btn_a.value():
                      btn_val = _AKTION[ai]   # toggle/do aktion
@@ -782,7 +1368,7 @@ async def control_task(mode = 0):
                 btn_val = "u"
             elif 0 == joy_d.value():
                 btn_val = "d"
-            elif 0 == joy_c.value():
+            elif 0 == joy_c.value() and not rw:
                 if (joy_l.value() == 0) or (last_btn == "cc"):
                     btn_val = "cc"
                 elif (joy_r.value() == 0) or (last_btn == "cw"):
@@ -796,14 +1382,25 @@ async def control_task(mode = 0):
             elif (btn_a.value() == 0) and (btn_b.value() == 0):
                 btn_val = "sd"
             elif 0 == btn_a.value():
-                btn_val = _AKTION[ai]   # toggle/do aktion
+                if _MET:                # erst beim Loslassen: kurz Aktion, lang HUD
+                    hb += 1
+                    if hb == _HUD_N:
+                        toggle_hud()
+                    btn_val = 0
+                else:
+                    btn_val = _AKTION[ai]   # toggle/do aktion
             elif 0 == btn_b.value():
                 n += 1
                 if n > 1:
                     n = 0
                     change_aktion()
+            elif _MET and hb:           # A losgelassen
+                btn_val = _AKTION[ai] if hb < _HUD_N else 0
+                hb = 0
             else:
                 btn_val = 0
+            if _MET and btn_val:        # A beim Steuern: beim Loslassen keine Aktion
+                hb = 0
             if btn_val in ["u", "d", "l", "r", "cc" "cw"]:
                 blanka = True
         await asyncio.sleep_ms(100)
@@ -812,9 +1409,15 @@ async def remote_task():
     """ Task to handle remote control """
     
     global last_btn
+    t = ticks_ms()
     ble = bluetooth.BLE()
     p = BLERemoteControl(ble)
+    asyncio.create_task(p.events())
+    boot("ble", t)
+    up = False        # zum ersten Mal verbunden?
     jetzt = ticks_ms()
+    aktiv = jetzt     # letzter neuer Steuerbefehl
+    schnell = True    # kurzes Verbindungsintervall gewünscht
     n = 0
 
     def do_tele(v):
@@ -830,6 +1433,9 @@ async def remote_task():
 
     while True:
         if p.is_connected():
+            if not up:    # ab jetzt gehen Steuerbefehle raus
+                up = True
+                boot("ready", b0)
             # Short burst of queued notifications.
             if last_btn == btn_val:
                 if (last_btn == 0) and (n < 2): # Stop wurde zuletzt uebermittelt
@@ -837,16 +1443,69 @@ async def remote_task():
                     n += 1
                 if 2000 < ticks_diff (ticks_ms(), jetzt):
                     # Resend alle 2 Sekunden
-                    print(f"{last_btn} Button still pressed, connection is: {p}")
+                    if _LOG_LVL <= _L_DEBUG:
+                        log(f"{last_btn} Button still pressed, connection is: {p}", _L_DEBUG)
                     p.set_navigation(btn_val, notify=True, indicate=False)
                     jetzt = ticks_ms()
+                if schnell and (last_btn in (0, "0")) and (_CP_IDLE_MS < ticks_diff (ticks_ms(), aktiv)):
+                    schnell = False            # in Ruhe: Verbindung entspannen
+                    p.set_conn_params(False)
             else:
-                print(f"{btn_val} Button pressed, connection is: {p}")
+                if _LOG_LVL <= _L_DEBUG:
+                    log(f"{btn_val} Button pressed, connection is: {p}", _L_DEBUG)
                 p.set_navigation(btn_val, notify=True, indicate=False)
+                if not schnell:                # es wird gesteuert: kurzes Intervall
+                    schnell = True
+                    p.set_conn_params(True)
                 last_btn = btn_val
                 jetzt = ticks_ms()
+                aktiv = jetzt
                 n = 0
-        await asyncio.sleep_ms(50)
+        await asyncio.sleep_ms(20 if schnell else 50)
+
+hud = False      # Messwerte (HUD) statt Bild anzeigen
+
+def display_hud():
+    # Messwerte aus metrics.py, eine Zeile je Wert
+    l = met.lines()
+    if _WD:
+        display.set_pen(display.create_pen(0, 0, 0))
+        display.rectangle(0, 0, _FB_W, _FB_H)
+        display.set_pen(GREY)
+        display.set_font('bitmap8')
+        for i in range(min(13, len(l))):
+            display.text(l[i], 4, 2 + 10 * i, _FB_W, 1)
+        mark(0, 0, _FB_W, _FB_H)
+    else:
+        # im Quadrat 160 x 160 in der Mitte des runden Displays
+        for i in range(10):
+            display.text(font, '{:<20}'.format(l[i] if i < len(l) else "")[:20], 40, 40 + 16 * i, GREY, 0)
+
+def toggle_hud():
+    global hud
+    if not _D:
+        return
+    hud = not hud
+    if hud:
+        if not _WD:
+            display.fill(0)
+            rows.clear()
+        display_hud()
+    else:
+        display_image(_LOGO)
+
+async def met_task():
+    # HUD jede Sekunde auffrischen, jede Minute eine Zusammenfassung ins Log
+    n = 0
+    while True:
+        await asyncio.sleep(1)
+        met.mem()
+        if hud:
+            display_hud()
+        n += 1
+        if n >= 60:
+            n = 0
+            log("MET: " + met.summary())
 
 async def display_task():
     """ Task to update display """
@@ -871,6 +1530,9 @@ async def display_task():
                 display_center()
             if D == "0" and blanka:
                 display_text("             ", 1)
+        n = flush()      # alle Änderungen seit dem letzten Durchlauf in einem Rutsch
+        if n and _DB:
+            log("Display-Update: " + str(n) + " Bytes, gesamt " + str(fb_b) + " Bytes in " + str(fb_n))
         await asyncio.sleep_ms(150)
 
 async def main():
@@ -878,15 +1540,15 @@ async def main():
     
     # Blink onboard LED slowly during restore
     timer.init(freq=2, mode=Timer.PERIODIC, callback=blink)
-    # Check 4 Restore
-    log("Waiting 5s 4 doubleclick 2 restore")
-    restore()
-    timer.deinit() #blinken beenden
-    led.off()      #LED ausschalten
+    if _M:
+        # Joystick abtasten, wird der Knopf gehalten, neu kalibrieren
+        joy_start()
+        if btn.value() == 0:
+            await calibrate()
     
     tasks = []
     if _D:
-        tasks.append( asyncio.create_task(display_task()) )
+        t = ticks_ms()
         if _FB:
             display_col()
         else:   # Show Logo
@@ -894,15 +1556,22 @@ async def main():
             #display_Battery()
             #display_BTlogo()
             #display_Heading(120)
+        flush()
+        boot("display", t)
     
-    if _BTA:
-        display_dir()            # kurze Vorstellung der Steuerung
-        
-    # Blink onboard LED during connect
-    timer.init(freq=4, mode=Timer.PERIODIC, callback=blink)
-    
-    tasks.append( asyncio.create_task(control_task(_M)) )
+    # Doppelklick-Fenster, Vorstellung der Steuerung und Bluetooth laufen parallel
+    log("Waiting 5s 4 doubleclick 2 restore")
+    tasks.append( asyncio.create_task(restore()) )
     tasks.append( asyncio.create_task(remote_task()) )
+    tasks.append( asyncio.create_task(control_task(_M)) )
+    if _BTA:
+        tasks.append( asyncio.create_task(display_intro()) )  # kurze Vorstellung der Steuerung
+    if _D:
+        tasks.append( asyncio.create_task(display_task()) )
+    if _LOG:
+        tasks.append( asyncio.create_task(log_task()) )
+    if _MET:
+        tasks.append( asyncio.create_task(met_task()) )
     
     if _DB:
         log("INFO: Tasks ("+str(len(tasks))+")")
@@ -0,0 +1,171 @@
+#/****************************************************************************
+# *  PiMowBot-RC Benchmark: Steuerbefehle während ein Thumb lädt             *
+# *  ===========================================================             *
+# *  Misst in RControl.py die Verzögerung zwischen Tastendruck und           *
+# *  quittiertem Steuerbefehl, während refresh_display() laufend Thumbs      *
+# *  lädt:                                                                   *
+# *   - vorher: blockierende Requests, das Laden eines Thumbs hält die       *
+# *             Abfrage der Tasten an                                        *
+# *   - nachher: HTTPConn auf Basis der uasyncio Streams, eigene Verbindung  *
+# *             für Steuerbefehle                                            *
+# *                                                                          *
+# *  Die Tasten werden wie in do_buttons() alle 250ms abgefragt. Damit ein   *
+# *  Thumb spürbar Zeit braucht, den Stand-in mit begrenzter Bandbreite      *
+# *  starten:                                                                *
+# *                                                                          *
+# *     python3 bench/standin.py --kbps 40 &                                 *
+# *     python3 bench/bench_async.py [host] [port] [n]                       *
+# *                                                                          *
+# *  Homepage: http://pimowbot.TGD-Consulting.de                             *
+# *                                                                          *
+# *  (C) 2022 TGD-Consulting , Author: Dirk Weyand                           *
+# ****************************************************************************/
+
+import sys
+try:
+    import uasyncio as a
+except ImportError:              # CPython
+    import asyncio as a
+from bench_ka import KeepAlive, stats, ticks_us, ticks_diff, _TOKEN, _CMDS
+from bench_thumb import _IMG_MAX
+
+_POLL_MS = 250
+
+class HTTPConn:
+    # gleiche Logik wie HTTPConn in RControl.py
+    def __init__(self, host, port, timeout=5):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.r = None
+        self.w = None
+        self.bn = 0
+        self.sent = False
+        self.lock = a.Lock()
+
+    def close(self):
+        if self.w:
+            self.w.close()
+        self.r = None
+        self.w = None
+
+    async def request(self, path, type="HEAD", buf=None):
+        async with self.lock:
+            self.bn = 0
+            for retry in (0, 1):
+                fresh = not self.w
+                self.sent = False
+                try:
+                    if fresh:
+                        self.r, self.w = await a.wait_for(a.open_connection(self.host, self.port), self.timeout)
+                    return await a.wait_for(self._request(path, type, buf), self.timeout)
+                except Exception:
+                    self.close()
+                    if fresh or self.sent:
+                        break
+            return False
+
+    async def _readinto(self, mv):
+        if hasattr(self.r, "readinto"):
+            return await self.r.readinto(mv)
+        d = await self.r.read(len(mv))      # CPython StreamReader hat kein readinto()
+        mv[:len(d)] = d
+        return len(d)
+
+    async def _request(self, path, type, buf):
+        r = self.r
+        self.w.write(type.encode() + b" " + path.encode() + b" HTTP/1.1\r\nHost: " + self.host.encode() + b"\r\n\r\n")
+        await self.w.drain()
+        self.sent = True
+        l = await r.readline()
+        if not l:
+            self.sent = False
+            raise OSError("closed")
+        status = int(l.split(None, 2)[1])
+        cl = -1
+        close = l.startswith(b"HTTP/1.0")
+        while True:
+            l = await r.readline()
+            if not l or l == b"\r\n":
+                break
+            h = l.lower()
+            if h.startswith(b"content-length:"):
+                cl = int(h[15:])
+            elif h.startswith(b"connection:") and b"close" in h:
+                close = True
+        if type != "HEAD":
+            if cl < 0:
+                close = True
+            mv = memoryview(buf) if buf else None
+            n = 0
+            while cl < 0 or n < cl:
+                if mv and n < len(mv):
+                    k = await self._readinto(mv[n:len(mv) if cl < 0 else min(cl, len(mv))])
+                else:
+                    k = len(await r.read(256 if cl < 0 else min(cl - n, 256)))
+                if not k:
+                    if cl < 0:
+                        break
+                    raise OSError("closed")
+                n += k
+            if mv and n <= len(mv):
+                self.bn = n
+        if close:
+            self.close()
+        return status
+
+async def scenario(host, port, n, blocking):
+    img = bytearray(_IMG_MAX)
+    thumb = "/cgi-bin/xcom.html?Token=" + _TOKEN + "&Thumb=image.jpg"
+    if blocking:
+        kc = ki = KeepAlive(host, port)
+    else:
+        kc = HTTPConn(host, port, 2)
+        ki = HTTPConn(host, port, 5)
+    delays = []
+    done = [False]
+    frames = [0]
+
+    async def images():
+        while not done[0]:
+            if blocking:
+                ki.request(thumb, "GET", img)
+            else:
+                await ki.request(thumb, "GET", img)
+            frames[0] += 1
+            await a.sleep_ms(10) if hasattr(a, "sleep_ms") else await a.sleep(0.01)
+
+    async def buttons():
+        # Tastendruck alle 370ms (nicht synchron zur Abfrage), Abfrage alle 250ms
+        start = ticks_us()
+        pressed = 0
+        while len(delays) < n:
+            now = ticks_diff(ticks_us(), start)
+            if now >= pressed * 370000:
+                path = "/cgi-bin/control.html?Token=" + _TOKEN + "&" + _CMDS[pressed % len(_CMDS)]
+                if blocking:
+                    kc.request(path)
+                else:
+                    await kc.request(path)
+                delays.append(ticks_diff(ticks_us(), start) - pressed * 370000)
+                pressed = now // 370000 + 1
+            await a.sleep(_POLL_MS / 1000)
+        done[0] = True
+
+    t = a.create_task(images())
+    await buttons()
+    await t
+    kc.close()
+    ki.close()
+    stats("blocking" if blocking else "async", delays)
+    print("          thumbs loaded: {}".format(frames[0]))
+
+def run(host="127.0.0.1", port=8080, n=40):
+    a.run(scenario(host, port, n, True))
+    a.run(scenario(host, port, n, False))
+
+if __name__ == "__main__":
+    argv = getattr(sys, "argv", [])
+    run(argv[1] if len(argv) > 1 else "127.0.0.1",
+        int(argv[2]) if len(argv) > 2 else 8080,
+        int(argv[3]) if len(argv) > 3 else 40)
@@ -0,0 +1,88 @@
+#/****************************************************************************
+# *  PiMowBot-RC Benchmark: Thumbs per Bluetooth                             *
+# *  =======================================                                 *
+# *  Misst im Host-Simulator (sim/), wie viele Thumbs die Central von        *
+# *  bench/standin.py in Stücken an RControlBLE.py schreiben kann und wie    *
+# *  viele davon angezeigt werden: gesendete und dekodierte Bilder je        *
+# *  Sekunde, Durchsatz während der Übertragung und verworfene Bilder.       *
+# *  Je angeforderter Bildrate gibt es eine JSON-Zeile:                      *
+# *                                                                          *
+# *     python3 bench/bench_ble_thumb.py [--fps 1 --fps 5] [--ble-ci 30]     *
+# *            [--decode-ms-kb 8] [--seconds 15] [--loss 0.02]               *
+# *                                                                          *
+# *  Homepage: http://pimowbot.TGD-Consulting.de                             *
+# *                                                                          *
+# *  (C) 2022 TGD-Consulting , Author: Dirk Weyand                           *
+# ****************************************************************************/
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_ROOT = os.path.dirname(_HERE)
+
+_T0 = 3000       # ms nach dem Einschalten: verbunden, Intro vorbei
+
+
+def run_one(fps, seconds, ci, honour, decode, loss):
+    # im Kindprozess: Simulator und Central starten, ab _T0 zählen
+    sys.path.insert(0, _ROOT)
+    from sim import board, run
+    run.install()
+    from bench import standin
+    standin.Impair.loss = loss
+    import bluetooth
+    c = standin.BLECentral(bluetooth.BLE(), ci=ci or None, honour=honour, thumb_fps=fps)
+    m = {}
+
+    def mark():
+        time.sleep(_T0 / 1000)
+        m.update(board.report())
+        m["thumbs"] = dict(c.thumbs)
+    import threading
+    threading.Thread(target=mark, daemon=True).start()
+    run.run("RControlBLE.py", seconds=_T0 / 1000 + seconds, jpeg_ms_kb=decode)
+    s = board.report()
+    sent = c.thumbs["sent"] - m["thumbs"]["sent"]
+    nb = c.thumbs["bytes"] - m["thumbs"]["bytes"]
+    ms = c.thumbs["ms"] - m["thumbs"]["ms"]
+    shown = s["jpeg"] - m["jpeg"]
+    return {"fps": fps, "seconds": seconds, "ble_ci_ms": s["ble_ci_ms"] or c.ci, "mtu": s["ble_mtu"],
+            "decode_ms_kb": decode, "loss": loss,
+            "sent_fps": round(sent / seconds, 2), "shown_fps": round(shown / seconds, 2),
+            "dropped": max(0, sent - shown),
+            "transfer_ms": round(ms / sent, 1) if sent else None,
+            "kbyte_s": round(nb / ms, 1) if ms else None}
+
+
+def main():
+    p = argparse.ArgumentParser(description="PiMowBot-RC BLE thumbnail benchmark")
+    p.add_argument("--fps", type=float, action="append", help="requested frame rate (default: 0.5 1 2 5 10)")
+    p.add_argument("--seconds", type=float, default=15)
+    p.add_argument("--ble-ci", type=float, default=0, help="initial BLE connection interval in ms")
+    p.add_argument("--ble-fixed", action="store_true", help="central ignores requested connection parameters")
+    p.add_argument("--decode-ms-kb", type=int, default=8, help="simulated JPEG decode time per KB")
+    p.add_argument("--loss", type=float, default=0, help="packet loss 0..1")
+    p.add_argument("--one", action="store_true", help=argparse.SUPPRESS)
+    args = p.parse_args()
+    if args.one:
+        r = run_one(args.fps[0], args.seconds, args.ble_ci, not args.ble_fixed, args.decode_ms_kb, args.loss)
+        print("THUMB: " + json.dumps(r))
+        return
+    for fps in args.fps or (0.5, 1, 2, 5, 10):
+        cmd = [sys.executable, os.path.abspath(__file__), "--one", "--fps", str(fps),
+               "--seconds", str(args.seconds), "--ble-ci", str(args.ble_ci),
+               "--decode-ms-kb", str(args.decode_ms_kb), "--loss", str(args.loss)]
+        if args.ble_fixed:
+            cmd.append("--ble-fixed")
+        out = subprocess.run(cmd, capture_output=True, text=True, cwd=_ROOT).stdout
+        lines = [l[7:] for l in out.splitlines() if l.startswith("THUMB: ")]
+        print(lines[-1] if lines else json.dumps({"fps": fps, "error": out[-300:]}))
+
+
+if __name__ == "__main__":
+    main()
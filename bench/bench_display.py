@@ -0,0 +1,146 @@
+#/****************************************************************************
+# *  PiMowBot-RC Benchmark: Display-Updates Waveshare Pico-LCD 1.14          *
+# *  ==============================================================          *
+# *  Zählt die per SPI übertragenen Bytes je Richtungswechsel in             *
+# *  RControl.py (und im _WD Zweig von RControlBLE.py):                      *
+# *   - vorher: jedes display_up/down/left/right/center() ruft               *
+# *             display.update() und überträgt den ganzen Framebuffer        *
+# *   - nachher: mark() merkt die Bereiche vor, flush() überträgt einmal je  *
+# *             Durchlauf, mit _PARTIAL nur den geänderten Bereich           *
+# *                                                                          *
+# *  Die Zeichenbefehle werden von einem Zähl-Display entgegengenommen, es   *
+# *  braucht also weder Display noch PicoGraphics:                           *
+# *                                                                          *
+# *     python3 bench/bench_display.py                                       *
+# *                                                                          *
+# *  Homepage: http://pimowbot.TGD-Consulting.de                             *
+# *                                                                          *
+# *  (C) 2022 TGD-Consulting , Author: Dirk Weyand                           *
+# ****************************************************************************/
+
+_FB_W = 240
+_FB_H = 135
+_OX = 99         # Mitte des Steuerkreuzes wie in RControl.py
+_OY = 80
+
+class CountingDisplay:
+    # nimmt die Aufrufe von PicoGraphics entgegen und zählt die SPI-Bytes
+    def __init__(self):
+        self.n = 0
+        self.b = 0
+
+    def set_pen(self, pen):
+        pass
+
+    def triangle(self, *args):
+        pass
+
+    def circle(self, *args):
+        pass
+
+    def update(self):
+        self.n += 1
+        self.b += _FB_W * _FB_H * 2
+
+    def partial_update(self, x, y, w, h):
+        self.n += 1
+        self.b += w * h * 2
+
+display = CountingDisplay()
+mode = "old"
+partial = False
+dirty = [_FB_W, _FB_H, 0, 0]
+
+def mark(x, y, w, h):
+    # wie mark() in RControl.py, vorher sofort display.update()
+    if mode == "old":
+        display.update()
+        return
+    if x < dirty[0]:
+        dirty[0] = max(0, x)
+    if y < dirty[1]:
+        dirty[1] = max(0, y)
+    if x + w > dirty[2]:
+        dirty[2] = min(_FB_W, x + w)
+    if y + h > dirty[3]:
+        dirty[3] = min(_FB_H, y + h)
+
+def flush():
+    x, y, x1, y1 = dirty
+    if x >= x1 or y >= y1:
+        return
+    dirty[:] = [_FB_W, _FB_H, 0, 0]
+    if partial:
+        display.partial_update(x, y, x1 - x, y1 - y)
+    else:
+        display.update()
+
+def display_up(set=True):
+    display.triangle(_OX, _OY - 18, _OX - 10, _OY - 10, _OX + 10, _OY - 10)
+    mark(_OX - 10, _OY - 18, 21, 9)
+
+def display_down(set=True):
+    display.triangle(_OX, _OY + 18, _OX + 10, _OY + 10, _OX - 10, _OY + 10)
+    mark(_OX - 10, _OY + 10, 21, 9)
+
+def display_left(set=True):
+    display.triangle(_OX - 18, _OY, _OX - 10, _OY - 10, _OX - 10, _OY + 10)
+    mark(_OX - 18, _OY - 10, 9, 21)
+
+def display_right(set=True):
+    display.triangle(_OX + 18, _OY, _OX + 10, _OY - 10, _OX + 10, _OY + 10)
+    mark(_OX + 10, _OY - 10, 9, 21)
+
+def display_center(set=True):
+    display.circle(_OX, _OY, 5)
+    mark(_OX - 5, _OY - 5, 11, 11)
+
+def display_dir(odir):
+    # wie display_dir() in RControl.py, ohne "Init"
+    if (odir == "Forward"):
+        display_up(0)
+    if (odir == "Backward"):
+        display_down(0)
+    if (odir == "Left"):
+        display_left(0)
+    if (odir == "Right"):
+        display_right(0)
+    if (odir == "Turn"):
+        display_center(0)
+    if (odir == "dLeft"):
+        display_up(0)
+        display_left(0)
+        display_down(0)
+    if (odir == "dRight"):
+        display_down(0)
+        display_right(0)
+        display_up(0)
+
+_SHOW = {"Forward": (display_up,), "Backward": (display_down,), "Left": (display_left,),
+         "Right": (display_right,), "Turn": (display_center,), "Stop": (),
+         "dLeft": (display_up, display_left), "dRight": (display_up, display_right)}
+
+def change(odir, dir):
+    # ein Richtungswechsel in do_buttons(), danach ein flush()
+    display_dir(odir)
+    for f in _SHOW[dir]:
+        f()
+    flush()
+
+def run():
+    dirs = list(_SHOW)
+    global mode, partial
+    for mode, partial in (("old", False), ("new", False), ("new", True)):
+        display.n = 0
+        display.b = 0
+        k = 0
+        for odir in dirs:
+            for dir in dirs:
+                if dir != odir:
+                    change(odir, dir)
+                    k += 1
+        name = mode + (" partial" if partial else "")
+        print("{:<12} {:.2f} updates/change, {:.0f} SPI Bytes/change".format(name, display.n / k, display.b / k))
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,211 @@
+#/****************************************************************************
+# *  PiMowBot-RC Benchmark: vom Joystick bis zum PiMowBot                    *
+# *  ====================================================                    *
+# *  Misst im Host-Simulator (sim/) gegen bench/standin.py, wie lange es von *
+# *  der Bewegung des Joysticks bis zum Eintreffen des Steuerbefehls dauert: *
+# *   - http: RControl.py, Steuerkreuz -> HTTP-Request                       *
+# *   - ws:   RCjoy.py, analoger Joystick -> WebSocket-Frame                 *
+# *   - ble:  RControlBLE.py, analoger Joystick -> Notify                    *
+# *                                                                          *
+# *  Eingaben kommen aus Spuren (step: Fahren/Stop im Wechsel, sweep: im     *
+# *  Kreis, reversal: schnelles Vor/Zurück). Je Lauf gibt es eine JSON-Zeile *
+# *  mit Latenz (p50/p95/p99), Befehlsrate sowie verlorenen und doppelten    *
+# *  Befehlen und angezeigten Thumbs, optional auch in eine Datei zum        *
+# *  Vergleich zwischen Ständen:                                             *
+# *                                                                          *
+# *     python3 bench/bench_e2e.py [--transport ws] [--trace step]           *
+# *            [--latency 40] [--jitter 30] [--loss 0.02] [--out e2e.jsonl]  *
+# *            [--ble-ci 50] [--ble-fixed] [--decode-ms-kb 10]               *
+# *                                                                          *
+# *  Homepage: http://pimowbot.TGD-Consulting.de                             *
+# *                                                                          *
+# *  (C) 2022 TGD-Consulting , Author: Dirk Weyand                           *
+# ****************************************************************************/
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_ROOT = os.path.dirname(_HERE)
+
+_T0 = 5000       # ms nach dem Einschalten, dann ist die RC sicher bereit
+_GRACE = 1000    # so lange nach Ende eines Abschnitts darf sein Befehl noch kommen
+_MID = 32768     # Joystick in der Mitte
+
+_SCRIPTS = {"http": "RControl.py", "ws": "RCjoy.py", "ble": "RControlBLE.py"}
+
+# Spuren: (Dauer in ms, Richtung) mit F vor, B zurück, L links, R rechts, S Stop
+_TRACES = {
+    "step": [(1500, "F"), (1500, "S"), (1500, "R"), (1500, "S"), (1500, "B"), (1500, "S")],
+    "sweep": [(400, d) for d in "FRBLFRBL"] + [(1500, "S")],
+    "reversal": [(250, d) for d in "FBFBFBFB"] + [(1500, "S")],
+}
+
+# Eingänge je Richtung, ermittelt im Simulator (RCjoy negiert Y, _NY)
+_INPUTS = {
+    "http": {"F": {"P2": 0}, "B": {"P18": 0}, "L": {"P16": 0}, "R": {"P20": 0}, "S": {}},
+    "ws": {"F": {"A27": 0}, "B": {"A27": 65535}, "L": {"A26": 0}, "R": {"A26": 65535}, "S": {}},
+    "ble": {"F": {"A27": 65535}, "B": {"A27": 0}, "L": {"A26": 0}, "R": {"A26": 65535}, "S": {}},
+}
+_RELEASE = {"http": {"P2": 1, "P18": 1, "P16": 1, "P20": 1},
+            "ws": {"A26": _MID, "A27": _MID},
+            "ble": {"A26": _MID, "A27": _MID}}
+
+
+def direction(a):
+    # Winkel in Grad (0 oben, 90 rechts) -> Richtung
+    a = (a + 180) % 360 - 180
+    if -45 <= a <= 45:
+        return "F"
+    if 45 < a < 135:
+        return "R"
+    if -135 < a < -45:
+        return "L"
+    return "B"
+
+
+def label(via, cmd):
+    # empfangener Befehl -> Richtung, None für alles andere (Thumbs, Telemetrie, Mäher)
+    if via == "http":
+        for k, d in (("name=forward", "F"), ("name=back", "B"), ("name=left", "L"),
+                     ("name=right", "R"), ("name=motor&state=OFF", "S")):
+            if k in cmd:
+                return d
+        return None
+    if via == "ws" and isinstance(cmd, list):     # binär: Sequenz, Typ, Kraft, Winkel
+        return "S" if cmd[1] == 0 else (direction(cmd[3]) if cmd[1] == 1 else None)
+    if via == "ble" and isinstance(cmd, list):    # binär: Sequenz, Befehl, Kraft, Winkel, Z
+        return "S" if cmd[1] == 0 else (direction(cmd[3]) if cmd[1] == 1 else None)
+    if via in ("ws", "ble") and isinstance(cmd, str):
+        t = cmd.strip("[]").split()
+        if t == ["0"] and via == "ble":
+            return "S"
+        if len(t) == 2:
+            try:
+                f, a = float(t[0]), float(t[1])
+            except ValueError:
+                return None
+            return "S" if f == 0 else direction(a)
+    return None
+
+
+def pct(v, p):
+    if not v:
+        return None
+    v = sorted(v)
+    return v[min(len(v) - 1, int(round(p / 100 * (len(v) - 1))))]
+
+
+def evaluate(trace, got, t0=_T0):
+    # got: [(ms, Weg, Befehl)] in Empfangsreihenfolge
+    segs = []
+    t = t0
+    for dur, d in trace:
+        segs.append((t, t + dur, d))
+        t += dur
+    cmds = [(ms, label(via, c), json.dumps(c)) for ms, via, c in got if ms >= t0]
+    cmds = [c for c in cmds if c[1]]
+    lat = []
+    dropped = 0
+    i = 0
+    for s, e, d in segs:
+        for k in range(i, len(cmds)):
+            ms, l, _ = cmds[k]
+            if ms > e + _GRACE:
+                break
+            if ms >= s and l == d:
+                lat.append(ms - s)
+                i = k + 1
+                break
+        else:
+            dropped += 1
+    dup = sum(1 for a, b in zip(cmds, cmds[1:]) if a[2] == b[2])
+    n = len([c for c in cmds if c[0] <= t + _GRACE])
+    return {
+        "segments": len(segs),
+        "latency_ms": {"p50": pct(lat, 50), "p95": pct(lat, 95), "p99": pct(lat, 99),
+                       "max": max(lat) if lat else None,
+                       "mean": round(sum(lat) / len(lat), 1) if lat else None},
+        "dropped": dropped,
+        "duplicates": dup,
+        "commands": n,
+        "rate_hz": round(n / ((t - t0 + _GRACE) / 1000), 2),
+    }
+
+
+def run_one(transport, trace, impair, central=None, decode=0):
+    # im Kindprozess: Simulator und Stand-in starten, Spur abspielen, auswerten
+    sys.path.insert(0, _ROOT)
+    from sim import board, run
+    run.install()
+    board.cfg["jpeg_ms_kb"] = decode
+    from bench import standin
+    for k, v in impair.items():
+        setattr(standin.Impair, k, v)
+    got = []
+    standin.PiMowBot.listener = lambda t, via, cmd: got.append((board.ms(), via, cmd))
+    standin.start()
+    if transport == "ble":
+        import bluetooth
+        standin.BLECentral(bluetooth.BLE(), **(central or {}))
+    t = _T0
+    for dur, d in _TRACES[trace]:
+        for name, v in _RELEASE[transport].items():
+            board.at(t, name, v)
+        for name, v in _INPUTS[transport][d].items():
+            board.at(t, name, v)
+        t += dur
+    run.run(_SCRIPTS[transport], seconds=(t + _GRACE + 500) / 1000)
+    r = {"transport": transport, "script": _SCRIPTS[transport], "trace": trace, "impair": impair}
+    r.update(evaluate(_TRACES[trace], got))
+    s = board.report()
+    r["thumbs"] = s["jpeg"]
+    if transport == "ble":
+        r["ble"] = dict(central or {}, ci_ms=s["ble_ci_ms"], mtu=s["ble_mtu"])
+    return r
+
+
+def main():
+    p = argparse.ArgumentParser(description="PiMowBot-RC end-to-end latency benchmark")
+    p.add_argument("--transport", action="append", choices=sorted(_SCRIPTS), help="default: all")
+    p.add_argument("--trace", action="append", choices=sorted(_TRACES), help="default: all")
+    p.add_argument("--latency", type=float, default=0, help="one-way latency in ms")
+    p.add_argument("--jitter", type=float, default=0, help="additional random delay 0..ms")
+    p.add_argument("--loss", type=float, default=0, help="packet loss 0..1")
+    p.add_argument("--kbps", type=float, default=0, help="bandwidth limit in kByte/s")
+    p.add_argument("--ble-ci", type=float, default=0, help="initial BLE connection interval in ms")
+    p.add_argument("--ble-fixed", action="store_true", help="central ignores requested connection parameters")
+    p.add_argument("--decode-ms-kb", type=float, default=0, help="JPEG decode time per KB in ms")
+    p.add_argument("--out", help="append results as JSON lines")
+    p.add_argument("--one", action="store_true", help=argparse.SUPPRESS)
+    args = p.parse_args()
+    impair = {"latency": args.latency, "jitter": args.jitter, "loss": args.loss, "kbps": args.kbps}
+    central = {"ci": args.ble_ci or None, "honour": not args.ble_fixed}
+    if args.one:
+        r = run_one(args.transport[0], args.trace[0], impair, central, args.decode_ms_kb)
+        print("E2E: " + json.dumps(r))
+        return
+    for transport in args.transport or ("http", "ws", "ble"):
+        for trace in args.trace or ("step", "sweep", "reversal"):
+            cmd = [sys.executable, os.path.abspath(__file__), "--one", "--transport", transport,
+                   "--trace", trace, "--latency", str(args.latency), "--jitter", str(args.jitter),
+                   "--loss", str(args.loss), "--kbps", str(args.kbps), "--ble-ci", str(args.ble_ci),
+                   "--decode-ms-kb", str(args.decode_ms_kb)]
+            if args.ble_fixed:
+                cmd.append("--ble-fixed")
+            out = subprocess.run(cmd, capture_output=True, text=True, cwd=_ROOT).stdout
+            lines = [l[5:] for l in out.splitlines() if l.startswith("E2E: ")]
+            if not lines:
+                print(json.dumps({"transport": transport, "trace": trace, "error": out[-300:]}))
+                continue
+            print(lines[-1])
+            if args.out:
+                with open(args.out, "a") as f:
+                    f.write(lines[-1] + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#/****************************************************************************
+# *  PiMowBot-RC Benchmark: Joystick                                         *
+# *  ===============================                                         *
+# *  Vergleicht bei ruhig gehaltenem (oder fest ausgelenktem) Joystick die   *
+# *  Streuung der Werte:                                                     *
+# *   - vorher: ein read_u16() je Achse und Abfrage                          *
+# *   - nachher: Mittelwert aus dem vom Timer gefüllten Ringpuffer, wie in   *
+# *             RCjoy.py und RControlBLE.py                                  *
+# *                                                                          *
+# *  Nur auf dem Pico W mit analogem Joystick an GPIO26/27:                  *
+# *                                                                          *
+# *     import bench_joy                                                     *
+# *                                                                          *
+# *  Homepage: http://pimowbot.TGD-Consulting.de                             *
+# *                                                                          *
+# *  (C) 2022 TGD-Consulting , Author: Dirk Weyand                           *
+# ****************************************************************************/
+
+from micropython import const
+from array import array
+from machine import ADC, Timer
+from math import atan2, degrees
+from time import sleep_ms
+
+_N = const(8)
+ADCS = (ADC(26), ADC(27))
+joy_buf = array('H', bytes(2 * _N * len(ADCS)))
+js = array('i', bytes(4 * len(ADCS)))
+ji = 0
+
+def joy_sample(t):
+    global ji
+    i = ji
+    for c in range(len(ADCS)):
+        k = c * _N + i
+        v = ADCS[c].read_u16()
+        js[c] += v - joy_buf[k]
+        joy_buf[k] = v
+    ji = (i + 1) % _N
+
+def spread(name, xs, ys):
+    n = len(xs)
+    mx = sum(xs) / n
+    my = sum(ys) / n
+    sx = (sum((v - mx) ** 2 for v in xs) / n) ** 0.5
+    sy = (sum((v - my) ** 2 for v in ys) / n) ** 0.5
+    ang = [degrees(atan2(ys[i] - 32768, xs[i] - 32768)) for i in range(n)]
+    jumps = sum(1 for i in range(1, n) if abs(ang[i] - ang[i - 1]) >= 5)
+    print("{:<8} sd x={:.1f} y={:.1f} LSB, angle jumps >=5deg: {} of {}".format(name, sx, sy, jumps, n - 1))
+
+def run(n=200, period_ms=100):
+    for c in range(len(ADCS)):
+        v = ADCS[c].read_u16()
+        for i in range(_N):
+            joy_buf[c * _N + i] = v
+        js[c] = v * _N
+    t = Timer()
+    t.init(freq=200, mode=Timer.PERIODIC, callback=joy_sample)
+    rx, ry, fx, fy = [], [], [], []
+    for i in range(n):
+        rx.append(ADCS[0].read_u16())
+        ry.append(ADCS[1].read_u16())
+        fx.append(js[0] // _N)
+        fy.append(js[1] // _N)
+        sleep_ms(period_ms)
+    t.deinit()
+    spread("single", rx, ry)
+    spread("filtered", fx, fy)
+
+run()
@@ -0,0 +1,158 @@
+#/****************************************************************************
+# *  PiMowBot-RC Benchmark: Joystick-Mathematik                              *
+# *  ==========================================                              *
+# *  Vergleicht get_joy() von RCjoy.py:                                      *
+# *   - vorher: Gleitkomma, degrees(atan2()), sqrt(), round()                *
+# *   - nachher: nur Ganzzahlen, atan-Tabelle mit Interpolation und          *
+# *             ganzzahlige Wurzel (Winkel in 1/10 Grad, Kraft in 1/100)     *
+# *                                                                          *
+# *  Ausgegeben werden Aufrufe pro Sekunde, Heap je Aufruf und die größte    *
+# *  Abweichung zwischen beiden Varianten über ein Raster von ADC-Werten     *
+# *  (nur Kraft >= 0.3, darunter sendet do_joy() keine Richtung). Unter      *
+# *  CPython ist Gleitkomma schnell, aussagekräftig ist nur der Pico W:      *
+# *                                                                          *
+# *     python3 bench/bench_joymath.py [n]                                   *
+# *                                                                          *
+# *  Homepage: http://pimowbot.TGD-Consulting.de                             *
+# *                                                                          *
+# *  (C) 2022 TGD-Consulting , Author: Dirk Weyand                           *
+# ****************************************************************************/
+
+import gc
+import sys
+from array import array
+from math import atan2, degrees, sqrt
+from bench_ka import ticks_us, ticks_diff
+from bench_thumb import mem_alloc
+try:
+    import micropython
+except ImportError:              # CPython
+    class micropython:
+        def native(f):
+            return f
+        viper = native
+
+# Kalibrierung wie die Standardwerte in RCjoy.py
+jc = (32768, 32768)
+jl = (28456, 28456)
+jh = (28456, 28456)
+joy_dz = 0
+
+# --- vorher ---------------------------------------------------------------
+
+def joy_float(raw):
+    val = raw - 32768
+    return val / 28456
+
+def get_joy_float(rx, ry):
+    x = joy_float(rx)
+    y = joy_float(ry) * -1
+    angel = degrees(atan2(y,x))
+    if angel < 0:
+        if angel >= -90:
+            angel = 90 + (angel * -1)
+        else:
+            angel = (angel * -1) - 270
+    else:
+        angel -= 90
+        angel *= -1
+    angel = round(angel, 1)
+    force = round(sqrt((x*x)+(y*y)),2)
+    return angel, force
+
+# --- nachher (wie RCjoy.py) -----------------------------------------------
+
+_ATAN = array('H', (0, 90, 179, 268, 358, 447, 536, 624, 713, 800, 888, 975, 1062, 1148,
+    1234, 1319, 1404, 1488, 1571, 1653, 1735, 1817, 1897, 1977, 2056, 2134, 2211, 2287,
+    2363, 2438, 2511, 2584, 2657, 2728, 2798, 2867, 2936, 3003, 3070, 3136, 3201, 3264,
+    3327, 3390, 3451, 3511, 3571, 3629, 3687, 3744, 3800, 3855, 3909, 3963, 4016, 4067,
+    4119, 4169, 4218, 4267, 4315, 4363, 4409, 4455, 4500, 4500))
+
+@micropython.viper
+def isqrt(n: int) -> int:
+    r = 0
+    b = 1 << 28
+    while b > n:
+        b >>= 2
+    while b:
+        if n >= r + b:
+            n -= r + b
+            r = (r >> 1) + b
+        else:
+            r >>= 1
+        b >>= 2
+    return r
+
+@micropython.native
+def compass(x, y):
+    if x == 0 and y == 0:
+        return 900
+    ax = x if x > 0 else -x
+    ay = y if y > 0 else -y
+    if ax >= ay:
+        r = (ay << 14) // ax
+        i = r >> 8
+        a = _ATAN[i] + (((_ATAN[i + 1] - _ATAN[i]) * (r & 255)) >> 8)
+    else:
+        r = (ax << 14) // ay
+        i = r >> 8
+        a = 9000 - _ATAN[i] - (((_ATAN[i + 1] - _ATAN[i]) * (r & 255)) >> 8)
+    a = (a + 5) // 10
+    if x < 0:
+        a = 1800 - a
+    if y < 0:
+        a = -a
+    a = 900 - a
+    if a > 1800:
+        a -= 3600
+    return a
+
+@micropython.native
+def joy_int(c, raw):
+    val = raw - jc[c]
+    if -joy_dz < val < joy_dz:
+        return 0
+    # auf +-1000 begrenzen, auch wenn die Kalibrierung den Ausschlag zu klein gemessen hat
+    # (isqrt() in get_joy() ist für diesen Bereich ausgelegt)
+    if val > 0:
+        return min(1000, (val * 1000) // jh[c])
+    return -min(1000, (-val * 1000) // jl[c])
+
+@micropython.native
+def get_joy_int(rx, ry):
+    x = joy_int(0, rx)
+    y = -joy_int(1, ry)
+    return compass(x, y), (isqrt((x * x + y * y) * 100) + 50) // 100
+
+# --------------------------------------------------------------------------
+
+def run(n=20000):
+    raws = [(((i * 7919) % 65536), ((i * 104729) % 65536)) for i in range(256)]
+    dang = 0
+    dforce = 0
+    for rx in range(0, 65536, 257):
+        for ry in range(0, 65536, 263):
+            af, ff = get_joy_float(rx, ry)
+            ai, fi = get_joy_int(rx, ry)
+            if ff < 0.3:
+                continue
+            if abs(rx - 32768) > 28456 or abs(ry - 32768) > 28456:
+                continue         # jenseits des Ausschlags begrenzt joy_int() auf +-1000
+            d = abs(ai - round(af * 10))
+            dang = max(dang, min(d, 3600 - d))
+            dforce = max(dforce, abs(fi - round(ff * 100)))
+    print("max. Abweichung: Winkel {:.1f} Grad, Kraft {:.2f}".format(dang / 10, dforce / 100))
+    for name, fn in (("float", get_joy_float), ("int", get_joy_int)):
+        gc.collect()
+        m = mem_alloc()
+        t = ticks_us()
+        for i in range(n):
+            rx, ry = raws[i & 255]
+            fn(rx, ry)
+        dt = ticks_diff(ticks_us(), t)
+        churn = max(0, mem_alloc() - m)
+        print("{:<6} {:.0f} calls/s, heap/call {:.1f} Bytes".format(name, n * 1000000 / dt, churn / n))
+
+if __name__ == "__main__":
+    argv = getattr(sys, "argv", [])
+    run(int(argv[1]) if len(argv) > 1 else 20000)
@@ -0,0 +1,203 @@
+#/****************************************************************************
+# *  PiMowBot-RC Benchmark: Steuerbefehle per HTTP                           *
+# *  =========================================                               *
+# *  Vergleicht die Latenz der Steuerbefehle von RControl.py:                *
+# *   - vorher: urequests.head(), je Befehl eine neue TCP-Verbindung         *
+# *   - nachher: persistente HTTP/1.1 keep-alive Verbindung                  *
+# *                                                                          *
+# *  Unter CPython läuft RControl.py unverändert im Host-Simulator (sim/)    *
+# *  gegen den Stand-in, gemessen wird also HTTPConn aus RControl.py (die    *
+# *  Zeiten aus "Delay-CMD", in ms):                                         *
+# *                                                                          *
+# *     python3 bench/bench_ka.py [--n 60] [--latency 40] [--jitter 30]      *
+# *                                                                          *
+# *  Auf dem Pico W (MicroPython, WLAN vorher verbinden) misst run() gegen   *
+# *  einen Server. Nachher ist dort KeepAlive, die blockierende keep-alive   *
+# *  Verbindung wie ka_request() vor HTTPConn, nicht der ausgelieferte       *
+# *  Client:                                                                 *
+# *                                                                          *
+# *     import bench_ka; bench_ka.run(host, port, n)                         *
+# *                                                                          *
+# *  Homepage: http://pimowbot.TGD-Consulting.de                             *
+# *                                                                          *
+# *  (C) 2022 TGD-Consulting , Author: Dirk Weyand                           *
+# ****************************************************************************/
+
+import socket
+import sys
+try:
+    from time import ticks_us, ticks_diff
+except ImportError:              # CPython
+    from time import perf_counter_ns
+    def ticks_us():
+        return perf_counter_ns() // 1000
+    def ticks_diff(a, b):
+        return a - b
+try:
+    import urequests as r
+except ImportError:
+    r = None
+
+_TOKEN = "12345"
+_CMDS = ("name=forward&state=ON", "name=left&state=ON", "name=motor&state=OFF",
+         "name=right&state=ON", "name=back&state=ON", "name=motor&state=OFF")
+
+def oneshot(host, port, path):
+    # wie urequests.head(): neue Verbindung, HTTP/1.0, danach schließen
+    if r:
+        resp = r.head("http://" + host + ":" + str(port) + path)
+        rc = resp.status_code
+        resp.close()
+        return rc
+    s = socket.socket()
+    s.connect(socket.getaddrinfo(host, port)[0][-1])
+    f = s.makefile("rwb", 0)
+    f.write(b"HEAD " + path.encode() + b" HTTP/1.0\r\nHost: " + host.encode() + b"\r\n\r\n")
+    rc = int(f.readline().split(None, 2)[1])
+    while f.readline() not in (b"", b"\r\n"):
+        pass
+    s.close()
+    return rc
+
+class KeepAlive:
+    # blockierende keep-alive Verbindung wie ka_request(), das RControl.py vor HTTPConn
+    # nutzte; Vergleichsstand für bench_async.py und für Läufe auf dem Pico W
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.ka = None
+        self.reconnects = 0
+        self.bn = 0
+
+    def close(self):
+        if self.ka:
+            self.ka[0].close()
+        self.ka = None
+
+    def open(self):
+        self.close()
+        s = socket.socket()
+        s.settimeout(2)
+        s.connect(socket.getaddrinfo(self.host, self.port)[0][-1])
+        self.ka = (s, s.makefile("rwb", 0))
+        self.reconnects += 1
+
+    def request(self, path, type="HEAD", buf=None):
+        # wie ka_request(), Body-Länge in self.bn
+        self.bn = 0
+        for retry in (0, 1):
+            fresh = not self.ka
+            try:
+                if fresh:
+                    self.open()
+                f = self.ka[1]
+                f.write(type.encode() + b" " + path.encode() + b" HTTP/1.1\r\nHost: " + self.host.encode() + b"\r\n\r\n")
+                l = f.readline()
+                if not l:
+                    raise OSError("closed")
+                rc = int(l.split(None, 2)[1])
+                cl = -1
+                close = l.startswith(b"HTTP/1.0")
+                while True:
+                    l = f.readline()
+                    if not l or l == b"\r\n":
+                        break
+                    h = l.lower()
+                    if h.startswith(b"content-length:"):
+                        cl = int(h[15:])
+                    elif h.startswith(b"connection:") and b"close" in h:
+                        close = True
+                if type != "HEAD":
+                    if cl < 0:
+                        close = True
+                    mv = memoryview(buf) if buf else None
+                    n = 0
+                    while cl < 0 or n < cl:
+                        if mv and n < len(mv):
+                            k = f.readinto(mv[n:len(mv) if cl < 0 else min(cl, len(mv))])
+                        else:
+                            k = len(f.read(256 if cl < 0 else min(cl - n, 256)) or b"")
+                        if not k:
+                            if cl < 0:
+                                break
+                            raise OSError("closed")
+                        n += k
+                    if mv and n <= len(mv):
+                        self.bn = n
+                if close:
+                    self.close()
+                return rc
+            except Exception:
+                self.close()
+                if fresh:
+                    break
+        return False
+
+    def head(self, path):
+        return self.request(path)
+
+def stats(name, t):
+    t = sorted(t)
+    n = len(t)
+    print("{:<10} n={} min={:.2f}ms p50={:.2f}ms p95={:.2f}ms max={:.2f}ms mean={:.2f}ms".format(
+        name, n, t[0] / 1000, t[n // 2] / 1000, t[min(n - 1, (n * 95) // 100)] / 1000,
+        t[-1] / 1000, sum(t) / n / 1000))
+
+def sim(n=60, **impair):
+    # RControl.py im Host-Simulator: Steuerkreuz abwechselnd vor und los, jeder Wechsel
+    # ist ein Steuerbefehl über HTTPConn; danach je Befehl eine neue Verbindung zum
+    # selben Stand-in mit denselben Störungen
+    import contextlib
+    import io
+    import os
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from sim import board, run as sim_run
+    sim_run.install()
+    from bench import standin
+    for k, v in impair.items():
+        setattr(standin.Impair, k, v)
+    standin.start()
+    t = 5000                      # dann ist die RC sicher bereit
+    for i in range(n):
+        board.at(t, "P2", i % 2)  # 0 = gedrückt: vor, 1 = los: Stop
+        t += 300                  # do_buttons() fragt alle 250ms ab
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        sim_run.run("RControl.py", seconds=(t + 1000) / 1000)
+    after = [int(l[11:].split("ms")[0]) * 1000 for l in out.getvalue().splitlines()
+             if l.startswith("Delay-CMD: ")][-n:]
+    before = []
+    for i in range(n):
+        path = "/cgi-bin/control.html?Token=" + _TOKEN + "&" + _CMDS[i % len(_CMDS)]
+        t = ticks_us()
+        oneshot("127.0.0.1", 8080, path)
+        before.append(ticks_diff(ticks_us(), t))
+    stats("one-shot", before)
+    stats("HTTPConn", after)
+
+def run(host="127.0.0.1", port=8080, n=200):
+    before = []
+    after = []
+    ka = KeepAlive(host, port)
+    for i in range(n):
+        path = "/cgi-bin/control.html?Token=" + _TOKEN + "&" + _CMDS[i % len(_CMDS)]
+        t = ticks_us()
+        oneshot(host, port, path)
+        before.append(ticks_diff(ticks_us(), t))
+        t = ticks_us()
+        ka.head(path)
+        after.append(ticks_diff(ticks_us(), t))
+    ka.close()
+    stats("one-shot", before)
+    stats("keep-alive", after)
+    print("keep-alive connects: {}".format(ka.reconnects))
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser(description="PiMowBot-RC keep-alive benchmark (host simulator)")
+    p.add_argument("--n", type=int, default=60, help="control commands per variant")
+    p.add_argument("--latency", type=float, default=0, help="one-way latency in ms")
+    p.add_argument("--jitter", type=float, default=0, help="additional random delay 0..ms")
+    p.add_argument("--loss", type=float, default=0, help="packet loss 0..1")
+    args = p.parse_args()
+    sim(args.n, latency=args.latency, jitter=args.jitter, loss=args.loss)
@@ -0,0 +1,127 @@
+#/****************************************************************************
+# *  PiMowBot-RC Benchmark: log() auf den Flash                              *
+# *  ==========================================                              *
+# *  Vergleicht log() von RCjoy.py und RControlBLE.py mit _LOG = True:       *
+# *   - vorher: je Meldung stat(), open(), Zeit formatieren, write() und     *
+# *             close(), ab 42k wird myLog.txt überschrieben                 *
+# *   - nachher: Meldung mit Zeitstempel im RAM-Ringpuffer, geschrieben wird *
+# *             in Blöcken von log_flush(), Wechsel auf myLog_.txt           *
+# *  sowie eine abgeschaltete DEBUG-Meldung im heißen Pfad.                  *
+# *                                                                          *
+# *  Läuft auf dem Pico W (schreibt auf den Flash!) und unter CPython im     *
+# *  aktuellen Verzeichnis:                                                  *
+# *                                                                          *
+# *     python3 bench/bench_log.py [n]                                       *
+# *                                                                          *
+# *  Homepage: http://pimowbot.TGD-Consulting.de                             *
+# *                                                                          *
+# *  (C) 2022 TGD-Consulting , Author: Dirk Weyand                           *
+# ****************************************************************************/
+
+import sys
+from array import array
+from os import stat, rename, remove
+from time import localtime, time
+from bench_ka import ticks_us, ticks_diff
+
+_L_DEBUG = 0
+_L_INFO = 1
+_LOG_LVL = 1
+_LOG_N = 64
+_LOG_HI = 48
+_LOG_MAX = 43008
+
+def shour(ts):
+    return '{:0>2}'.format(ts[3])+":"+'{:0>2}'.format(ts[4])+":"+'{:0>2}'.format(ts[5])
+
+def sdate(ts):
+    return '{:0>2}'.format(ts[2])+"."+'{:0>2}'.format(ts[1])+"."+str(ts[0])
+
+def exists(file):
+    try:
+        stat(file)
+        return True
+    except OSError:
+        return False
+
+def log_old(msg):
+    if exists("myLog.txt") and 43008 > stat("myLog.txt")[6]:
+        lfile=open("myLog.txt","a")
+    else:
+        lfile=open("myLog.txt","w")    # overwrite if log > 42k
+    lfile.write(sdate(localtime())+" "+shour(localtime())+' '+ str(msg) +'\n')
+    lfile.close()
+
+lm = [None] * _LOG_N
+lts = array('i', bytes(4 * _LOG_N))
+li = 0
+ln = 0
+lsz = -1
+
+def log(msg, lvl=_L_INFO):
+    # wie log() in RCjoy.py mit _LOG = True
+    global li, ln
+    if lvl < _LOG_LVL:
+        return
+    lm[li] = msg
+    lts[li] = int(time())
+    li = (li + 1) % _LOG_N
+    if ln < _LOG_N:
+        ln += 1
+    if ln >= _LOG_HI:
+        log_flush()
+
+def log_flush():
+    global ln, lsz
+    n = ln
+    if not n:
+        return
+    ln = 0
+    i = (li - n) % _LOG_N
+    if lsz < 0:
+        lsz = stat("myLog.txt")[6] if exists("myLog.txt") else 0
+    lfile = open("myLog.txt", "a")
+    for k in range(n):
+        ts = localtime(lts[i])
+        l = sdate(ts) + " " + shour(ts) + ' ' + str(lm[i]) + '\n'
+        lm[i] = None
+        i = (i + 1) % _LOG_N
+        if lsz + len(l) > _LOG_MAX:
+            lfile.close()
+            try:
+                remove("myLog_.txt")
+            except OSError:
+                pass
+            rename("myLog.txt", "myLog_.txt")
+            lfile = open("myLog.txt", "w")
+            lsz = 0
+        lfile.write(l)
+        lsz += len(l)
+    lfile.close()
+
+def run(n=2000):
+    for f in ("myLog.txt", "myLog_.txt"):
+        try:
+            remove(f)
+        except OSError:
+            pass
+    msg = "String mit 12 Zeichen empfangen (123456)"
+    for name in ("old", "new", "debug-off"):
+        t = ticks_us()
+        for i in range(n):
+            if name == "old":
+                log_old(msg)
+            elif name == "new":
+                log(msg)
+            elif _LOG_LVL <= _L_DEBUG:
+                log(msg + str(i), _L_DEBUG)
+        if name == "new":
+            log_flush()
+        dt = ticks_diff(ticks_us(), t)
+        print("{:<10} {:.2f} us/call".format(name, dt / n))
+    print("myLog.txt {} Bytes, myLog_.txt {} Bytes".format(
+        stat("myLog.txt")[6], stat("myLog_.txt")[6] if exists("myLog_.txt") else 0))
+
+if __name__ == "__main__":
+    argv = getattr(sys, "argv", [])
+    run(int(argv[1]) if len(argv) > 1 else 2000)
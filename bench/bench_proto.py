@@ -0,0 +1,67 @@
+#/****************************************************************************
+# *  PiMowBot-RC Benchmark: Steuer-Frames Text gegen Binär                   *
+# *  =====================================================                   *
+# *  Vergleicht in RCjoy.py je Steuerbefehl Erzeugung, Framegröße und        *
+# *  Quittung:                                                               *
+# *   - Text: "[0.87 135.4]" per str() zusammensetzen, Quittung per          *
+# *           Stringvergleich                                                *
+# *   - Binär: pack_into() in den festen Puffer cb, Quittung per Vergleich   *
+# *           der Sequenznummer                                              *
+# *                                                                          *
+# *  Läuft auf dem Pico W und unter CPython:                                 *
+# *                                                                          *
+# *     python3 bench/bench_proto.py [n]                                     *
+# *                                                                          *
+# *  Homepage: http://pimowbot.TGD-Consulting.de                             *
+# *                                                                          *
+# *  (C) 2022 TGD-Consulting , Author: Dirk Weyand                           *
+# ****************************************************************************/
+
+import gc
+import struct
+import sys
+from bench_ka import ticks_us, ticks_diff
+from bench_thumb import mem_alloc
+
+cb = bytearray(5)
+seq = 0
+
+def pack_ctl(t, f, w):
+    # wie pack_ctl() in RCjoy.py
+    global seq
+    seq = seq % 255 + 1
+    struct.pack_into('<BBBh', cb, 0, seq, t, min(255, int(round(f * 100))), int(round(w * 10)))
+
+def run(n=2000):
+    forces = [round(0.31 + (i % 70) / 100, 2) for i in range(64)]
+    angles = [round(-180 + (i * 37) % 360 + 0.4, 1) for i in range(64)]
+    for name in ("text", "binary"):
+        gc.collect()
+        m = mem_alloc()
+        size = 0
+        acked = 0
+        t = ticks_us()
+        for i in range(n):
+            force = forces[i & 63]
+            angel = angles[i & 63]
+            if name == "text":
+                msg = "[" + str(force) + " " + str(angel) + "]"
+                frame = msg.encode()
+                size += len(frame)
+                na = msg
+                if na == frame.decode():     # Echo des Servers
+                    acked += 1
+            else:
+                pack_ctl(1, force, angel)
+                size += len(cb)
+                na = cb[0]
+                if cb[0] == na:              # Echo des Servers
+                    acked += 1
+        dt = ticks_diff(ticks_us(), t)
+        churn = mem_alloc() - m
+        print("{:<7} {:.2f} us/cmd, payload {:.1f} Bytes/cmd, heap {} Bytes/cmd, acks {}".format(
+            name, dt / n, size / n, max(0, churn) // n if hasattr(gc, "mem_alloc") else "n/a", acked))
+
+if __name__ == "__main__":
+    argv = getattr(sys, "argv", [])
+    run(int(argv[1]) if len(argv) > 1 else 2000)
@@ -0,0 +1,151 @@
+#/****************************************************************************
+# *  PiMowBot-RC Benchmark: Texte auf dem GC9A01                             *
+# *  =======================================                                 *
+# *  Vergleicht display_text()/display_alert() von RCjoy.py und              *
+# *  RControlBLE.py:                                                         *
+# *   - vorher: fill_rect() der ganzen Zeile und text() bei jedem Aufruf     *
+# *   - nachher: Text einmal als RGB565 gerendert, blit_buffer() nur wenn    *
+# *             sich der Text geändert hat; wechselnde Texte (Uhr) per       *
+# *             text(), nur wenn sie sich geändert haben                     *
+# *                                                                          *
+# *  Abgespielt wird eine typische Folge (blinkender Alarm, Uhrzeit,         *
+# *  gleichbleibende Texte). Ausgegeben werden Zeit und übertragene Pixel je *
+# *  Aufruf. Mit GC9A01 auf dem Pico W wird wirklich gezeichnet, sonst       *
+# *  zählt ein Ersatz-Display nur die Pixel:                                 *
+# *                                                                          *
+# *     python3 bench/bench_sprite.py [n]                                    *
+# *                                                                          *
+# *  Homepage: http://pimowbot.TGD-Consulting.de                             *
+# *                                                                          *
+# *  (C) 2022 TGD-Consulting , Author: Dirk Weyand                           *
+# ****************************************************************************/
+
+import sys
+from bench_ka import ticks_us, ticks_diff
+
+px = [0]         # übertragene Pixel
+
+class CountingDisplay:
+    def fill_rect(self, x, y, w, h, c):
+        px[0] += w * h
+
+    def text(self, font, text, x, y, fg, bg):
+        px[0] += min(len(text) * font.WIDTH, 240 - x) * font.HEIGHT
+
+    def blit_buffer(self, buf, x, y, w, h):
+        px[0] += w * h
+
+try:
+    import gc9a01
+    import vga1_8x16 as font
+    from machine import Pin, SPI
+    display = gc9a01.GC9A01(SPI(1, baudrate=60000000, sck=Pin(14), mosi=Pin(15)), 240, 240,
+                            reset=Pin(11, Pin.OUT), cs=Pin(13, Pin.OUT), dc=Pin(12, Pin.OUT),
+                            backlight=Pin(10, Pin.OUT), rotation=2)
+    display.init()
+    real = True
+except ImportError:              # ohne Display: Zähl-Display und leerer 8x16 Font
+    class font:
+        WIDTH = 8
+        HEIGHT = 16
+        FIRST = 0
+        FONT = bytes(256 * 16)
+    display = CountingDisplay()
+    real = False
+
+_SC_MAX = 16384
+sc = {}
+scb = 0
+rows = {}
+
+def sprite(font, text, fg, bg, wmax=240):
+    # wie sprite() in RCjoy.py
+    global scb
+    k = (text, fg, bg)
+    s = sc.get(k)
+    if s:
+        return s
+    fw = font.WIDTH
+    fh = font.HEIGHT
+    bpr = (fw + 7) // 8
+    n = min(len(text), wmax // fw)
+    w = n * fw
+    buf = bytearray(w * fh * 2)
+    f0 = fg >> 8
+    f1 = fg & 255
+    b0 = bg >> 8
+    b1 = bg & 255
+    bits = font.FONT
+    for i in range(n):
+        g = (ord(text[i]) - font.FIRST) * fh * bpr
+        for y in range(fh):
+            p = (y * w + i * fw) * 2
+            for x in range(fw):
+                if bits[g + y * bpr + (x >> 3)] & (0x80 >> (x & 7)):
+                    buf[p] = f0
+                    buf[p + 1] = f1
+                else:
+                    buf[p] = b0
+                    buf[p + 1] = b1
+                p += 2
+    if scb + len(buf) > _SC_MAX:
+        sc.clear()
+        scb = 0
+    s = (buf, w, fh)
+    sc[k] = s
+    scb += len(buf)
+    return s
+
+def draw_text(font, text, x, y, w, h, fg, bg, cache=True):
+    # wie draw_text() in RCjoy.py
+    k = (text, fg, bg)
+    o = rows.get((x, y))
+    if o and o[0] == k:
+        return
+    if cache:
+        buf, sw, sh = sprite(font, text, fg, bg, w)
+    else:
+        text = text[:w // font.WIDTH]
+        sw = len(text) * font.WIDTH
+    if o is None:
+        display.fill_rect(x, y, w, h, bg)
+    elif o[1] > sw:
+        display.fill_rect(x + sw, y, o[1] - sw, h, bg)
+    if sw:
+        if cache:
+            display.blit_buffer(buf, x, y, sw, sh)
+        else:
+            display.text(font, text, x, y, fg, bg)
+    rows[(x, y)] = (k, sw)
+
+def old_text(text, fg, bg, cache):
+    display.fill_rect(2, 155, 236, 20, bg)
+    display.text(font, text, 2, 155, fg, bg)
+
+def new_text(text, fg, bg, cache):
+    draw_text(font, text, 2, 155, 236, 20, fg, bg, cache)
+
+def run(n=200):
+    GREY = 0x8410
+    RED = 0xfc10
+    BACK = 0x5efe
+    seq = []
+    for i in range(n):
+        if i % 4 < 2:            # blinkender Alarm aus do_img()
+            seq.append((" >> PiMowBot returned 503! << ", GREY if i % 2 else RED, True))
+        elif i % 4 == 2:         # gleichbleibender Text
+            seq.append((" ||||||||||||||||||||||||||||| ", GREY, True))
+        else:                    # wechselnder Text, wie die Uhr nicht aus dem Cache
+            seq.append(("    my IP: 192.168.1." + str(i % 50), GREY, False))
+    for name, fn in (("old", old_text), ("new", new_text)):
+        px[0] = 0
+        t = ticks_us()
+        for text, fg, cache in seq:
+            fn(text, fg, BACK, cache)
+        dt = ticks_diff(ticks_us(), t)
+        print("{:<4} {:.2f} ms/call, {} pixel/call{}".format(
+            name, dt / n / 1000, px[0] // n if not real else "n/a", "" if not real else " (GC9A01)"))
+
+if __name__ == "__main__":
+    argv = getattr(sys, "argv", [])
+    run(int(argv[1]) if len(argv) > 1 else 200)
@@ -0,0 +1,112 @@
+#/****************************************************************************
+# *  PiMowBot-RC Benchmark: Thumbnail-Pipeline                               *
+# *  =========================================                               *
+# *  Vergleicht refresh_display() von RControl.py:                           *
+# *   - vorher: urequests.get() -> response.content -> image.jpg auf dem     *
+# *             Flash -> neuer jpegdec.JPEG -> open_file() -> decode()       *
+# *   - nachher: keep-alive GET direkt in einen wiederverwendeten Puffer ->  *
+# *             ein langlebiger Decoder -> open_RAM() -> decode()            *
+# *                                                                          *
+# *  Gemessen werden Zeit und Heap-Verbrauch je Bild. Der Decode-Teil läuft  *
+# *  nur auf dem Pico W mit Pimoroni-Firmware und Waveshare Display, die     *
+# *  Übertragung auch unter CPython gegen bench/standin.py:                  *
+# *                                                                          *
+# *     python3 bench/standin.py &                                           *
+# *     python3 bench/bench_thumb.py [host] [port] [n]                       *
+# *                                                                          *
+# *  Homepage: http://pimowbot.TGD-Consulting.de                             *
+# *                                                                          *
+# *  (C) 2022 TGD-Consulting , Author: Dirk Weyand                           *
+# ****************************************************************************/
+
+import gc
+import sys
+from bench_ka import KeepAlive, stats, ticks_us, ticks_diff, r, socket, _TOKEN
+try:
+    mem_alloc = gc.mem_alloc
+except AttributeError:           # CPython
+    import tracemalloc
+    tracemalloc.start()
+    def mem_alloc():
+        return tracemalloc.get_traced_memory()[0]
+
+_IMG_MAX = 20480
+
+def get_content(host, port, path):
+    # wie urequests.get().content: neue Verbindung, Body als neues bytes-Objekt
+    if r:
+        resp = r.get("http://" + host + ":" + str(port) + path)
+        data = resp.content
+        resp.close()
+        return data
+    s = socket.socket()
+    s.connect(socket.getaddrinfo(host, port)[0][-1])
+    f = s.makefile("rwb", 0)
+    f.write(b"GET " + path.encode() + b" HTTP/1.0\r\nHost: " + host.encode() + b"\r\n\r\n")
+    f.readline()
+    cl = 0
+    while True:
+        l = f.readline()
+        if l in (b"", b"\r\n"):
+            break
+        if l.lower().startswith(b"content-length:"):
+            cl = int(l[15:])
+    data = b""
+    while len(data) < cl:
+        data += f.read(cl - len(data))
+    s.close()
+    return data
+
+def run(host="127.0.0.1", port=8080, n=50):
+    path = "/cgi-bin/xcom.html?Token=" + _TOKEN + "&Thumb=image.jpg"
+    try:
+        import jpegdec
+        from pimoroni_bus import SPIBus
+        from picographics import PicoGraphics, DISPLAY_PICO_DISPLAY, PEN_RGB565
+        display = PicoGraphics(display=DISPLAY_PICO_DISPLAY, bus=SPIBus(cs=9, dc=8, sck=10, mosi=11, bl=13),
+                               pen_type=PEN_RGB565, rotate=0)
+    except ImportError:
+        jpegdec = None
+        print("jpegdec/picographics nicht vorhanden, nur Übertragung wird gemessen")
+    img = bytearray(_IMG_MAX)
+    ka = KeepAlive(host, port)
+    jd = jpegdec.JPEG(display) if jpegdec else None
+    t_old, t_new, m_old, m_new, writes = [], [], [], [], 0
+    for i in range(n):
+        gc.collect()
+        m = mem_alloc()
+        t = ticks_us()
+        data = get_content(host, port, path)
+        if jpegdec:
+            File = open("image.jpg", "wb")
+            File.write(data)
+            File.close()
+            writes += 1
+            j = jpegdec.JPEG(display)
+            j.open_file("image.jpg")
+            j.decode(143, 33, jpegdec.JPEG_SCALE_FULL)
+            display.update()
+        t_old.append(ticks_diff(ticks_us(), t))
+        m_old.append(mem_alloc() - m)
+        data = j = None
+        gc.collect()
+        m = mem_alloc()
+        t = ticks_us()
+        ka.request(path, "GET", img)
+        if jd:
+            jd.open_RAM(memoryview(img)[:ka.bn])
+            jd.decode(143, 33, jpegdec.JPEG_SCALE_FULL)
+            display.update()
+        t_new.append(ticks_diff(ticks_us(), t))
+        m_new.append(mem_alloc() - m)
+    ka.close()
+    stats("flash", t_old)
+    stats("ram", t_new)
+    print("heap/frame flash: {} Bytes, ram: {} Bytes, flash writes: {} -> 0, thumb {} Bytes".format(
+        sum(m_old) // n, sum(m_new) // n, writes, ka.bn))
+
+if __name__ == "__main__":
+    argv = getattr(sys, "argv", [])
+    run(argv[1] if len(argv) > 1 else "127.0.0.1",
+        int(argv[2]) if len(argv) > 2 else 8080,
+        int(argv[3]) if len(argv) > 3 else 50)
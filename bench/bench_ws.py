@@ -0,0 +1,123 @@
+#/****************************************************************************
+# *  PiMowBot-RC Benchmark: Thumbs per WebSocket                             *
+# *  ===========================================                             *
+# *  Vergleicht den Empfang der Binär-Frames in conn_ws() von RCjoy.py:      *
+# *   - vorher: Frame-Payload als neues bytes-Objekt (a_read), image.jpg     *
+# *             auf den Flash schreiben, display.jpg() liest die Datei       *
+# *   - nachher: readinto() in einen wiederverwendeten Puffer, display.jpg() *
+# *             dekodiert direkt aus dem Puffer                              *
+# *                                                                          *
+# *  Ausgegeben werden Bilder pro Sekunde und Heap-Verbrauch je Bild. Ohne   *
+# *  GC9A01 Display (z.B. unter CPython) wird statt display.jpg() die Datei  *
+# *  nur zurückgelesen:                                                      *
+# *                                                                          *
+# *     python3 bench/standin.py &                                           *
+# *     python3 bench/bench_ws.py [host] [port] [n]                          *
+# *                                                                          *
+# *  Homepage: http://pimowbot.TGD-Consulting.de                             *
+# *                                                                          *
+# *  (C) 2022 TGD-Consulting , Author: Dirk Weyand                           *
+# ****************************************************************************/
+
+import gc
+import struct
+import sys
+from bench_ka import ticks_us, ticks_diff, socket, _TOKEN
+from bench_thumb import mem_alloc, _IMG_MAX
+
+def connect(host, port):
+    s = socket.socket()
+    s.connect(socket.getaddrinfo(host, port)[0][-1])
+    f = s.makefile("rwb", 0)
+    f.write(b"GET /cgi-bin/control.html?token=" + _TOKEN.encode() + b"&thumb=mode2 HTTP/1.1\r\n"
+            b"Host: " + host.encode() + b"\r\nConnection: Upgrade\r\nUpgrade: websocket\r\n"
+            b"Sec-WebSocket-Key: ZGVyUGlNb3dCb3QtUkMhIQ==\r\nSec-WebSocket-Version: 13\r\n\r\n")
+    while f.readline() not in (b"", b"\r\n"):
+        pass
+    return s, f
+
+def send(f, msg):
+    # maskierter Text-Frame (Client -> Server)
+    data = msg.encode()
+    f.write(struct.pack("!BB", 0x81, 0x80 | len(data)) + b"\0\0\0\0" + data)
+
+def header(f):
+    byte1, byte2 = struct.unpack("!BB", f.read(2))
+    length = byte2 & 0x7f
+    if length == 126:
+        length, = struct.unpack("!H", f.read(2))
+    elif length == 127:
+        length, = struct.unpack("!Q", f.read(8))
+    return byte1 & 0x0f, length
+
+def recv_old(f):
+    # wie AsyncWebsocketClient.a_read(): Chunks sammeln und zusammenfügen
+    op, size = header(f)
+    chunks = []
+    while size:
+        b = f.read(size)
+        if not b:
+            break
+        chunks.append(b)
+        size -= len(b)
+    return b"".join(chunks)
+
+def recv_new(f, mv):
+    # wie WSClient.a_readinto(): direkt in den Puffer
+    op, size = header(f)
+    n = 0
+    while n < size:
+        k = f.readinto(mv[n:size])
+        if not k:
+            break
+        n += k
+    return mv[:n]
+
+def run(host="127.0.0.1", port=8008, n=100):
+    try:
+        import gc9a01
+        from machine import Pin, SPI
+        display = gc9a01.GC9A01(SPI(1, baudrate=60000000, sck=Pin(14), mosi=Pin(15)), 240, 240,
+                                reset=Pin(11, Pin.OUT), cs=Pin(13, Pin.OUT), dc=Pin(12, Pin.OUT),
+                                backlight=Pin(10, Pin.OUT), rotation=2)
+        display.init()
+    except ImportError:
+        display = None
+        print("gc9a01 nicht vorhanden, Datei wird statt display.jpg() zurückgelesen")
+    s, f = connect(host, port)
+    mv = memoryview(bytearray(_IMG_MAX))
+    for name in ("old", "new"):
+        gc.collect()
+        churn = 0
+        t = ticks_us()
+        for i in range(n):
+            m = mem_alloc()
+            send(f, "0")
+            if name == "old":
+                data = recv_old(f)
+                File = open("image.jpg", "wb")
+                File.write(data)
+                File.close()
+                if display:
+                    display.jpg("image.jpg", 0, 0, gc9a01.SLOW)
+                else:
+                    File = open("image.jpg", "rb")
+                    File.read()
+                    File.close()
+            else:
+                data = recv_new(f, mv)
+                if display:
+                    display.jpg(data, 0, 0, gc9a01.SLOW)
+            churn += max(0, mem_alloc() - m)
+            data = None
+            gc.collect()
+        dt = ticks_diff(ticks_us(), t)
+        print("{:<4} {:.1f} fps, {:.2f} ms/frame, heap/frame {} Bytes".format(
+            name, n * 1000000 / dt, dt / n / 1000, churn // n))
+    s.close()
+
+if __name__ == "__main__":
+    argv = getattr(sys, "argv", [])
+    run(argv[1] if len(argv) > 1 else "127.0.0.1",
+        int(argv[2]) if len(argv) > 2 else 8008,
+        int(argv[3]) if len(argv) > 3 else 100)
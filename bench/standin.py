@@ -0,0 +1,425 @@
+#/****************************************************************************
+# *  PiMowBot-RC Stand-in                                                    *
+# *  ====================                                                    *
+# *  Kleiner lokaler Ersatz für das Webserver Modul des PiMowBots, damit     *
+# *  die RC ohne PiMowBot gemessen werden kann. Läuft unter CPython 3 auf    *
+# *  dem PC im selben WLAN wie der Pico W:                                   *
+# *                                                                          *
+# *     python3 bench/standin.py [--port 8080] [--thumb Logo.jpg]            *
+# *            [--latency 40] [--jitter 30] [--loss 0.02] [--kbps 40]        *
+# *            [--record cmds.jsonl]                                         *
+# *                                                                          *
+# *  Unterstützt HTTP/1.1 keep-alive sowie HTTP/1.0 (urequests) und das      *
+# *  WebSocket-Server Modul auf Port 8008 (RCjoy.py). Für RControlBLE.py     *
+# *  gibt es mit BLECentral eine Central im Host-Simulator (sim/).           *
+# *  Latenz, Jitter, Paketverlust und Bandbreite simulieren schwaches WLAN   *
+# *  im Garten, jeder empfangene Befehl wird mit Zeitstempel aufgezeichnet.  *
+# *                                                                          *
+# *  Homepage: http://pimowbot.TGD-Consulting.de                             *
+# *                                                                          *
+# *  (C) 2022 TGD-Consulting , Author: Dirk Weyand                           *
+# ****************************************************************************/
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import struct
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import StreamRequestHandler, ThreadingTCPServer
+from urllib.parse import urlsplit, parse_qs
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class Impair:
+    # Störungen je Richtung: Latenz und Jitter in ms, Verlust je Paket (0..1),
+    # Bandbreite in kByte/s (0 = unbegrenzt). Ein verlorenes Paket kostet bei TCP
+    # eine Wiederholung nach rto ms (verdoppelt je Versuch), bei Bluetooth das
+    # nächste Verbindungsintervall (ci ms).
+    latency = 0
+    jitter = 0
+    loss = 0.0
+    kbps = 0
+    rto = 200
+    ci = 30
+    rnd = random.Random(1)           # reproduzierbar
+
+    @classmethod
+    def delay(cls, n=0, ble=False, ci=None):
+        # Sekunden für n Bytes in eine Richtung
+        ms = cls.latency + cls.rnd.uniform(0, cls.jitter)
+        wait = (ci or cls.ci) if ble else cls.rto
+        for i in range(max(1, (n + 1459) // 1460)):    # je Segment
+            while cls.loss and cls.rnd.random() < cls.loss:
+                ms += wait
+                if not ble:
+                    wait *= 2
+        if cls.kbps:
+            ms += n / (cls.kbps * 1024) * 1000
+        return ms / 1000
+
+    @classmethod
+    def wait(cls, n=0, ble=False):
+        d = cls.delay(n, ble)
+        if d:
+            time.sleep(d)
+
+
+def record(via, cmd):
+    # empfangenen Befehl mit Zeitstempel aufzeichnen (http, ws, ble)
+    t = time.time()
+    with PiMowBot.lock:
+        PiMowBot.commands.append((t, via, cmd))
+        if PiMowBot.listener:
+            PiMowBot.listener(t, via, cmd)
+        if PiMowBot.record:
+            PiMowBot.record.write(json.dumps({"t": t, "via": via, "cmd": cmd}) + "\n")
+            PiMowBot.record.flush()
+
+
+class PiMowBot(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"    # keep-alive, sofern der Client es will
+    disable_nagle_algorithm = True   # Header und Body nicht künstlich verzögern
+    thumb = b""                      # Thumbnail, das per xcom.html geliefert wird
+    large = False                    # Large thumb mode
+    commands = []                    # empfangene Befehle (Zeitstempel, Weg, Befehl)
+    listener = None                  # Aufruf je Befehl mit (Zeitstempel, Weg, Befehl)
+    record = None                    # Datei für die Aufzeichnung als JSON-Zeilen
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, body=b"", ctype="text/html", head=False):
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Date", formatdate(usegmt=True))
+        self.end_headers()
+        if not head:
+            self.send_body(body)
+
+    def send_body(self, body):
+        if not Impair.kbps:
+            self.wfile.write(body)
+            return
+        for i in range(0, len(body), 1460):     # segmentweise, wie über WLAN
+            chunk = body[i:i + 1460]
+            time.sleep(len(chunk) / (Impair.kbps * 1024))
+            self.wfile.write(chunk)
+
+    def end_headers(self):
+        Impair.wait()                # Antwort auf dem Weg zur RC
+        super().end_headers()
+
+    def _handle(self, head):
+        Impair.wait(len(self.requestline))    # Request auf dem Weg zum PiMowBot
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/cgi-bin/control.html":
+            record("http", url.query)
+            self._reply(head=head)
+        elif url.path == "/cgi-bin/xcom.html":
+            if query.get("Thumb") == ["mode"]:
+                self._reply(b"1" if self.large else b"0", "text/plain", head)
+            else:
+                self._reply(self.thumb, "image/jpeg", head)
+        elif url.path in ("/favicon.ico", "/image.jpg", "/echo"):
+            self._reply(self.thumb if url.path == "/image.jpg" else b"", "image/jpeg", head)
+        else:
+            self.send_error(404)
+
+    def do_HEAD(self):
+        self._handle(True)
+
+    def do_GET(self):
+        self._handle(False)
+
+
+class PiMowBotWS(StreamRequestHandler):
+    # WebSocket-Server Modul des PiMowBots: "0" fordert ein Thumb an, "1" die
+    # Telemetrie, Steuerbefehle "[force angle]" werden per Echo quittiert
+    disable_nagle_algorithm = True
+    heading = 137.5
+    binary = True                    # binäre Steuer-Frames (Subprotokoll pmb-bin1) annehmen
+
+    def handle(self):
+        key = None
+        proto = b""
+        self.rfile.readline()
+        while True:
+            l = self.rfile.readline()
+            if l in (b"", b"\r\n", b"\n"):
+                break
+            if l.lower().startswith(b"sec-websocket-key:"):
+                key = l.split(b":", 1)[1].strip()
+            elif l.lower().startswith(b"sec-websocket-protocol:") and self.binary and b"pmb-bin1" in l:
+                proto = b"Sec-WebSocket-Protocol: pmb-bin1\r\n"
+        if key is None:
+            return
+        accept = base64.b64encode(hashlib.sha1(key + _WS_GUID).digest())
+        self.wfile.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                         b"Connection: Upgrade\r\n" + proto + b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        while True:
+            frame = self.read_frame()
+            if frame is None:
+                break
+            opcode, data = frame
+            if opcode == 0x8:
+                self.send_frame(0x8)
+                break
+            if opcode == 0x9:
+                self.send_frame(0xA, data)
+            elif opcode == 0x1:
+                self.on_text(data.decode())
+            elif opcode == 0x2 and len(data) == 5:
+                self.on_control(data)
+
+    def read_frame(self):
+        head = self.rfile.read(2)
+        if len(head) < 2:
+            return None
+        length = head[1] & 0x7F
+        if length == 126:
+            length, = struct.unpack("!H", self.rfile.read(2))
+        elif length == 127:
+            length, = struct.unpack("!Q", self.rfile.read(8))
+        mask = self.rfile.read(4) if head[1] & 0x80 else None
+        data = self.rfile.read(length)
+        if mask:
+            data = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+        Impair.wait(len(data) + 6)   # Frame auf dem Weg zum PiMowBot, in Reihenfolge wie bei TCP
+        return head[0] & 0x0F, data
+
+    def send_frame(self, opcode, data=b""):
+        n = len(data)
+        if n < 126:
+            head = struct.pack("!BB", 0x80 | opcode, n)
+        elif n < 65536:
+            head = struct.pack("!BBH", 0x80 | opcode, 126, n)
+        else:
+            head = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+        Impair.wait(len(head) + n)   # Frame auf dem Weg zur RC
+        self.wfile.write(head + data)
+
+    def on_control(self, data):
+        # binärer Steuer-Frame: Sequenz, Typ, Kraft*100, Winkel*10
+        seq, typ, force, angle = struct.unpack("<BBBh", data)
+        record("ws", [seq, typ, force / 100, angle / 10])
+        if typ != 2:                 # mower wird nicht quittiert
+            self.send_frame(0x2, data)
+
+    def on_text(self, msg):
+        record("ws", msg)
+        if msg == "0":
+            self.send_frame(0x2, PiMowBot.thumb)
+        elif msg == "1":
+            self.send_frame(0x1, "U:12.6V;{:.1f}°".format(self.heading).encode())
+        else:
+            self.send_frame(0x1, msg.encode())
+
+
+def serve_ws(port=8008):
+    server = ThreadingTCPServer(("", port), PiMowBotWS, False)
+    server.allow_reuse_address = True    # direkt nach dem letzten Lauf wieder starten
+    server.daemon_threads = True
+    server.server_bind()
+    server.server_activate()
+    return server
+
+
+class BLECentral:
+    # Central (PiMowBot) für RControlBLE.py im Host-Simulator: empfängt die
+    # Navigation per Notify und schreibt Telemetrie (Akku, Kurs) zurück.
+    # Eine Benachrichtigung kommt nach Impair.delay(ble=True) zum nächsten
+    # Verbindungsereignis (alle ci ms) an, in Reihenfolge. Mit honour=True
+    # übernimmt die Central die von der RC gewünschten Verbindungsparameter
+    # (0x2A04) nach 6 Verbindungsereignissen, wie beim Connection Update.
+    # Bietet die RC die binäre Navigation an, wird nur diese ausgewertet und als
+    # [Sequenz, Befehl, Kraft, Winkel, Z] aufgezeichnet; veraltete zählt stale.
+    _NAV = bytes.fromhex("50a300014d424f548e4352432d424c45")[::-1]
+    _TXT = (0x2A68).to_bytes(2, "little")
+    _PAR = (0x2A04).to_bytes(2, "little")
+    _IMG = bytes.fromhex("50a300024d424f548e4352432d424c45")[::-1]
+    per_event = 4                    # Pakete je Verbindungsereignis (Pico W)
+
+    def __init__(self, ble, tele_ms=5000, volt=12.6, ci=None, honour=True, thumb_fps=0,
+                 thumb=os.path.join(_HERE, "..", "Logo240.jpg")):
+        # thumb_fps > 0: Thumbs in Stücken an die RC schreiben, höchstens so oft je Sekunde
+        self.ble = ble
+        self.ci = ci or Impair.ci    # Verbindungsintervall in ms
+        self.t0 = time.monotonic()   # Bezug der Verbindungsereignisse
+        self.honour = honour
+        self.seq = None
+        self.stale = 0
+        self.tele_ms = tele_ms
+        self.volt = volt
+        self.q = []                  # (fällig, Daten)
+        self.due = 0
+        self.cv = threading.Condition()
+        ble.central = self
+        threading.Thread(target=self._deliver, daemon=True).start()
+        if tele_ms:
+            threading.Thread(target=self._tele, daemon=True).start()
+        self.thumbs = {"sent": 0, "bytes": 0, "ms": 0.0}     # gesendet, Übertragungsdauer
+        if thumb_fps:
+            with open(thumb, "rb") as f:
+                self.thumb = f.read()
+            threading.Thread(target=self._thumbs, args=(thumb_fps,), daemon=True).start()
+
+    def connected(self):
+        # wie der PiMowBot: gewünschte Verbindungsparameter nach dem Verbinden lesen
+        for k, u in self.ble.uuids.items():
+            if bytes(u) == self._PAR:
+                self._par(self.ble.values[k])
+
+    def _par(self, data):
+        if not self.honour or len(data) != 8:
+            return
+        lo, hi, lat, sto = struct.unpack("<HHHH", data)
+
+        def update():
+            with self.cv:
+                self.ci = lo * 1.25
+                self.t0 = time.monotonic()
+            self.ble.central_update(lo, lat, sto)
+        threading.Timer(6 * self.ci / 1000, update).start()
+
+    def notify(self, handle, data):
+        with self.cv:
+            t = time.monotonic() + Impair.delay(len(data), True, self.ci)
+            ci = self.ci / 1000
+            t = self.t0 + -(-(t - self.t0) // ci) * ci     # nächstes Verbindungsereignis
+            self.due = max(self.due, t)
+            self.q.append((self.due, handle, bytes(data)))
+            self.cv.notify()
+
+    def _deliver(self):
+        while True:
+            with self.cv:
+                while not self.q:
+                    self.cv.wait()
+                due, handle, data = self.q[0]
+                d = due - time.monotonic()
+                if d > 0:
+                    self.cv.wait(d)
+                    continue
+                self.q.pop(0)
+            self._nav(handle, data)
+
+    def _nav(self, handle, data):
+        u = bytes(self.ble.uuids.get(handle, b""))
+        if u == self._NAV and len(data) == 8:
+            cmd = list(struct.unpack("<HBBhh", data))
+            if self.seq is not None and (cmd[0] - self.seq) & 0xFFFF >= 0x8000:
+                self.stale += 1          # überholt, neuere Navigation ist schon da
+                return
+            self.seq = cmd[0]
+            record("ble", cmd)
+        elif u == self._TXT and self._NAV not in map(bytes, self.ble.uuids.values()):
+            record("ble", data.decode())
+        elif u == self._PAR:
+            self._par(data)
+
+    def _event(self, t):
+        # nächstes Verbindungsereignis ab t abwarten
+        ci = self.ci / 1000
+        t = self.t0 + -(-(t - self.t0) // ci) * ci
+        d = t - time.monotonic()
+        if d > 0:
+            time.sleep(d)
+
+    def _thumbs(self, fps):
+        h = None
+        f = 0
+        while True:
+            t = time.monotonic()
+            if h is None:
+                for k, u in self.ble.uuids.items():
+                    if bytes(u) == self._IMG:
+                        h = k            # Thumb-Characteristic der RC
+            if h is not None and self.ble.conn is not None:
+                f = (f + 1) & 0xFF
+                n = len(self.thumb)
+                k = self.ble.mtu - 3 - 5
+                for i, o in enumerate(range(0, n, k)):
+                    if i % self.per_event == 0:
+                        self._event(time.monotonic() + Impair.delay(k, True, self.ci))
+                    self.ble.central_write(h, struct.pack("<BHH", f, o, n) + self.thumb[o:o + k])
+                self.thumbs["sent"] += 1
+                self.thumbs["bytes"] += n
+                self.thumbs["ms"] += (time.monotonic() - t) * 1000
+            d = t + 1 / fps - time.monotonic()
+            if d > 0:
+                time.sleep(d)
+
+    def _tele(self):
+        h = None
+        while True:
+            time.sleep(self.tele_ms / 1000)
+            if h is None:
+                for k, u in self.ble.uuids.items():
+                    if bytes(u) == (0x2700).to_bytes(2, "little"):
+                        h = k            # Telemetrie-Characteristic der RC
+            if h is None or self.ble.conn is None:
+                continue
+            for v in ("b {:.1f}".format(self.volt), "h {:.1f}".format(PiMowBotWS.heading)):
+                time.sleep(Impair.delay(len(v), True, self.ci))
+                self.ble.central_write(h, v.encode())
+
+
+def serve(port=8080, thumb=os.path.join(_HERE, "..", "Logo.jpg"), large=False, kbps=0):
+    with open(thumb, "rb") as f:
+        PiMowBot.thumb = f.read()
+    PiMowBot.large = large
+    Impair.kbps = kbps
+    server = ThreadingHTTPServer(("", port), PiMowBot)
+    server.daemon_threads = True
+    return server
+
+
+def start(port=8080, ws_port=8008, **kw):
+    # Stand-in im selben Prozess starten (z.B. aus sim/ oder einem Benchmark)
+    server = serve(port, **kw)
+    wserver = serve_ws(ws_port)
+    for s in (server, wserver):
+        threading.Thread(target=s.serve_forever, daemon=True).start()
+    return server, wserver
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PiMowBot stand-in server")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--thumb", default=os.path.join(_HERE, "..", "Logo.jpg"))
+    parser.add_argument("--large", action="store_true", help="large thumb mode")
+    parser.add_argument("--ws-port", type=int, default=8008)
+    parser.add_argument("--kbps", type=float, default=0, help="bandwidth limit in kByte/s")
+    parser.add_argument("--latency", type=float, default=0, help="one-way latency in ms")
+    parser.add_argument("--jitter", type=float, default=0, help="additional random delay 0..ms")
+    parser.add_argument("--loss", type=float, default=0, help="packet loss 0..1 (TCP retransmit)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for jitter and loss")
+    parser.add_argument("--record", help="append received commands as JSON lines")
+    parser.add_argument("--text-only", action="store_true", help="refuse binary control frames")
+    args = parser.parse_args()
+    PiMowBotWS.binary = not args.text_only
+    Impair.latency = args.latency
+    Impair.jitter = args.jitter
+    Impair.loss = args.loss
+    Impair.rnd.seed(args.seed)
+    if args.record:
+        PiMowBot.record = open(args.record, "a")
+    server = serve(args.port, args.thumb, args.large, args.kbps)
+    wserver = serve_ws(args.ws_port)
+    threading.Thread(target=wserver.serve_forever, daemon=True).start()
+    print("PiMowBot stand-in listening on port {} (WebSocket {})".format(args.port, args.ws_port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Finished!!!")
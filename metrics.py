@@ -0,0 +1,124 @@
+#/****************************************************************************
+# *  PiMowBot-RC Messwerte                                                   *
+# *  =====================                                                   *
+# *  Kleines Modul für RControl.py, RCjoy.py und RControlBLE.py: Zähler,     *
+# *  Messwerte, Histogramme mit festen Klassen für Latenzen (ms) und Raten   *
+# *  (z.B. Bilder je Sekunde). Wird nur mit _MET = True im Skript geladen    *
+# *  und muss dann zusätzlich auf den Flash des Pico W übertragen werden.    *
+# *                                                                          *
+# *  lines() liefert kurze Zeilen für die Anzeige (HUD), summary() eine      *
+# *  Zeile für das Log.                                                      *
+# *                                                                          *
+# *  Homepage: http://pimowbot.TGD-Consulting.de                             *
+# *                                                                          *
+# *  (C) 2022 TGD-Consulting , Author: Dirk Weyand                           *
+# ****************************************************************************/
+
+from micropython import const
+from time import ticks_ms, ticks_diff
+from array import array
+import gc
+
+_B = (10, 20, 50, 100, 200, 500, 1000, 2000)   # Obergrenzen der Klassen in ms, dazu > 2000
+_NB = const(9)
+_N = const(9)      # Index Anzahl im Histogramm
+_S = const(10)     # Summe
+_M = const(11)     # Maximum
+
+counts = {}        # Name -> Zähler
+values = {}        # Name -> letzter Messwert
+hists = {}         # Name -> array: Klassen, Anzahl, Summe, Maximum
+ticks = {}         # Name -> array: letztes Ereignis, geglätteter Abstand in ms
+heap = [0, 0]      # freier Speicher: aktuell, kleinster
+
+def count(k, n=1):
+    counts[k] = counts.get(k, 0) + n
+
+def put(k, v):
+    values[k] = v
+
+def hist(k, ms):
+    h = hists.get(k)
+    if h is None:
+        h = array('I', bytes(4 * (_NB + 3)))
+        hists[k] = h
+    i = 0
+    while i < _NB - 1 and ms > _B[i]:
+        i += 1
+    h[i] += 1
+    h[_N] += 1
+    h[_S] += ms
+    if ms > h[_M]:
+        h[_M] = ms
+
+def tick(k):
+    # Ereignis für die Rate, z.B. ein angezeigtes Bild
+    t = ticks_ms()
+    r = ticks.get(k)
+    if r is None:
+        ticks[k] = array('i', (t, 0))
+        return
+    d = ticks_diff(t, r[0])
+    r[0] = t
+    r[1] = d if r[1] == 0 else (3 * r[1] + d) // 4
+
+def rate(k):
+    # Ereignisse je Sekunde in 1/10, fällt ab, wenn keine mehr kommen
+    r = ticks.get(k)
+    if r is None or r[1] == 0:
+        return 0
+    return 10000 // max(r[1], ticks_diff(ticks_ms(), r[0]))
+
+def pct(k, p):
+    # Obergrenze der Klasse, in der das p-te Perzentil liegt
+    h = hists.get(k)
+    if h is None or h[_N] == 0:
+        return 0
+    n = (h[_N] * p + 99) // 100
+    s = 0
+    for i in range(_NB):
+        s += h[i]
+        if s >= n:
+            return _B[i] if i < _NB - 1 else h[_M]
+    return h[_M]
+
+def mem():
+    f = gc.mem_free()
+    heap[0] = f
+    if heap[1] == 0 or f < heap[1]:
+        heap[1] = f
+    return f
+
+def fmt(k):
+    h = hists[k]
+    return k + " " + str(h[_S] // max(1, h[_N])) + "/" + str(pct(k, 95)) + "/" + str(h[_M]) + "ms n" + str(h[_N])
+
+def lines():
+    # kurze Zeilen (<= 20 Zeichen) für die Anzeige
+    mem()
+    l = ["Heap " + str(heap[0] // 1024) + "k min " + str(heap[1] // 1024) + "k"]
+    for k in ticks:
+        r = rate(k)
+        l.append(k + " " + str(r // 10) + "." + str(r % 10) + "/s")
+    for k in hists:
+        l.append(k + " " + str(pct(k, 50)) + "/" + str(pct(k, 95)) + "ms")
+    for k in counts:
+        l.append(k + " " + str(counts[k]))
+    for k in values:
+        l.append(k + " " + str(values[k]))
+    return l
+
+def summary():
+    # eine Zeile für log(): Histogramme als Mittel/p95/Max
+    mem()
+    l = ["heap " + str(heap[0]) + " min " + str(heap[1])]
+    for k in ticks:
+        r = rate(k)
+        l.append(k + " " + str(r // 10) + "." + str(r % 10) + "/s")
+    for k in hists:
+        l.append(fmt(k))
+    for k in counts:
+        l.append(k + " " + str(counts[k]))
+    for k in values:
+        l.append(k + " " + str(values[k]))
+    return ", ".join(l)
@@ -0,0 +1,18 @@
+#/****************************************************************************
+# *  PiMowBot-RC Host-Simulator                                              *
+# *  ==========================                                              *
+# *  Ersatz für die MicroPython Module des Pico W unter CPython 3, damit     *
+# *  RControl.py, RCjoy.py und RControlBLE.py unverändert auf dem PC laufen  *
+# *  und reproduzierbar gemessen werden können:                              *
+# *                                                                          *
+# *     python3 -m sim RCjoy.py [--seconds 10] [--script joy.txt]            *
+# *                                                                          *
+# *  sim/mp/ enthält die Ersatz-Module (machine, network, bluetooth,         *
+# *  picographics, jpegdec, gc9a01, ws, urequests ...), sim/board.py den     *
+# *  gemeinsamen Zustand: Pins und ADCs nach Skript, Zähler für Pixel und    *
+# *  SPI-Bytes der Displays, WLAN und Bluetooth.                             *
+# *                                                                          *
+# *  Homepage: http://pimowbot.TGD-Consulting.de                             *
+# *                                                                          *
+# *  (C) 2022 TGD-Consulting , Author: Dirk Weyand                           *
+# ****************************************************************************/
@@ -0,0 +1,67 @@
+# python3 -m sim <Skript> [Optionen], siehe sim/__init__.py
+
+import argparse
+
+from sim import board, run
+
+
+def standin(args):
+    # PiMowBot im selben Prozess: HTTP, WebSocket und eine Central am simulierten Bluetooth
+    run.install()
+    import bluetooth
+    from bench import standin as si
+    si.Impair.latency = args.latency
+    si.Impair.jitter = args.jitter
+    si.Impair.loss = args.loss
+    if args.record:
+        si.PiMowBot.record = open(args.record, "a")
+    si.start(kbps=args.kbps)
+    si.BLECentral(bluetooth.BLE(), thumb_fps=args.thumbs)
+
+
+def main():
+    p = argparse.ArgumentParser(prog="python3 -m sim", description="PiMowBot-RC Host-Simulator")
+    p.add_argument("script", help="RControl.py, RCjoy.py oder RControlBLE.py")
+    p.add_argument("--seconds", type=float, default=10, help="Laufzeit, 0 = unbegrenzt")
+    p.add_argument("--script", dest="inputs", help="Eingaben: Zeilen '<ms> <P22|A26> <Wert>'")
+    p.add_argument("--set", action="append", default=[], metavar="P22=0", help="Eingang vorbelegen")
+    p.add_argument("--host", action="append", default=[], metavar="NAME=IP", help="Namensauflösung")
+    p.add_argument("--flash", help="Verzeichnis als Flash des Pico (Standard: neues temp. Verzeichnis)")
+    p.add_argument("--cfg", action="append", default=[], metavar="KEY=WERT", help="board.cfg setzen")
+    p.add_argument("--dump", metavar="FILE.ppm", help="Framebuffer des Displays am Ende speichern")
+    p.add_argument("--standin", action="store_true", help="bench/standin.py und BLE-Central mitstarten")
+    p.add_argument("--latency", type=float, default=0, help="Stand-in: Latenz je Richtung in ms")
+    p.add_argument("--jitter", type=float, default=0, help="Stand-in: zusätzlich 0..ms zufällig")
+    p.add_argument("--loss", type=float, default=0, help="Stand-in: Paketverlust 0..1")
+    p.add_argument("--kbps", type=float, default=0, help="Stand-in: Bandbreite in kByte/s")
+    p.add_argument("--record", help="Stand-in: empfangene Befehle als JSON-Zeilen anhängen")
+    p.add_argument("--thumbs", type=float, default=0, metavar="FPS", help="Stand-in: Thumbs per Bluetooth an die RC")
+    args = p.parse_args()
+
+    cfg = {"seconds": args.seconds}
+    for kv in args.cfg:
+        k, v = kv.split("=", 1)
+        cfg[k] = None if v == "None" else (v == "True" if v in ("True", "False") else int(v))
+    for kv in args.host:
+        k, v = kv.split("=", 1)
+        board.cfg["hosts"][k] = v
+    for kv in args.set:
+        k, v = kv.split("=", 1)
+        board.set_input(k, int(v))
+    if args.inputs:
+        board.load_script(args.inputs)
+
+    if args.standin:
+        standin(args)
+    r = run.run(args.script, args.flash, **cfg)
+
+    if args.dump:
+        import gc9a01
+        import picographics
+        d = gc9a01.last or picographics.last
+        if d:
+            d.fb.save_ppm(args.dump)
+    print("SIM: " + ", ".join("{}={}".format(k, v) for k, v in r.items()))
+
+
+main()
@@ -0,0 +1,134 @@
+# Gemeinsamer Zustand des simulierten Pico W: Uhr, Pins/ADCs nach Skript,
+# Einstellungen und Zähler, die die Ersatz-Module in sim/mp/ fortschreiben.
+
+import threading
+import time
+
+_TICKS_PERIOD = 1 << 30          # ticks_ms() & Co. laufen wie auf dem Pico nach 2^30 über
+_TICKS_HALF = _TICKS_PERIOD // 2
+
+t0 = time.monotonic_ns()
+
+cfg = {
+    "hosts": {"pimowbot.local": "127.0.0.1"},   # Namensauflösung statt mDNS
+    "seconds": 10,               # Laufzeit von uasyncio.run(), 0 = unbegrenzt
+    "wifi_full_ms": 2500,        # Dauer vollständiges Verbinden (Scan, Anmelden, DHCP)
+    "wifi_fast_ms": 700,         # Dauer gezieltes Verbinden mit BSSID und fester Adresse
+    "wifi_dhcp_ms": 800,         # Anteil DHCP am gezielten Verbinden ohne feste Adresse
+    "wifi_ok": True,             # False: Access Point nicht erreichbar
+    "wifi_ssid": "Your_SSID_Name",   # SSID des Access Points für scan() vor dem Verbinden
+    "ble_connect_ms": 1000,      # Central verbindet sich so lange nach gap_advertise(), None = nie
+    "ble_mtu": 247,              # größte MTU der Central beim Aushandeln
+    "jpeg_ms_kb": 0,             # Dekodierdauer je KB JPEG (blockiert wie auf dem Pico), 0 = sofort
+}
+
+stats = {
+    "spi_bytes": 0,              # zum Display übertragene Bytes
+    "pixels": 0,                 # gezeichnete Pixel im Framebuffer bzw. per SPI
+    "updates": 0,                # update()/partial_update() bzw. SPI-Transfers
+    "wifi_connects": 0,
+    "ble_notify": 0,
+    "ble_notify_bytes": 0,
+    "ble_writes": 0,
+    "ble_truncated": 0,
+    "jpeg": 0,                   # dekodierte JPEGs
+    "jpeg_bytes": 0,          # Benachrichtigungen länger als MTU - 3
+    "ble_ci_ms": 0,              # aktuelles Verbindungsintervall (kein Zähler)
+    "ble_mtu": 0,                # ausgehandelte MTU (kein Zähler)
+}
+
+lock = threading.Lock()
+pins = {}                        # GPIO -> Pegel, von außen gesetzt (Tasten)
+adcs = {}                        # GPIO -> read_u16()
+events = []                      # (ms, Name, Wert) aus dem Skript, nach Zeit sortiert
+
+
+def ms():
+    return (time.monotonic_ns() - t0) // 1000000
+
+
+def ticks_ms():
+    return ms() & (_TICKS_PERIOD - 1)
+
+
+def ticks_us():
+    return ((time.monotonic_ns() - t0) // 1000) & (_TICKS_PERIOD - 1)
+
+
+def ticks_add(t, d):
+    return (t + d) & (_TICKS_PERIOD - 1)
+
+
+def ticks_diff(a, b):
+    return ((a - b + _TICKS_HALF) & (_TICKS_PERIOD - 1)) - _TICKS_HALF
+
+
+def count(key, n=1):
+    with lock:
+        stats[key] += n
+
+
+def jpeg(n):
+    # JPEG mit n Bytes dekodiert: zählen und die Dekodierdauer abwarten
+    count("jpeg")
+    count("jpeg_bytes", n)
+    if cfg["jpeg_ms_kb"]:
+        time.sleep(n / 1024 * cfg["jpeg_ms_kb"] / 1000)
+
+
+def put(key, v):
+    with lock:
+        stats[key] = v
+
+
+def set_input(name, value):
+    # name: "P22" für einen Pin (0 = gedrückt), "A26" für einen ADC (0..65535)
+    kind = name[0].upper()
+    gpio = int(name[1:])
+    with lock:
+        if kind == "P":
+            pins[gpio] = int(value)
+        elif kind == "A":
+            adcs[gpio] = int(value)
+        else:
+            raise ValueError("unbekannter Eingang " + name)
+
+
+def at(t, name, value):
+    # Eingang zum Zeitpunkt t (ms seit Start) setzen
+    with lock:
+        events.append((t, name, value))
+        events.sort(key=lambda e: e[0])
+
+
+def load_script(path):
+    # Zeilen "<ms> <Eingang> <Wert>", z.B. "1500 A26 65535" oder "3000 P22 0", # Kommentar
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0].split()
+            if line:
+                at(int(line[0]), line[1], int(line[2]))
+
+
+def _advance():
+    now = ms()
+    while events and events[0][0] <= now:
+        with lock:
+            t, name, value = events.pop(0)
+        set_input(name, value)
+
+
+def pin(gpio, default=1):
+    _advance()
+    return pins.get(gpio, default)
+
+
+def adc(gpio):
+    _advance()
+    return adcs.get(gpio, 32768)
+
+
+def report():
+    s = dict(stats)
+    s["ms"] = ms()
+    return s
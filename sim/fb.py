@@ -0,0 +1,150 @@
+# RGB565 Framebuffer (big endian wie auf dem SPI-Bus) für die Display-Ersatz-
+# Module, zählt die gezeichneten Pixel und kann als PPM gespeichert werden.
+
+from sim import board
+
+
+class FB:
+    def __init__(self, w, h, buf=None, little=False):
+        self.w = w
+        self.h = h
+        self.buf = buf if buf is not None else bytearray(w * h * 2)
+        self.little = little     # framebuf.RGB565 speichert little endian
+        self.clip = (0, 0, w, h)
+        self.count = True        # Pixel in board.stats zählen
+
+    def set_clip(self, x, y, w, h):
+        x1 = min(self.w, x + w)
+        y1 = min(self.h, y + h)
+        self.clip = (max(0, x), max(0, y), x1, y1)
+
+    def remove_clip(self):
+        self.clip = (0, 0, self.w, self.h)
+
+    def _c(self, c):
+        c &= 0xffff
+        return bytes((c & 255, c >> 8)) if self.little else bytes((c >> 8, c & 255))
+
+    def fill_rect(self, x, y, w, h, c):
+        cx, cy, cx1, cy1 = self.clip
+        x0 = max(x, cx)
+        y0 = max(y, cy)
+        x1 = min(x + w, cx1)
+        y1 = min(y + h, cy1)
+        if x0 >= x1 or y0 >= y1:
+            return 0
+        row = self._c(c) * (x1 - x0)
+        for yy in range(y0, y1):
+            p = (yy * self.w + x0) * 2
+            self.buf[p:p + len(row)] = row
+        n = (x1 - x0) * (y1 - y0)
+        if self.count:
+            board.count("pixels", n)
+        return n
+
+    def fill(self, c):
+        return self.fill_rect(0, 0, self.w, self.h, c)
+
+    def pixel(self, x, y, c=None):
+        if c is None:
+            p = (y * self.w + x) * 2
+            b = self.buf[p:p + 2]
+            return (b[1] << 8 | b[0]) if self.little else (b[0] << 8 | b[1])
+        return self.fill_rect(x, y, 1, 1, c)
+
+    def hline(self, x, y, w, c):
+        return self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        return self.fill_rect(x, y, 1, h, c)
+
+    def line(self, x0, y0, x1, y1, c):
+        dx = abs(x1 - x0)
+        dy = -abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        e = dx + dy
+        n = 0
+        while True:
+            n += self.fill_rect(x0, y0, 1, 1, c)
+            if x0 == x1 and y0 == y1:
+                return n
+            e2 = 2 * e
+            if e2 >= dy:
+                e += dy
+                x0 += sx
+            if e2 <= dx:
+                e += dx
+                y0 += sy
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            return self.fill_rect(x, y, w, h, c)
+        return (self.hline(x, y, w, c) + self.hline(x, y + h - 1, w, c) +
+                self.vline(x, y, h, c) + self.vline(x + w - 1, y, h, c))
+
+    def triangle(self, x0, y0, x1, y1, x2, y2, c):
+        # gefüllt, zeilenweise zwischen den Kanten
+        n = 0
+        for y in range(min(y0, y1, y2), max(y0, y1, y2) + 1):
+            xs = []
+            for (ax, ay), (bx, by) in (((x0, y0), (x1, y1)), ((x1, y1), (x2, y2)), ((x2, y2), (x0, y0))):
+                if ay == by:
+                    if y == ay:
+                        xs += [ax, bx]
+                elif min(ay, by) <= y <= max(ay, by):
+                    xs.append(ax + (bx - ax) * (y - ay) // (by - ay))
+            if xs:
+                n += self.fill_rect(min(xs), y, max(xs) - min(xs) + 1, 1, c)
+        return n
+
+    def circle(self, x, y, r, c):
+        # gefüllt
+        n = 0
+        for dy in range(-r, r + 1):
+            dx = int((r * r - dy * dy) ** 0.5)
+            n += self.fill_rect(x - dx, y + dy, 2 * dx + 1, 1, c)
+        return n
+
+    def blit(self, buf, x, y, w, h):
+        # RGB565 Puffer in derselben Byte-Reihenfolge, zeilenweise
+        cx, cy, cx1, cy1 = self.clip
+        n = 0
+        for yy in range(max(y, cy), min(y + h, cy1)):
+            x0 = max(x, cx)
+            x1 = min(x + w, cx1)
+            if x0 >= x1:
+                break
+            s = ((yy - y) * w + x0 - x) * 2
+            p = (yy * self.w + x0) * 2
+            self.buf[p:p + (x1 - x0) * 2] = buf[s:s + (x1 - x0) * 2]
+            n += x1 - x0
+        if self.count:
+            board.count("pixels", n)
+        return n
+
+    def save_ppm(self, path):
+        out = bytearray()
+        for i in range(0, self.w * self.h * 2, 2):
+            c = self.buf[i + 1] << 8 | self.buf[i] if self.little else self.buf[i] << 8 | self.buf[i + 1]
+            out += bytes(((c >> 11) << 3, ((c >> 5) & 63) << 2, (c & 31) << 3))
+        with open(path, "wb") as f:
+            f.write(b"P6 %d %d 255\n" % (self.w, self.h))
+            f.write(out)
+
+
+def jpeg_size(data):
+    # Breite und Höhe aus dem SOF-Segment, (0, 0) wenn keins gefunden wird
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xff:
+            i += 1
+            continue
+        m = data[i + 1]
+        if m in (0xc0, 0xc1, 0xc2):
+            return data[i + 7] << 8 | data[i + 8], data[i + 5] << 8 | data[i + 6]
+        if m == 0xd8 or 0xd0 <= m <= 0xd7:
+            i += 2
+            continue
+        i += 2 + (data[i + 2] << 8 | data[i + 3])
+    return 0, 0
@@ -0,0 +1,178 @@
+# Ersatz für bluetooth (MicroPython) im Host-Simulator: GATT-Server mit
+# Handles und Werten, eine Central verbindet sich nach gap_advertise() von
+# selbst. Schreiben der Central über central_write(), Benachrichtigungen
+# werden in sim/board.py gezählt, in notified abgelegt und an central
+# (z.B. BLECentral aus bench/standin.py) weitergegeben.
+
+import threading
+
+from sim import board
+
+FLAG_BROADCAST = 0x0001
+FLAG_READ = 0x0002
+FLAG_WRITE_NO_RESPONSE = 0x0004
+FLAG_WRITE = 0x0008
+FLAG_NOTIFY = 0x0010
+FLAG_INDICATE = 0x0020
+
+_IRQ_CENTRAL_CONNECT = 1
+_IRQ_CENTRAL_DISCONNECT = 2
+_IRQ_GATTS_WRITE = 3
+_IRQ_GATTS_INDICATE_DONE = 20
+_IRQ_MTU_EXCHANGED = 21
+_IRQ_CONNECTION_UPDATE = 27
+
+_CONN = 64                       # Handle der simulierten Central
+_ADDR = b"\x02\x50\x4d\x42\xce\x01"
+
+
+class UUID:
+    def __init__(self, v):
+        if isinstance(v, UUID):
+            v = v.v
+        self.v = v
+
+    def __bytes__(self):
+        if isinstance(self.v, int):
+            return self.v.to_bytes(2, "little")
+        return bytes.fromhex(self.v.replace("-", ""))[::-1]
+
+    def __eq__(self, o):
+        return isinstance(o, UUID) and bytes(self) == bytes(o)
+
+    def __hash__(self):
+        return hash(bytes(self))
+
+    def __repr__(self):
+        return "UUID({})".format(hex(self.v) if isinstance(self.v, int) else repr(self.v))
+
+
+class BLE:
+    _inst = None
+
+    def __new__(cls):
+        if BLE._inst is None:        # wie auf dem Pico gibt es nur einen Controller
+            BLE._inst = super().__new__(cls)
+            BLE._inst._init()
+        return BLE._inst
+
+    def _init(self):
+        self.on = False
+        self.handler = None
+        self.values = {}
+        self.uuids = {}
+        self.h = 0
+        self.conn = None
+        self.mtu = 23
+        self.cfg = {"mtu": 23, "gap_name": "MPY BTSTACK"}
+        self.notified = []       # (ms, Handle, Daten) der Benachrichtigungen
+        self.adv = None
+        self.central = None      # bekommt notify(Handle, Daten)
+
+    def active(self, v=None):
+        if v is None:
+            return self.on
+        self.on = bool(v)
+
+    def config(self, *args, **kwargs):
+        if args:
+            if args[0] == "mac":
+                return (0, _ADDR)
+            return self.cfg.get(args[0])
+        self.cfg.update(kwargs)
+
+    def irq(self, handler):
+        self.handler = handler
+
+    def _irq(self, event, data):
+        if self.handler:
+            self.handler(event, data)
+
+    def gatts_register_services(self, services):
+        out = []
+        for uuid, chars in services:
+            hs = []
+            for c in chars:
+                self.h += 1
+                self.values[self.h] = b""
+                self.uuids[self.h] = c[0]
+                hs.append(self.h)
+                for d in (c[2] if len(c) > 2 else ()):
+                    self.h += 1
+                    self.values[self.h] = b""
+                    hs.append(self.h)
+            out.append(tuple(hs))
+        return tuple(out)
+
+    def gatts_write(self, handle, data, send_update=False):
+        self.values[handle] = data.encode() if isinstance(data, str) else bytes(data)
+
+    def gatts_read(self, handle):
+        return self.values[handle]
+
+    def gatts_set_buffer(self, handle, n, append=False):
+        pass
+
+    def gatts_notify(self, conn, handle, data=None):
+        if data is None:
+            data = self.values[handle]
+        elif isinstance(data, str):
+            data = data.encode()
+        else:
+            data = bytes(data)
+        if len(data) > self.mtu - 3:     # wie auf dem Pico: abgeschnitten
+            data = data[:self.mtu - 3]
+            board.count("ble_truncated")
+        self.notified.append((board.ms(), handle, data))
+        board.count("ble_notify")
+        board.count("ble_notify_bytes", len(data))
+        if self.central:
+            self.central.notify(handle, data)
+
+    def gatts_indicate(self, conn, handle, data=None):
+        self.gatts_notify(conn, handle, data)
+        threading.Timer(0.01, self._irq, (_IRQ_GATTS_INDICATE_DONE, (conn, handle, 0))).start()
+
+    def gap_advertise(self, interval_us, adv_data=None, resp_data=None, connectable=True):
+        self.adv = adv_data
+        ms = board.cfg["ble_connect_ms"]
+        if interval_us is not None and self.conn is None and ms is not None:
+            threading.Timer(ms / 1000, self.central_connect).start()
+
+    def gattc_exchange_mtu(self, conn):
+        if self.conn != conn:
+            raise OSError(128)
+        self.mtu = min(self.cfg["mtu"], board.cfg["ble_mtu"])
+        board.put("ble_mtu", self.mtu)
+        threading.Timer(0.05, self._irq, (_IRQ_MTU_EXCHANGED, (conn, self.mtu))).start()
+
+    def gap_disconnect(self, conn):
+        if self.conn != conn:
+            return False
+        self.conn = None
+        self._irq(_IRQ_CENTRAL_DISCONNECT, (conn, 0, _ADDR))
+        return True
+
+    # Seite der simulierten Central
+
+    def central_connect(self):
+        if self.conn is None:
+            self.conn = _CONN
+            self.mtu = 23
+            self._irq(_IRQ_CENTRAL_CONNECT, (_CONN, 0, _ADDR))
+            if self.central and hasattr(self.central, "connected"):
+                self.central.connected()
+
+    def central_write(self, handle, data):
+        self.values[handle] = bytes(data)
+        board.count("ble_writes")
+        self._irq(_IRQ_GATTS_WRITE, (self.conn, handle))
+
+    def central_update(self, interval, latency, timeout):
+        # neue Verbindungsparameter (Intervall in 1,25ms, Timeout in 10ms)
+        if self.conn is not None:
+            board.put("ble_ci_ms", interval * 1.25)
+            self._irq(_IRQ_CONNECTION_UPDATE, (self.conn, interval, latency, timeout, 0))
+
+    def central_disconnect(self):
+        self.gap_disconnect(self.conn)
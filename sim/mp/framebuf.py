@@ -0,0 +1,43 @@
+# Ersatz für framebuf (MicroPython) im Host-Simulator, nur RGB565
+
+from sim.fb import FB
+
+MONO_VLSB = 0
+RGB565 = 1
+GS4_HMSB = 2
+MONO_HLSB = 3
+MONO_HMSB = 4
+GS2_HMSB = 5
+GS8 = 6
+
+
+class FrameBuffer:
+    def __init__(self, buf, width, height, format=RGB565, stride=None):
+        if format != RGB565:
+            raise ValueError("nur RGB565 simuliert")
+        self.fb = FB(width, height, buf, little=True)
+        self.fb.count = False    # Zeichnen im RAM, nicht auf dem Display
+
+    def fill(self, c):
+        self.fb.fill(c)
+
+    def fill_rect(self, x, y, w, h, c):
+        self.fb.fill_rect(x, y, w, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        self.fb.rect(x, y, w, h, c, f)
+
+    def pixel(self, x, y, c=None):
+        return self.fb.pixel(x, y, c)
+
+    def hline(self, x, y, w, c):
+        self.fb.hline(x, y, w, c)
+
+    def vline(self, x, y, h, c):
+        self.fb.vline(x, y, h, c)
+
+    def line(self, x0, y0, x1, y1, c):
+        self.fb.line(x0, y0, x1, y1, c)
+
+    def text(self, s, x, y, c=1):
+        pass
@@ -0,0 +1,118 @@
+# Ersatz für gc9a01 (russhughes) im Host-Simulator: zeichnet in einen RGB565
+# Framebuffer und zählt je Zeichenbefehl die SPI-Bytes (Fenster + Pixel).
+
+from sim import board
+from sim.fb import FB, jpeg_size
+
+BLACK = 0x0000
+BLUE = 0x001f
+RED = 0xf800
+GREEN = 0x07e0
+CYAN = 0x07ff
+MAGENTA = 0xf81f
+YELLOW = 0xffe0
+WHITE = 0xffff
+
+FAST = 0
+SLOW = 1
+
+_WIN = 11                        # CASET, RASET und RAMWR je Fenster
+
+last = None                      # zuletzt angelegtes Display, für --dump
+
+
+def color565(r, g, b):
+    return ((r & 0xf8) << 8) | ((g & 0xfc) << 3) | (b >> 3)
+
+
+class GC9A01:
+    def __init__(self, spi, width, height, reset=None, cs=None, dc=None, backlight=None,
+                 rotation=0, buffer_size=0, **kwargs):
+        global last
+        self.fb = FB(width, height)
+        self.fb.count = False    # gezählt wird hier je SPI-Transfer
+        last = self
+
+    def _spi(self, px, windows=1):
+        board.count("updates", windows)
+        board.count("pixels", px)
+        board.count("spi_bytes", px * 2 + windows * _WIN)
+
+    def init(self):
+        self._spi(0, 5)
+
+    def on(self):
+        pass
+
+    def off(self):
+        pass
+
+    def sleep_mode(self, v):
+        pass
+
+    def width(self):
+        return self.fb.w
+
+    def height(self):
+        return self.fb.h
+
+    def fill(self, c):
+        self._spi(self.fb.fill(c))
+
+    def fill_rect(self, x, y, w, h, c):
+        self._spi(self.fb.fill_rect(x, y, w, h, c))
+
+    def rect(self, x, y, w, h, c):
+        self._spi(self.fb.rect(x, y, w, h, c), 4)
+
+    def pixel(self, x, y, c):
+        self._spi(self.fb.pixel(x, y, c))
+
+    def hline(self, x, y, w, c):
+        self._spi(self.fb.hline(x, y, w, c))
+
+    def vline(self, x, y, h, c):
+        self._spi(self.fb.vline(x, y, h, c))
+
+    def line(self, x0, y0, x1, y1, c):
+        n = self.fb.line(x0, y0, x1, y1, c)
+        self._spi(n, n)
+
+    def fill_circle(self, x, y, r, c):
+        self._spi(self.fb.circle(x, y, r, c), 2 * r + 1)
+
+    def blit_buffer(self, buf, x, y, w, h):
+        self._spi(self.fb.blit(buf, x, y, w, h))
+
+    def text(self, font, s, x, y, fg=WHITE, bg=BLACK):
+        # je Zeichen ein Fenster, Glyphen aus font.FONT
+        fw = font.WIDTH
+        fh = font.HEIGHT
+        bpr = (fw + 7) // 8
+        px = 0
+        n = 0
+        for ch in s:
+            if x + fw > self.fb.w:
+                break
+            g = (ord(ch) - font.FIRST) * fh * bpr
+            for yy in range(fh):
+                for xx in range(fw):
+                    on = font.FONT[g + yy * bpr + (xx >> 3)] & (0x80 >> (xx & 7))
+                    px += self.fb.pixel(x + xx, y + yy, fg if on else bg)
+            x += fw
+            n += 1
+        self._spi(px, n)
+
+    def jpg(self, f, x, y, mode=SLOW):
+        # f: Dateiname oder Puffer, SLOW überträgt je MCU (16x16) ein Fenster
+        if isinstance(f, str):
+            with open(f, "rb") as fh:
+                data = fh.read()
+        else:
+            data = bytes(f)
+        w, h = jpeg_size(data)
+        if not w:
+            raise ValueError("kein JPEG")
+        board.jpeg(len(data))
+        px = self.fb.fill_rect(x, y, w, h, 0x8410)
+        self._spi(px, ((w + 15) // 16) * ((h + 15) // 16) if mode == SLOW else 1)
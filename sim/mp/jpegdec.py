@@ -0,0 +1,37 @@
+# Ersatz für jpegdec (Pimoroni) im Host-Simulator: liest Breite und Höhe aus
+# dem JPEG und füllt die Fläche im Framebuffer von PicoGraphics grau.
+
+from sim import board
+from sim.fb import jpeg_size
+
+JPEG_SCALE_FULL = 0
+JPEG_SCALE_HALF = 2
+JPEG_SCALE_QUARTER = 4
+JPEG_SCALE_EIGHTH = 8
+
+
+class JPEG:
+    def __init__(self, display):
+        self.display = display
+        self.w = 0
+        self.h = 0
+        self.n = 0
+
+    def open_file(self, file):
+        with open(file, "rb") as f:
+            self.open_RAM(f.read())
+
+    def open_RAM(self, data):
+        self.n = len(data)
+        self.w, self.h = jpeg_size(bytes(data))
+
+    def get_width(self):
+        return self.w
+
+    def get_height(self):
+        return self.h
+
+    def decode(self, x=0, y=0, scale=JPEG_SCALE_FULL, dither=True):
+        s = scale or 1
+        board.jpeg(self.n)
+        self.display.fb.fill_rect(x, y, self.w // s, self.h // s, 0x8410)
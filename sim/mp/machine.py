@@ -0,0 +1,148 @@
+# Ersatz für machine (MicroPython) im Host-Simulator: Pins und ADCs lesen den
+# Zustand aus sim/board.py, Timer laufen als Threads wie Soft-IRQs.
+
+import threading
+import time
+
+from sim import board
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self.mode = mode
+        self.pull = pull
+        self.v = 0 if value is None else int(value)
+
+    def init(self, mode=-1, pull=-1, value=None):
+        self.__init__(self.id, mode, pull, value)
+
+    def value(self, v=None):
+        if v is not None:
+            self.v = int(bool(v))
+            return None
+        if self.mode == Pin.OUT or not isinstance(self.id, int):
+            return self.v
+        return board.pin(self.id, 0 if self.pull == Pin.PULL_DOWN else 1)
+
+    __call__ = value
+
+    def on(self):
+        self.v = 1
+
+    def off(self):
+        self.v = 0
+
+    def high(self):
+        self.v = 1
+
+    def low(self):
+        self.v = 0
+
+    def toggle(self):
+        self.v ^= 1
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING):
+        pass
+
+
+class ADC:
+    def __init__(self, pin):
+        self.gpio = pin.id if isinstance(pin, Pin) else pin
+
+    def read_u16(self):
+        return board.adc(self.gpio)
+
+
+class SPI:
+    def __init__(self, id=0, baudrate=1000000, **kwargs):
+        self.id = id
+        self.baudrate = baudrate
+
+    def init(self, baudrate=1000000, **kwargs):
+        self.baudrate = baudrate
+
+    def write(self, buf):
+        board.count("spi_bytes", len(buf))
+
+    def deinit(self):
+        pass
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kwargs):
+        self.th = None
+        self.stop = None
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=PERIODIC, freq=-1, period=-1, callback=None):
+        self.deinit()
+        dt = 1.0 / freq if freq > 0 else period / 1000.0
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(dt):
+                callback(self)
+                if mode == Timer.ONE_SHOT:
+                    break
+
+        self.stop = stop
+        self.th = threading.Thread(target=run, daemon=True)
+        self.th.start()
+
+    def deinit(self):
+        if self.stop:
+            self.stop.set()
+        self.stop = None
+        self.th = None
+
+
+class RTC:
+    dt = None
+
+    def datetime(self, t=None):
+        if t is None:
+            if RTC.dt:
+                return RTC.dt
+            lt = time.localtime()
+            return (lt[0], lt[1], lt[2], lt[6], lt[3], lt[4], lt[5], 0)
+        RTC.dt = tuple(t)
+
+
+def reset():
+    raise SystemExit("machine.reset()")
+
+
+soft_reset = reset
+
+
+def unique_id():
+    return b"\xe6\x61\x41\x04\x03\x5b\x2a\x2c"
+
+
+def freq(hz=None):
+    return 125000000
+
+
+def lightsleep(ms=None):
+    time.sleep((ms or 0) / 1000)
+
+
+def deepsleep(ms=None):
+    raise SystemExit("machine.deepsleep()")
+
+
+def idle():
+    pass
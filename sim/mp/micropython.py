@@ -0,0 +1,35 @@
+# Ersatz für micropython im Host-Simulator: const() und die Code-Emitter
+# (native, viper) sind wirkungslos, schedule() ruft sofort auf.
+
+
+def const(x):
+    return x
+
+
+def native(f):
+    return f
+
+
+def viper(f):
+    return f
+
+
+def schedule(f, arg):
+    f(arg)
+    return True
+
+
+def alloc_emergency_exception_buf(n):
+    pass
+
+
+def mem_info(verbose=False):
+    print("mem: simuliert")
+
+
+def opt_level(level=None):
+    return 0
+
+
+def kbd_intr(c):
+    pass
@@ -0,0 +1,89 @@
+# Ersatz für network (MicroPython) im Host-Simulator: ein WLAN, dessen
+# Verbindungsaufbau die in sim/board.py eingestellte Zeit braucht.
+
+from sim import board
+
+STA_IF = 0
+AP_IF = 1
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_WRONG_PASSWORD = -3
+STAT_NO_AP_FOUND = -2
+STAT_CONNECT_FAIL = -1
+STAT_GOT_IP = 3
+
+_BSSID = b"\x02\x50\x4d\x42\x00\x01"
+_CHANNEL = 6
+_DHCP = ("192.168.178.42", "255.255.255.0", "192.168.178.1", "192.168.178.1")
+
+
+class WLAN:
+    _state = {}                  # je Interface, wie auf dem Pico gibt es jedes nur einmal
+
+    def __init__(self, interface=STA_IF):
+        self.s = WLAN._state.setdefault(interface, {
+            "active": False, "t": None, "need": 0, "ssid": None,
+            "static": None, "ip": None})
+
+    def active(self, v=None):
+        if v is None:
+            return self.s["active"]
+        self.s["active"] = bool(v)
+
+    def config(self, *args, **kwargs):
+        if args:
+            if args[0] == "mac":
+                return b"\x28\xcd\xc1\x00\x00\x01"
+            if args[0] == "ssid":
+                return self.s["ssid"]
+            if args[0] == "channel":
+                return _CHANNEL
+            return None
+
+    def connect(self, ssid=None, key=None, bssid=None):
+        # gezielt (BSSID) spart den Scan, eine feste Adresse das DHCP
+        s = self.s
+        s["ssid"] = ssid
+        s["t"] = board.ms()
+        s["ip"] = None
+        if bssid is not None and bssid == _BSSID:
+            s["need"] = board.cfg["wifi_fast_ms"]
+            if s["static"] is None:
+                s["need"] += board.cfg["wifi_dhcp_ms"]
+        elif bssid is not None:
+            s["need"] = None     # Access Point gibt es nicht (mehr)
+        else:
+            s["need"] = board.cfg["wifi_full_ms"]
+        board.count("wifi_connects")
+
+    def disconnect(self):
+        self.s["t"] = None
+        self.s["ip"] = None
+
+    def status(self, param=None):
+        s = self.s
+        if param == "rssi":
+            return -55
+        if s["t"] is None:
+            return STAT_IDLE
+        if not board.cfg["wifi_ok"] or s["need"] is None:
+            return STAT_NO_AP_FOUND if board.ms() - s["t"] > 3000 else STAT_CONNECTING
+        if board.ms() - s["t"] < s["need"]:
+            return STAT_CONNECTING
+        if s["ip"] is None:
+            s["ip"] = s["static"] or _DHCP
+        return STAT_GOT_IP
+
+    def isconnected(self):
+        return self.status() == STAT_GOT_IP
+
+    def ifconfig(self, cfg=None):
+        if cfg is None:
+            return self.s["ip"] or ("0.0.0.0", "0.0.0.0", "0.0.0.0", "0.0.0.0")
+        self.s["static"] = None if cfg == "dhcp" else tuple(cfg)
+
+    def scan(self):
+        # (ssid, bssid, channel, RSSI, security, hidden)
+        ssid = self.s["ssid"] or board.cfg["wifi_ssid"]
+        return [(ssid.encode(), _BSSID, _CHANNEL, -55, 3, False),
+                (b"Nachbar", b"\x02\x00\x00\x00\x00\x07", 11, -80, 3, False)]
@@ -0,0 +1,87 @@
+# Ersatz für picographics (Pimoroni) im Host-Simulator: zeichnet in einen
+# RGB565 Framebuffer, update() zählt die SPI-Bytes des ganzen Framebuffers.
+
+from sim import board
+from sim.fb import FB
+
+DISPLAY_PICO_DISPLAY = 0
+PEN_RGB332 = 2
+PEN_RGB565 = 3
+
+_SIZE = {DISPLAY_PICO_DISPLAY: (240, 135)}
+
+last = None                      # zuletzt angelegtes Display, für --dump
+
+
+class PicoGraphics:
+    def __init__(self, display=DISPLAY_PICO_DISPLAY, bus=None, pen_type=PEN_RGB565, rotate=0, **kwargs):
+        global last
+        w, h = _SIZE.get(display, (240, 135))
+        if rotate in (90, 270):
+            w, h = h, w
+        self.fb = FB(w, h)
+        self.pen = 0
+        self.scale = 1
+        self.font = "bitmap8"
+        last = self
+
+    def get_bounds(self):
+        return self.fb.w, self.fb.h
+
+    def create_pen(self, r, g, b):
+        return ((r & 0xf8) << 8) | ((g & 0xfc) << 3) | (b >> 3)
+
+    def set_pen(self, pen):
+        self.pen = pen
+
+    def set_font(self, font):
+        self.font = font
+
+    def set_backlight(self, v):
+        pass
+
+    def set_clip(self, x, y, w, h):
+        self.fb.set_clip(x, y, w, h)
+
+    def remove_clip(self):
+        self.fb.remove_clip()
+
+    def clear(self):
+        x, y, x1, y1 = self.fb.clip
+        self.fb.fill_rect(x, y, x1 - x, y1 - y, self.pen)
+
+    def pixel(self, x, y):
+        self.fb.pixel(x, y, self.pen)
+
+    def pixel_span(self, x, y, n):
+        self.fb.hline(x, y, n, self.pen)
+
+    def line(self, x1, y1, x2, y2, thickness=1):
+        self.fb.line(x1, y1, x2, y2, self.pen)
+
+    def rectangle(self, x, y, w, h):
+        self.fb.fill_rect(x, y, w, h, self.pen)
+
+    def triangle(self, x1, y1, x2, y2, x3, y3):
+        self.fb.triangle(x1, y1, x2, y2, x3, y3, self.pen)
+
+    def circle(self, x, y, r):
+        self.fb.circle(x, y, r, self.pen)
+
+    def text(self, text, x, y, wordwrap=-1, scale=1, angle=0, spacing=1):
+        # Glyphen werden nicht gezeichnet, gezählt wird die Fläche (bitmap8: 6x8)
+        w = len(text) * 6 * scale
+        if wordwrap > 0:
+            w = min(w, wordwrap)
+        board.count("pixels", w * 8 * scale)
+
+    def measure_text(self, text, scale=1, spacing=1):
+        return len(text) * 6 * scale
+
+    def update(self):
+        board.count("updates")
+        board.count("spi_bytes", self.fb.w * self.fb.h * 2)
+
+    def partial_update(self, x, y, w, h):
+        # wie der ST7789 Treiber von PicoGraphics: es geht immer der ganze Framebuffer raus
+        self.update()
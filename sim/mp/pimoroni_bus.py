@@ -0,0 +1,6 @@
+# Ersatz für pimoroni_bus im Host-Simulator
+
+
+class SPIBus:
+    def __init__(self, cs=17, dc=16, sck=18, mosi=19, miso=-1, bl=20):
+        self.bl = bl
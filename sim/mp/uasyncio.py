@@ -0,0 +1,84 @@
+# Ersatz für uasyncio im Host-Simulator auf Basis von asyncio: sleep_ms(),
+# ThreadSafeFlag, Streams mit readinto() und run() mit begrenzter Laufzeit.
+
+import asyncio
+from asyncio import (CancelledError, Event, Lock, TimeoutError, create_task, gather,
+                     get_event_loop, sleep, wait_for)
+
+from sim import board
+
+
+def sleep_ms(ms):
+    return asyncio.sleep(ms / 1000)
+
+
+def current_task():
+    return asyncio.current_task()
+
+
+class StreamReader:
+    # asyncio.StreamReader mit readinto() wie in uasyncio
+    def __init__(self, r):
+        self.r = r
+
+    async def read(self, n=-1):
+        return await self.r.read(n)
+
+    async def readexactly(self, n):
+        return await self.r.readexactly(n)
+
+    async def readline(self):
+        return await self.r.readline()
+
+    async def readinto(self, buf):
+        b = await self.r.read(len(buf))
+        buf[:len(b)] = b
+        return len(b)
+
+
+async def open_connection(host, port, ssl=None):
+    r, w = await asyncio.open_connection(host, port, ssl=ssl)
+    return StreamReader(r), w
+
+
+class ThreadSafeFlag:
+    # set() darf aus Timer-Threads bzw. BLE-IRQs kommen
+    def __init__(self):
+        self.e = asyncio.Event()
+        self.loop = None
+
+    def set(self):
+        if self.loop is None:
+            try:
+                self.loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.e.set()
+                return
+        self.loop.call_soon_threadsafe(self.e.set)
+
+    def clear(self):
+        self.e.clear()
+
+    async def wait(self):
+        self.loop = asyncio.get_running_loop()
+        await self.e.wait()
+        self.e.clear()
+
+
+def run(coro):
+    # läuft höchstens board.cfg["seconds"], danach endet das Skript wie nach Strg-C
+    s = board.cfg["seconds"]
+    if not s:
+        return asyncio.run(coro)
+
+    async def limited():
+        try:
+            return await asyncio.wait_for(coro, s)
+        except asyncio.TimeoutError:
+            return None
+
+    return asyncio.run(limited())
+
+
+def new_event_loop():
+    return asyncio.new_event_loop()
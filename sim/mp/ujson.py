@@ -0,0 +1,2 @@
+# Ersatz für ujson im Host-Simulator
+from json import dump, dumps, load, loads
@@ -0,0 +1,50 @@
+# Ersatz für urequests im Host-Simulator: eine Verbindung je Request, HTTP/1.0
+
+import http.client
+from urllib.parse import urlsplit
+
+
+class Response:
+    def __init__(self, status_code, content, headers):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+
+    @property
+    def text(self):
+        return self.content.decode()
+
+    def json(self):
+        import json
+        return json.loads(self.content)
+
+    def close(self):
+        pass
+
+
+def request(method, url, data=None, json=None, headers={}, timeout=None):
+    u = urlsplit(url)
+    c = http.client.HTTPConnection(u.hostname, u.port or 80, timeout=timeout)
+    c._http_vsn = 10
+    c._http_vsn_str = "HTTP/1.0"
+    if json is not None:
+        import json as j
+        data = j.dumps(json)
+        headers = dict(headers, **{"Content-Type": "application/json"})
+    c.request(method, (u.path or "/") + ("?" + u.query if u.query else ""), data, headers)
+    r = c.getresponse()
+    resp = Response(r.status, b"" if method == "HEAD" else r.read(), dict(r.getheaders()))
+    c.close()
+    return resp
+
+
+def head(url, **kw):
+    return request("HEAD", url, **kw)
+
+
+def get(url, **kw):
+    return request("GET", url, **kw)
+
+
+def post(url, **kw):
+    return request("POST", url, **kw)
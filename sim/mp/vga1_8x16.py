@@ -0,0 +1,8 @@
+# Ersatz für den Font vga1_8x16 (russhughes) im Host-Simulator: Maße wie
+# das Original, alle 128 Glyphen leer.
+
+WIDTH = 8
+HEIGHT = 16
+FIRST = 0x00
+LAST = 0x7f
+FONT = bytes(128 * 16 * ((8 + 7) // 8))
@@ -0,0 +1,8 @@
+# Ersatz für den Font vga2_8x8 (russhughes) im Host-Simulator: Maße wie
+# das Original, alle 256 Glyphen leer.
+
+WIDTH = 8
+HEIGHT = 8
+FIRST = 0x00
+LAST = 0xff
+FONT = bytes(256 * 8 * ((8 + 7) // 8))
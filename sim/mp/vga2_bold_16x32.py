@@ -0,0 +1,8 @@
+# Ersatz für den Font vga2_bold_16x32 (russhughes) im Host-Simulator: Maße wie
+# das Original, alle 256 Glyphen leer.
+
+WIDTH = 16
+HEIGHT = 32
+FIRST = 0x00
+LAST = 0xff
+FONT = bytes(256 * 32 * ((16 + 7) // 8))
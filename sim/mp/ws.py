@@ -0,0 +1,240 @@
+# Ersatz für ws.py (https://github.com/Vovaman/micropython_async_websocket_client)
+# im Host-Simulator, gleiche Schnittstelle auf einem nicht blockierenden
+# CPython-Socket mit read()/readline()/readinto()/write() wie unter MicroPython.
+
+import binascii
+import os
+import random
+import socket
+import struct
+
+import uasyncio as a
+
+OP_CONT = 0x0
+OP_TEXT = 0x1
+OP_BYTES = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xa
+
+
+class _Sock:
+    # MicroPython-Stream: liefert None, solange keine Daten da sind, b"" bei Ende
+    def __init__(self, s):
+        self.s = s
+        self.rx = b""
+
+    def _fill(self):
+        try:
+            b = self.s.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return None
+        self.rx += b
+        return len(b)
+
+    def read(self, n=None):
+        if not self.rx and self._fill() is None:
+            return None
+        if n is None:
+            n = len(self.rx)
+        b = self.rx[:n]
+        self.rx = self.rx[n:]
+        return b
+
+    def readinto(self, mv):
+        b = self.read(len(mv))
+        if b is None:
+            return None
+        mv[:len(b)] = b
+        return len(b)
+
+    def readline(self):
+        while b"\n" not in self.rx:
+            k = self._fill()
+            if k is None:
+                return None
+            if k == 0:
+                break
+        i = self.rx.find(b"\n") + 1 or len(self.rx)
+        b = self.rx[:i]
+        self.rx = self.rx[i:]
+        return b
+
+    def write(self, b):
+        self.s.setblocking(True)
+        self.s.sendall(b)
+        self.s.setblocking(False)
+        return len(b)
+
+    def close(self):
+        self.s.close()
+
+
+class _URI:
+    def __init__(self, uri):
+        self.protocol, rest = uri.split("://", 1)
+        host, _, path = rest.partition("/")
+        self.path = "/" + path
+        self.hostname, _, port = host.partition(":")
+        self.port = int(port) if port else (443 if self.protocol == "wss" else 80)
+
+
+class AsyncWebsocketClient:
+    def __init__(self, ms_delay_for_read: int = 5):
+        self._open = False
+        self.delay_read = ms_delay_for_read
+        self._lock_for_open = a.Lock()
+        self.sock = None
+
+    async def open(self, new_val: bool = None):
+        async with self._lock_for_open:
+            if new_val is not None:
+                if not new_val and self.sock:
+                    self.sock.close()
+                    self.sock = None
+                self._open = new_val
+            return self._open
+
+    async def close(self):
+        return await self.open(False)
+
+    def urlparse(self, uri):
+        return _URI(uri)
+
+    async def a_readline(self):
+        line = None
+        while line is None:
+            line = self.sock.readline()
+            await a.sleep_ms(self.delay_read)
+        return line
+
+    async def a_read(self, size: int = None):
+        if size == 0:
+            return b""
+        chunks = []
+        while True:
+            b = self.sock.read(size)
+            await a.sleep_ms(self.delay_read)
+            if b is None:
+                continue
+            if len(b) == 0:
+                break
+            chunks.append(b)
+            if size is None:
+                break
+            size -= len(b)
+            if size == 0:
+                break
+        return b"".join(chunks)
+
+    async def handshake(self, uri, headers=[], keyfile=None, certfile=None, cafile=None, cert_reqs=0):
+        if self.sock:
+            await self.close()
+        self.uri = self.urlparse(uri)
+        ai = socket.getaddrinfo(self.uri.hostname, self.uri.port, 0, socket.SOCK_STREAM)
+        s = socket.socket(ai[0][0], socket.SOCK_STREAM)
+        s.settimeout(5)
+        s.connect(ai[0][-1])
+        s.setblocking(False)
+        self.sock = _Sock(s)
+
+        def send_header(header, *args):
+            self.sock.write(header % args + b"\r\n")
+
+        key = binascii.b2a_base64(os.urandom(16))[:-1]
+        send_header(b"GET %s HTTP/1.1", self.uri.path.encode())
+        send_header(b"Host: %s:%d", self.uri.hostname.encode(), self.uri.port)
+        send_header(b"Connection: Upgrade")
+        send_header(b"Upgrade: websocket")
+        send_header(b"Sec-WebSocket-Key: %s", key)
+        send_header(b"Sec-WebSocket-Version: 13")
+        send_header(b"Origin: http://%s:%d", self.uri.hostname.encode(), self.uri.port)
+        for k, v in headers:
+            send_header(b"%s: %s", k, v)
+        send_header(b"")
+
+        line = await self.a_readline()
+        header = line[:-2]
+        if not header.startswith(b"HTTP/1.1 101 "):
+            raise Exception(header)
+        while header:
+            line = await self.a_readline()
+            header = line[:-2]
+        return await self.open(True)
+
+    async def read_frame(self, max_size=None):
+        byte1, byte2 = struct.unpack("!BB", await self.a_read(2))
+        fin = bool(byte1 & 0x80)
+        opcode = byte1 & 0x0f
+        mask = bool(byte2 & (1 << 7))
+        length = byte2 & 0x7f
+        if length == 126:
+            length, = struct.unpack("!H", await self.a_read(2))
+        elif length == 127:
+            length, = struct.unpack("!Q", await self.a_read(8))
+        if mask:
+            mask_bits = await self.a_read(4)
+        data = await self.a_read(length)
+        if mask:
+            data = bytes(b ^ mask_bits[i % 4] for i, b in enumerate(data))
+        return fin, opcode, data
+
+    def write_frame(self, opcode, data=b""):
+        fin = True
+        mask = True
+        length = len(data)
+        byte1 = 0x80 if fin else 0
+        byte1 |= opcode
+        byte2 = 0x80 if mask else 0
+        if length < 126:
+            byte2 |= length
+            self.sock.write(struct.pack("!BB", byte1, byte2))
+        elif length < (1 << 16):
+            byte2 |= 126
+            self.sock.write(struct.pack("!BBH", byte1, byte2, length))
+        else:
+            byte2 |= 127
+            self.sock.write(struct.pack("!BBQ", byte1, byte2, length))
+        if mask:
+            mask_bits = struct.pack("!I", random.getrandbits(32))
+            self.sock.write(mask_bits)
+            data = bytes(b ^ mask_bits[i % 4] for i, b in enumerate(data))
+        self.sock.write(data)
+
+    async def recv(self):
+        while await self.open():
+            try:
+                fin, opcode, data = await self.read_frame()
+            except ValueError:
+                await self.open(False)
+                return
+            if not fin:
+                raise NotImplementedError()
+            if opcode == OP_TEXT:
+                return bytes(data).decode("utf-8")
+            elif opcode == OP_BYTES:
+                return data
+            elif opcode == OP_CLOSE:
+                await self.open(False)
+                return
+            elif opcode == OP_PONG:
+                continue
+            elif opcode == OP_PING:
+                self.write_frame(OP_PONG, data)
+                continue
+            elif opcode == OP_CONT:
+                raise NotImplementedError(opcode)
+            else:
+                raise ValueError(opcode)
+
+    async def send(self, buf):
+        if not await self.open():
+            return
+        if isinstance(buf, str):
+            opcode = OP_TEXT
+            buf = buf.encode("utf-8")
+        elif isinstance(buf, (bytes, bytearray, memoryview)):
+            opcode = OP_BYTES
+        else:
+            raise TypeError()
+        self.write_frame(opcode, buf)
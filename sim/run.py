@@ -0,0 +1,75 @@
+# Startet ein RC-Skript unverändert unter CPython: Ersatz-Module aus sim/mp
+# vor den Suchpfad, time/gc/socket um die MicroPython-Funktionen ergänzen,
+# Flash-Verzeichnis als Arbeitsverzeichnis.
+
+import gc
+import os
+import runpy
+import shutil
+import socket
+import sys
+import tempfile
+import time
+
+from sim import board
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_ROOT = os.path.dirname(_HERE)
+_FILES = ("Logo.jpg", "Logo240.jpg")     # werden auf den "Flash" kopiert
+
+_getaddrinfo = socket.getaddrinfo
+
+
+def getaddrinfo(host, port, *args, **kwargs):
+    # Namen wie pimowbot.local über board.cfg["hosts"] statt mDNS
+    return _getaddrinfo(board.cfg["hosts"].get(host, host), port, *args, **kwargs)
+
+
+def install():
+    mp = os.path.join(_HERE, "mp")
+    if mp not in sys.path:
+        sys.path.insert(0, mp)
+    if _ROOT not in sys.path:
+        sys.path.insert(1, _ROOT)
+    time.ticks_ms = board.ticks_ms
+    time.ticks_us = board.ticks_us
+    time.ticks_add = board.ticks_add
+    time.ticks_diff = board.ticks_diff
+    time.sleep_ms = lambda ms: time.sleep(ms / 1000)
+    time.sleep_us = lambda us: time.sleep(us / 1000000)
+    gc.mem_free = lambda: 150000
+    gc.mem_alloc = lambda: 40000
+    gc.threshold = lambda n=None: -1
+    socket.getaddrinfo = getaddrinfo
+
+
+def flash(path=None):
+    # Verzeichnis für Dateien des Pico (myLog.txt, joycal.json, wifi.json ...)
+    if path is None:
+        path = tempfile.mkdtemp(prefix="picorc-")
+    os.makedirs(path, exist_ok=True)
+    for f in _FILES:
+        if not os.path.exists(os.path.join(path, f)):
+            shutil.copy(os.path.join(_ROOT, f), path)
+    return path
+
+
+def run(script, flash_dir=None, **cfg):
+    # script: z.B. "RCjoy.py", cfg überschreibt board.cfg, liefert board.report()
+    board.cfg.update(cfg)
+    install()
+    script = os.path.abspath(os.path.join(_ROOT, script) if not os.path.exists(script) else script)
+    cwd = os.getcwd()
+    os.chdir(flash(flash_dir))
+    try:
+        runpy.run_path(script, run_name="__main__")
+        reason = "Ende"
+    except SystemExit as ex:
+        reason = str(ex) or "SystemExit"
+    except KeyboardInterrupt:
+        reason = "KeyboardInterrupt"
+    finally:
+        os.chdir(cwd)
+    r = board.report()
+    r["exit"] = reason
+    return r